@@ -0,0 +1,10 @@
+"""
+Benchmark suite for the hot paths of self-play and training.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output results.json --baseline benchmarks/baseline.json
+
+The standalone ``bench_*.py`` scripts compare implementation variants; the
+suite tracks the current implementation over time.
+"""
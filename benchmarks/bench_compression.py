@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Benchmark policy-head pruning and int8 quantization of an ActorCriticNetwork.
+
+Reports checkpoint size, per-position latency of scoring the legal moves,
+and the policy KL / top-1 agreement of each compressed variant against the
+float network.
+
+Usage:
+    python -m benchmarks.bench_compression --checkpoint models/agent1.pth --positions 200
+"""
+
+import argparse
+import timeit
+
+import torch
+
+from benchmarks.harness import random_positions
+from robo_knights.environment.encoding import encode_boards
+from robo_knights.models.actor_critic import ActorCriticNetwork
+from robo_knights.models.compression import compare_policies, compress_network, model_size_bytes
+from robo_knights.models.export import load_network
+from robo_knights.utils.move_encoding import legal_indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Policy head compression benchmark")
+    parser.add_argument("--checkpoint", type=str, default=None,
+                        help="ChessAgent checkpoint (default: a freshly initialized network)")
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    model = load_network(args.checkpoint) if args.checkpoint else ActorCriticNetwork()
+    model.eval()
+
+    boards = random_positions(args.positions)
+    states = torch.from_numpy(encode_boards(boards)).reshape(len(boards), -1)
+    indices = [torch.from_numpy(legal_indices(board)) for board in boards]
+    calls = args.positions * args.repeat
+
+    variants = {
+        "float": model,
+        "pruned": compress_network(model, prune=True, quantize=False),
+        "int8": compress_network(model, prune=False, quantize=True),
+        "pruned+int8": compress_network(model, prune=True, quantize=True),
+        "pruned+int8+trunk": compress_network(model, prune=True, quantize=True, quantize_trunk=True),
+    }
+
+    base_size = model_size_bytes(model)
+    base_time = None
+    print(f"{'variant':18s} {'size KB':>9s} {'us/pos':>8s} {'speedup':>8s} {'KL':>10s} {'top-1':>6s}")
+    for name, net in variants.items():
+        def run():
+            for i in range(len(boards)):
+                net(states[i:i + 1], indices[i])
+
+        with torch.inference_mode():
+            run()
+            elapsed = timeit.timeit(run, number=args.repeat) / calls
+        base_time = base_time or elapsed
+        accuracy = compare_policies(model, net, boards)
+        size = model_size_bytes(net)
+        print(f"{name:18s} {size / 1024:9.0f} {elapsed * 1e6:8.1f} {base_time / elapsed:7.2f}x "
+              f"{accuracy['kl']:10.2e} {accuracy['top1']:6.3f}   ({base_size / size:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Benchmark the bitboard state encoder against the original per-square loop.
+
+Usage:
+    python -m benchmarks.bench_state_encoding --positions 200 --repeat 20
+"""
+
+import argparse
+import timeit
+
+import chess
+import numpy as np
+
+from benchmarks.harness import random_positions
+from robo_knights.environment.encoding import BoardEncoder, encode_board, encode_boards
+
+
+def loop_encode(board):
+    """Reference encoder: the original 64-square loop from ChessEnv.get_state."""
+    state = np.zeros((8, 8, 12), dtype=np.float32)
+    for square in chess.SQUARES:
+        piece = board.piece_at(square)
+        if piece is not None:
+            plane_idx = piece.piece_type - 1 + (0 if piece.color else 6)
+            rank, file = divmod(square, 8)
+            state[rank, file, plane_idx] = 1.0
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="State encoding benchmark")
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    boards = random_positions(args.positions)
+    for board in boards:
+        assert np.array_equal(loop_encode(board), encode_board(board))
+
+    buffer = np.empty((8, 8, 12), dtype=np.float32)
+    batch_buffer = np.empty((len(boards), 8, 8, 12), dtype=np.float32)
+    encoder = BoardEncoder(np.empty((8, 8, 12), dtype=np.float32))
+    calls = args.positions * args.repeat
+
+    def run_loop():
+        for board in boards:
+            loop_encode(board)
+
+    def run_bitboard():
+        for board in boards:
+            encode_board(board, out=buffer)
+
+    def run_reused():
+        for board in boards:
+            encoder.encode(board)
+
+    def run_batched():
+        encode_boards(boards, out=batch_buffer)
+
+    loop_time = timeit.timeit(run_loop, number=args.repeat) / calls
+    bitboard_time = timeit.timeit(run_bitboard, number=args.repeat) / calls
+    reused_time = timeit.timeit(run_reused, number=args.repeat) / calls
+    batched_time = timeit.timeit(run_batched, number=args.repeat) / calls
+
+    print(f"per-square loop:   {loop_time * 1e6:8.2f} us/position")
+    print(f"bitboard encoder:  {bitboard_time * 1e6:8.2f} us/position "
+          f"({loop_time / bitboard_time:.1f}x)")
+    print(f"reused encoder:    {reused_time * 1e6:8.2f} us/position "
+          f"({loop_time / reused_time:.1f}x)")
+    print(f"batched encoder:   {batched_time * 1e6:8.2f} us/position "
+          f"({loop_time / batched_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Timing, metadata and baseline comparison for the benchmark suite.
+
+Every benchmark reports a throughput (higher is better), so a regression is
+always a drop below the baseline.
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+# Run from a checkout without installing the package
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import chess  # noqa: E402
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+
+# name -> (group, unit, function); a function takes ``quick`` and returns a
+# zero-argument callable to time plus the number of operations per call
+BENCHMARKS = {}
+
+
+def benchmark(name, group, unit="ops/s"):
+    """Register a benchmark setup function under ``name``."""
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name!r} is already registered")
+        BENCHMARKS[name] = (group, unit, setup)
+        return setup
+    return register
+
+
+def random_game(max_plies=120, seed=0):
+    """Play random legal moves from the starting position."""
+    rng = random.Random(seed)
+    board = chess.Board()
+    while board.ply() < max_plies:
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+    return board
+
+
+def random_positions(count, max_plies=120, seed=0):
+    """Positions with at least one legal move, from random games."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = random_game(rng.randint(0, max_plies), rng.random())
+        if any(board.legal_moves):
+            boards.append(board)
+    return boards
+
+
+def measure(fn, ops_per_call=1, min_time=0.2, repeat=5):
+    """
+    Time a callable.
+
+    The call count per repeat is calibrated so that one repeat takes about
+    ``min_time`` seconds.
+
+    Args:
+        fn (callable): Zero-argument function to time
+        ops_per_call (int): Operations one call performs (e.g. the batch size)
+        min_time (float): Target seconds per repeat
+        repeat (int): Number of timed repeats
+
+    Returns:
+        dict: value (median ops/s), best (fastest repeat, ops/s), stdev
+            (ops/s), calls (per repeat) and repeat
+    """
+    fn()
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 2 or calls >= 1 << 20:
+            break
+        calls *= 2
+    calls = max(1, int(calls * min_time / max(elapsed, 1e-9)))
+
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        rates.append(calls * ops_per_call / (time.perf_counter() - start))
+    return {
+        "value": statistics.median(rates),
+        "best": max(rates),
+        "stdev": statistics.stdev(rates) if len(rates) > 1 else 0.0,
+        "calls": calls,
+        "repeat": repeat,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def machine_info():
+    """Describe the machine and library setup the results were measured on."""
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "torch_interop_threads": torch.get_num_interop_threads(),
+        "numpy": np.__version__,
+        "git_commit": _git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(names, quick=False, min_time=0.2, repeat=5, verbose=True):
+    """
+    Run benchmarks.
+
+    Args:
+        names (list): Registered benchmark names
+        quick (bool): Use smaller workloads (for smoke runs)
+        min_time (float): Target seconds per repeat
+        repeat (int): Timed repeats per benchmark
+        verbose (bool): Print each result as it is measured
+
+    Returns:
+        dict: Benchmark name -> result (see ``measure``, plus group and unit)
+    """
+    results = {}
+    for name in names:
+        group, unit, setup = BENCHMARKS[name]
+        fn, ops_per_call = setup(quick)
+        result = measure(fn, ops_per_call, min_time, repeat)
+        result.update(group=group, unit=unit)
+        results[name] = result
+        if verbose:
+            print(f"{name:32s} {result['value']:14.1f} {unit:10s} "
+                  f"(+-{result['stdev'] / result['value']:.1%})")
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Benchmark name -> result
+        baseline (dict): Benchmark name -> result of the baseline run
+        threshold (float): Relative drop that counts as a regression
+
+    Returns:
+        list: (name, baseline value, value, relative change, regressed) tuples
+            for every benchmark present in both
+    """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["value"]
+        change = result["value"] / before - 1.0
+        rows.append((name, before, result["value"], change, change < -threshold))
+    return rows
+
+
+def save(path, results, quick=False):
+    """Write results with machine metadata as JSON."""
+    with open(path, "w") as f:
+        json.dump({"machine": machine_info(), "quick": quick, "results": results}, f, indent=2)
+        f.write("\n")
+
+
+def load(path):
+    """Read a results file written by ``save``."""
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,55 @@
+"""
+Macro-benchmarks: whole self-play games and training updates.
+"""
+
+import random
+
+import torch
+
+from benchmarks.harness import benchmark, random_positions
+from robo_knights.agents.chess_agent import ChessAgent
+from robo_knights.environment.chess_env import ChessEnv
+from robo_knights.environment.encoding import encode_boards
+from robo_knights.models.actor_critic import ActorCriticNetwork
+from robo_knights.training.self_play import play_self_play_game
+
+
+def _self_play(quick):
+    """A self-play game that is the same on every call, and its length."""
+    model = ActorCriticNetwork().eval()
+    env = ChessEnv(info_level="none")
+    max_plies = 60 if quick else 200
+
+    def run():
+        torch.manual_seed(0)
+        white, black = play_self_play_game(model, env, max_plies=max_plies)
+        return len(white) + len(black)
+    return run, run()
+
+
+@benchmark("selfplay_games", "macro", "games/s")
+def selfplay_games(quick):
+    run, _ = _self_play(quick)
+    return run, 1
+
+
+@benchmark("selfplay_plies", "macro", "plies/s")
+def selfplay_plies(quick):
+    return _self_play(quick)
+
+
+@benchmark("train_reinforce_updates", "macro", "updates/s")
+def train_reinforce_updates(quick):
+    agent = ChessAgent()
+    boards = random_positions(20 if quick else 80, seed=1)
+    states = encode_boards(boards)
+    legal = [list(board.legal_moves) for board in boards]
+    rewards = [random.Random(i).uniform(-0.1, 0.1) for i in range(len(boards))]
+
+    def run():
+        # One episode of acting with autograd graphs, then one REINFORCE update
+        for state, moves, board in zip(states, legal, boards):
+            agent.select_action(state, moves, board=board)
+        agent.rewards = list(rewards)
+        agent.finish_episode()
+    return run, 1
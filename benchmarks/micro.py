@@ -0,0 +1,134 @@
+"""
+Micro-benchmarks: the per-ply operations of self-play and training.
+"""
+
+import numpy as np
+import torch
+
+from benchmarks.harness import benchmark, random_game, random_positions
+from robo_knights.agents.chess_agent import ChessAgent
+from robo_knights.environment.chess_env import ChessEnv
+from robo_knights.environment.encoding import encode_board, encode_boards
+from robo_knights.models.actor_critic import ActorCriticNetwork
+from robo_knights.utils.move_encoding import (index_to_move, legal_indices, legal_mask,
+                                              move_to_index, moves_to_indices)
+
+
+@benchmark("encode_state", "micro", "positions/s")
+def encode_state(quick):
+    boards = random_positions(50 if quick else 200)
+    out = np.empty((8, 8, 12), dtype=np.float32)
+
+    def run():
+        for board in boards:
+            encode_board(board, out=out)
+    return run, len(boards)
+
+
+@benchmark("legal_mask", "micro", "positions/s")
+def build_legal_mask(quick):
+    boards = random_positions(50 if quick else 200)
+    out = np.zeros(64 * 64 * 5, dtype=bool)
+
+    def run():
+        for board in boards:
+            legal_mask(board, out=out)
+    return run, len(boards)
+
+
+def _forward(batch_size):
+    def setup(quick):
+        model = ActorCriticNetwork().eval()
+        boards = random_positions(batch_size)
+        states = torch.from_numpy(encode_boards(boards)).reshape(batch_size, -1)
+
+        def run():
+            with torch.inference_mode():
+                model(states)
+        return run, batch_size
+    return setup
+
+
+for _batch in (1, 64, 512):
+    benchmark(f"forward_batch{_batch}", "micro", "positions/s")(_forward(_batch))
+
+
+@benchmark("forward_legal_batch1", "micro", "positions/s")
+def forward_legal(quick):
+    model = ActorCriticNetwork().eval()
+    boards = random_positions(50 if quick else 200)
+    states = torch.from_numpy(encode_boards(boards)).reshape(len(boards), -1)
+    indices = [torch.from_numpy(legal_indices(board)) for board in boards]
+
+    def run():
+        with torch.inference_mode():
+            for i in range(len(boards)):
+                model(states[i:i + 1], indices[i])
+    return run, len(boards)
+
+
+@benchmark("select_action", "micro", "moves/s")
+def select_action(quick):
+    agent = ChessAgent()
+    boards = random_positions(50 if quick else 200)
+    states = encode_boards(boards)
+    legal = [list(board.legal_moves) for board in boards]
+
+    def run():
+        # Training path: the autograd graph of every move is kept until the update
+        for state, moves, board in zip(states, legal, boards):
+            agent.select_action(state, moves, board=board)
+        agent.saved_log_probs.clear()
+        agent.saved_values.clear()
+    return run, len(boards)
+
+
+@benchmark("env_step", "micro", "plies/s")
+def env_step(quick):
+    moves = random_game(120 if quick else 400).move_stack
+    env = ChessEnv(info_level="none")
+
+    def run():
+        env.reset()
+        for move in moves:
+            env.step(move)
+    return run, len(moves)
+
+
+@benchmark("reward", "micro", "plies/s")
+def reward(quick):
+    game = random_game(120 if quick else 400)
+    envs = []
+    env = ChessEnv(info_level="none")
+    for move in game.move_stack:
+        env.step(move)
+        snapshot = ChessEnv(info_level="none")
+        snapshot.board = env.board.copy()
+        snapshot.material = list(env.material)
+        envs.append((snapshot, move))
+
+    def run():
+        # The outcome is part of the cost: ChessEnv computes it for every reward
+        for snapshot, move in envs:
+            snapshot.reward_fn(snapshot, move, snapshot.board.outcome())
+    return run, len(envs)
+
+
+@benchmark("move_codec", "micro", "moves/s")
+def move_codec(quick):
+    moves = [move for board in random_positions(20 if quick else 100) for move in board.legal_moves]
+
+    def run():
+        for move in moves:
+            index_to_move(move_to_index(move))
+    return run, len(moves)
+
+
+@benchmark("moves_to_indices", "micro", "moves/s")
+def batch_move_codec(quick):
+    legal = [list(board.legal_moves) for board in random_positions(20 if quick else 100)]
+
+    def run():
+        for moves in legal:
+            moves_to_indices(moves)
+    return run, sum(len(moves) for moves in legal)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite and check it against a baseline.
+
+Usage:
+    python -m benchmarks.run                                   # everything
+    python -m benchmarks.run --filter micro --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.15
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+
+Exits with status 1 when any benchmark is slower than the baseline by more
+than the threshold. Only compare results from the same machine and thread
+count; both are recorded in the JSON output.
+"""
+
+import argparse
+import os
+import sys
+
+# CPU only, so results do not depend on what accelerator happens to be present
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import torch
+
+from benchmarks import harness
+from benchmarks import micro, macro, startup  # noqa: F401  (registers the benchmarks)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Robo-Knights benchmark suite")
+    parser.add_argument("--filter", nargs="*", default=None,
+                        help="Run only these groups (micro, macro, startup) or benchmark names")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="torch intra-op threads")
+    parser.add_argument("--quick", action="store_true",
+                        help="Smaller workloads and fewer repeats, for smoke runs")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Target seconds per timed repeat")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed repeats per benchmark")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Write the results as JSON")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Compare against a results file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown that counts as a regression")
+    parser.add_argument("--save-baseline", type=str, default=None,
+                        help="Write the results as the new baseline")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        for name, (group, unit, _) in harness.BENCHMARKS.items():
+            print(f"{group:6s} {name:32s} {unit}")
+        return 0
+
+    torch.set_num_threads(args.threads)
+    names = [name for name, (group, _, _) in harness.BENCHMARKS.items()
+             if not args.filter or name in args.filter or group in args.filter]
+    unknown = set(args.filter or ()) - set(harness.BENCHMARKS) - {"micro", "macro", "startup"}
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        return 2
+
+    info = harness.machine_info()
+    print(f"{info['platform']}, {info['cpu_count']} CPUs, torch {info['torch']} "
+          f"with {info['torch_threads']} threads")
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    min_time = min(args.min_time, 0.05) if args.quick else args.min_time
+    results = harness.run(names, args.quick, min_time, repeat)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            harness.save(path, results, args.quick)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        baseline = harness.load(args.baseline)
+        if baseline.get("machine", {}).get("torch_threads") != info["torch_threads"]:
+            print("Warning: the baseline was measured with a different thread count")
+        if baseline.get("quick", False) != args.quick:
+            print("Warning: comparing quick and full workloads")
+        rows = harness.compare(results, baseline["results"], args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\n{'benchmark':32s} {'baseline':>14s} {'current':>14s} {'change':>8s}")
+        for name, before, after, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:32s} {before:14.1f} {after:14.1f} {change:+8.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Startup benchmarks and import checks.
+
+Each entry point is imported in a fresh interpreter. The suite times that as
+starts/s; run as a script, this module instead profiles the imports with
+``python -X importtime`` and exits with status 1 when an entry point imports
+a module it must not (torch or pygame for the CLI, the training stack for
+inference-only play):
+
+    python -m benchmarks.startup --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (statement, modules it must not import)
+ENTRY_POINTS = {
+    "startup_package": ("import robo_knights", ("torch", "pygame")),
+    "startup_cli": ("import main", ("torch", "pygame")),
+    "startup_play": ("from robo_knights.agents.inference_agent import InferenceAgent",
+                     ("pygame", "robo_knights.agents.chess_agent", "robo_knights.training")),
+}
+
+
+def _python(*args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(ROOT, "src"),
+                                                      env.get("PYTHONPATH")]))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True,
+                          text=True, check=True)
+
+
+def import_times(statement):
+    """
+    Profile the imports of a statement in a fresh interpreter.
+
+    Args:
+        statement (str): Python code to run, e.g. ``"import main"``
+
+    Returns:
+        dict: Module name -> (self microseconds, cumulative microseconds,
+            nesting depth); depth 1 is imported by the statement itself
+    """
+    times = {}
+    for line in _python("-X", "importtime", "-c", statement).stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return times
+
+
+def forbidden_imports(modules, forbidden):
+    """The imported ``modules`` that are in ``forbidden`` or below one of them."""
+    return sorted(m for m in modules if any(m == f or m.startswith(f + ".") for f in forbidden))
+
+
+def _startup(statement):
+    def run():
+        _python("-c", statement)
+    return run
+
+
+def _register(name, statement):
+    @benchmark(name, "startup", "starts/s")
+    def setup(quick):
+        return _startup(statement), 1
+    return setup
+
+
+for _name, (_statement, _) in ENTRY_POINTS.items():
+    _register(_name, _statement)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile and check the imports of each entry point")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Show the modules with the largest cumulative import time")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, (statement, forbidden) in ENTRY_POINTS.items():
+        times = import_times(statement)
+        total = sum(cumulative for _, cumulative, depth in times.values() if depth == 1)
+        print(f"{name}: {total / 1e3:.1f} ms of imports for {statement!r}")
+        for module, (_, cumulative, _) in sorted(times.items(), key=lambda item: -item[1][1])[:args.top]:
+            print(f"    {cumulative / 1e3:9.1f} ms  {module}")
+        imported = forbidden_imports(times, forbidden)
+        if imported:
+            failures += 1
+            print(f"    FAIL: imports {', '.join(imported)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
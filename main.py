@@ -6,21 +6,21 @@ Main entry point for the application.
 
 import argparse
 import os
-import sys
-import time
 import random
-import torch
-import chess
-import pygame
 
+# torch and pygame are imported by the modes that need them, so that starting
+# a short play or evaluation job does not pay for the training stack
 from robo_knights.environment import ChessEnv
-from robo_knights.utils import ChessVisualizer, MetricsTracker
-from robo_knights.agents.chess_agent import ChessAgent
+from robo_knights.environment.game_runner import PACING, GameRunner, build_pacing
+from robo_knights.utils import instrumentation
+from robo_knights.utils.metrics import MetricsTracker
+from robo_knights.utils.observers import (ConsoleObserver, MetricsObserver, PGNObserver,
+                                          PygameObserver, RewardObserver)
 
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Robo-Knights Chess AI")
-    parser.add_argument("--mode", choices=["train", "play", "visualize"], 
+    parser.add_argument("--mode", choices=["train", "play", "visualize", "export", "tournament"], 
                         default="play", help="Operation mode")
     parser.add_argument("--model1", type=str, default="models/agent1.pth",
                         help="Path to first agent model")
@@ -28,209 +28,374 @@ def parse_args():
                         help="Path to second agent model")
     parser.add_argument("--episodes", type=int, default=100,
                         help="Number of episodes for training")
+    parser.add_argument("--learner", choices=["reinforce", "ppo"], default="reinforce",
+                        help="Update rule for training: one REINFORCE step per game, "
+                             "or PPO epochs over a batch of games")
+    parser.add_argument("--games-per-update", type=int, default=8,
+                        help="Games collected per PPO update")
+    parser.add_argument("--ppo-epochs", type=int, default=4,
+                        help="PPO epochs per update")
+    parser.add_argument("--gae-lambda", type=float, default=None,
+                        help="Use GAE(lambda) advantages instead of normalized returns "
+                             "(PPO defaults to 0.95)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for self-play training or tournaments "
+                             "(0 = single process; default 0 for training, one per CPU for tournaments)")
+    parser.add_argument("--envs-per-worker", type=int, default=1,
+                        help="Self-play games each --workers process plays in lockstep, "
+                             "with one forward pass per ply across them")
+    parser.add_argument("--max-staleness", type=int, default=1,
+                        help="Drop self-play games generated with weights older than this many updates")
+    parser.add_argument("--policy-head", choices=["dense", "bilinear", "compact"], default="dense",
+                        help="Policy head of newly trained networks")
+    parser.add_argument("--trunk", choices=["mlp", "resnet"], default="mlp",
+                        help="Trunk of newly trained networks")
+    parser.add_argument("--channels", type=int, default=64,
+                        help="Width of the residual trunk")
+    parser.add_argument("--blocks", type=int, default=4,
+                        help="Residual blocks in the residual trunk")
+    parser.add_argument("--export-path", type=str, default=None,
+                        help="Output of --mode export: .pt (TorchScript), .onnx or .rkw "
+                             "(memory-mapped weights) (default: model1 with a .pt extension)")
+    parser.add_argument("--agent", choices=["policy", "mcts"], default="policy",
+                        help="Play by sampling the policy or by PUCT tree search")
+    parser.add_argument("--simulations", type=int, default=200,
+                        help="Tree search simulations per move (--agent mcts)")
+    parser.add_argument("--players", nargs="+", default=None,
+                        help="Tournament players: model paths or 'random' "
+                             "(default: model1, model2 and random)")
+    parser.add_argument("--games-per-pair", type=int, default=20,
+                        help="Tournament games per pairing, colours alternating")
+    parser.add_argument("--schedule", choices=["round-robin", "gauntlet"], default="round-robin",
+                        help="Tournament schedule (gauntlet: first player against the rest)")
+    parser.add_argument("--serve", type=int, default=None, metavar="GAMES",
+                        help="Tournament workers play this many games at once, batching each "
+                             "network player's moves through an inference server")
+    parser.add_argument("--max-plies", type=int, default=400,
+                        help="Tournament games are drawn after this many plies")
+    parser.add_argument("--pace", choices=sorted(PACING), default="fixed",
+                        help="Pacing of play and visualize: a fixed delay after each move, "
+                             "one move per --delay seconds of wall time, or as fast as possible")
+    parser.add_argument("--delay", type=float, default=0.5,
+                        help="Seconds per move for --pace fixed and realtime")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Print only the moves instead of the board after each move")
+    parser.add_argument("--pgn", type=str, default=None,
+                        help="Append the games played to this PGN file")
+    parser.add_argument("--game-store", type=str, default=None,
+                        help="Append the self-play games of --workers training to this "
+                             "binary game store")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time the phases of single-process training; per-episode records go "
+                             "to logs/instrumentation.jsonl and totals to logs/robo_knights.prom")
+    parser.add_argument("--profile", choices=["torch", "cprofile"], default=None,
+                        help="Capture a torch.profiler trace or a cProfile dump of some training episodes")
+    parser.add_argument("--profile-start", type=int, default=1,
+                        help="First profiled episode (0-based; episode 0 includes warm-up)")
+    parser.add_argument("--profile-episodes", type=int, default=3,
+                        help="Number of profiled episodes")
+    parser.add_argument("--profile-output", type=str, default=None,
+                        help="Profile output (default: logs/profile.json or logs/profile.prof)")
+    parser.add_argument("--checkpoint-dir", type=str, default="checkpoints",
+                        help="Directory with one subdirectory of resumable checkpoints per training run")
+    parser.add_argument("--checkpoint-every", type=int, default=50,
+                        help="Checkpoint training every this many episodes, or self-play games "
+                             "with --workers (0 to disable)")
+    parser.add_argument("--checkpoint-minutes", type=float, default=None,
+                        help="Also checkpoint when this many minutes have passed since the last one")
+    parser.add_argument("--keep-checkpoints", type=int, default=3,
+                        help="Number of checkpoints to retain (0 keeps all)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the most recently started run in --checkpoint-dir")
+    parser.add_argument("--quantize", action="store_true",
+                        help="Store the policy head rows as int8 for export and play")
+    parser.add_argument("--quantize-trunk", action="store_true",
+                        help="Also quantize the trunk and value head to int8 when exporting "
+                             "TorchScript (.pt); implies --quantize")
     return parser.parse_args()
 
 def create_random_agent():
     class RandomAgent:
-        def select_action(self, state, legal_moves):
+        def select_action(self, state, legal_moves, board=None):
             return random.choice(list(legal_moves))
     return RandomAgent()
 
-def train_agents(env, episodes=100):
-    """Train chess agents."""
+def load_play_agent(path, quantize=False, agent="policy", simulations=200):
+    """Load an inference-only agent from a checkpoint or exported model."""
+    from robo_knights.agents.eval_cache import EvaluationCache
+    from robo_knights.agents.inference_agent import InferenceAgent
+    from robo_knights.agents.mcts import MCTSAgent
+    
+    if not os.path.exists(path):
+        print(f"No model found at {path}, using random agent")
+        return create_random_agent()
+    if agent == "mcts":
+        return MCTSAgent.load(path, quantize=quantize, cache=EvaluationCache(),
+                              simulations=simulations)
+    return InferenceAgent.load(path, quantize=quantize)
+
+def train_agents(env, episodes=100, gae_lambda=None, learner="reinforce",
+                 games_per_update=8, ppo_epochs=4, model_kwargs=None, pgn=None, profiler=None,
+                 checkpoints=None, resume=False):
+    """Train chess agents, optionally checkpointing to and resuming from a CheckpointManager."""
+    from robo_knights.agents.chess_agent import ChessAgent
+    from robo_knights.agents.eval_cache import EvaluationCache
+    from robo_knights.training.buffer import TrajectoryBuffer
+    from robo_knights.training.checkpoint import capture_rng_state, restore_rng_state
+    from robo_knights.training.ppo import PPOLearner
+    
     print(f"Training agents for {episodes} episodes...")
+    model_kwargs = model_kwargs or {}
+    
+    if learner == "ppo":
+        capacity = max(games_per_update * 1024, 4096)
+        lam = gae_lambda if gae_lambda is not None else 0.95
+        # Rollouts keep no graph, so repeated positions can reuse evaluations
+        agent1 = ChessAgent(gae_lambda=lam, buffer=TrajectoryBuffer(capacity),
+                            cache=EvaluationCache(), **model_kwargs)
+        agent2 = ChessAgent(gae_lambda=lam, buffer=TrajectoryBuffer(capacity),
+                            cache=EvaluationCache(), **model_kwargs)
+        learners = [PPOLearner(agent1, epochs=ppo_epochs), PPOLearner(agent2, epochs=ppo_epochs)]
+    else:
+        agent1 = ChessAgent(gae_lambda=gae_lambda, **model_kwargs)
+        agent2 = ChessAgent(gae_lambda=gae_lambda, **model_kwargs)
+        learners = []
+    tracker = MetricsTracker()
     
-    agent1 = ChessAgent()
-    agent2 = ChessAgent()
-    metrics = MetricsTracker()
+    def training_state(episode):
+        return {
+            "episode": episode,
+            "agents": [agent1.training_state(), agent2.training_state()],
+            "learner_rngs": [ppo.rng.bit_generator.state for ppo in learners],
+            "rng": capture_rng_state(),
+            "metrics_games": tracker.games,
+        }
     
-    for episode in range(episodes):
-        state = env.reset()
-        metrics.start_game()
-        done = False
-        
-        while not done:
-            current_agent = agent1 if env.board.turn else agent2
-            legal_moves = list(env.board.legal_moves)
-            
-            if legal_moves:
-                move = current_agent.select_action(state, legal_moves)
-                if move in legal_moves:
-                    metrics.log_move(move, env.board)
-                    state, reward, done, info = env.step(move)
-                    current_agent.rewards.append(reward)
-            else:
-                done = True
-        
-        # End episode
-        if env.board.is_checkmate():
-            winner = "white" if not env.board.turn else "black"
+    start = 0
+    state = checkpoints.load_latest() if checkpoints is not None and resume else None
+    if state is not None:
+        for agent, agent_state in zip((agent1, agent2), state["agents"]):
+            agent.load_training_state(agent_state)
+        for ppo, rng_state in zip(learners, state["learner_rngs"]):
+            ppo.rng.bit_generator.state = rng_state
+        restore_rng_state(state["rng"])
+        tracker.games = state["metrics_games"]
+        start = state["episode"]
+        print(f"Resuming from {checkpoints.latest()} after episode {start}")
+    elif resume:
+        print("No checkpoint found, starting from scratch")
+    
+    observers = [RewardObserver(), MetricsObserver(tracker)]
+    if pgn:
+        observers.append(PGNObserver(pgn, "agent1", "agent2", event="Training"))
+    runner = GameRunner(env, agent1, agent2, observers)
+    recorder = instrumentation.get_recorder()
+    
+    checkpoint_due = False
+    for episode in range(start, episodes):
+        if profiler is not None:
+            profiler.step(episode)
+        result = runner.play()
+        if checkpoints is not None:
+            checkpoint_due = checkpoint_due or checkpoints.due(episode + 1) or episode + 1 == episodes
+        # PPO buffers are not checkpointed, so a due checkpoint waits for the next update
+        updated = True
+        if learner == "ppo":
+            agent1.store_episode()
+            agent2.store_episode()
+            updated = (episode + 1) % games_per_update == 0 or episode + 1 == episodes
+            if updated:
+                for ppo in learners:
+                    ppo.update(ppo.agent.buffer)
+                    ppo.agent.buffer.clear()
         else:
-            winner = None
+            agent1.finish_episode()
+            agent2.finish_episode()
         
-        metrics.end_game(winner)
-        agent1.finish_episode()
-        agent2.finish_episode()
+        if checkpoint_due and updated:
+            checkpoints.save(episode + 1, training_state(episode + 1))
+            checkpoint_due = False
+        
+        if recorder is not None:
+            recorder.end_episode(plies=result["plies"], winner=result["winner"])
         
         if (episode + 1) % 10 == 0:
             print(f"Episode {episode + 1}/{episodes} complete")
+    runner.close()
+    if profiler is not None:
+        profiler.close()
+    if recorder is not None:
+        print(recorder.summary())
     
     # Save trained models
     agent1.save_model("models/agent1.pth")
     agent2.save_model("models/agent2.pth")
     print("Training complete!")
 
-def play_game(env, model1_path, model2_path):
-    """Play a game between two agents."""
-    print(f"Playing game with models: {model1_path} and {model2_path}")
+def train_agents_parallel(episodes=100, workers=2, max_staleness=1, gae_lambda=None,
+                          model_kwargs=None, game_store=None, envs_per_worker=1,
+                          checkpoints=None, resume=False):
+    """Train one agent by self-play with a pool of worker processes."""
+    from robo_knights.agents.chess_agent import ChessAgent
+    from robo_knights.training.checkpoint import capture_rng_state, restore_rng_state
+    from robo_knights.training.self_play import SelfPlayPool
     
-    # Create agents
-    try:
-        agent1 = ChessAgent()
-        agent2 = ChessAgent()
-        
-        if os.path.exists(model1_path):
-            agent1.load_model(model1_path)
-        else:
-            print(f"No model found at {model1_path}, using random agent")
-            agent1 = create_random_agent()
-        
-        if os.path.exists(model2_path):
-            agent2.load_model(model2_path)
-        else:
-            print(f"No model found at {model2_path}, using random agent")
-            agent2 = create_random_agent()
-    except Exception as e:
-        print(f"Error loading models: {e}")
-        print("Using random agents")
-        agent1 = create_random_agent()
-        agent2 = create_random_agent()
-    
-    # Play game
-    state = env.reset()
-    metrics = MetricsTracker()
-    metrics.start_game()
-    done = False
-    
-    while not done:
-        current_agent = agent1 if env.board.turn else agent2
-        legal_moves = list(env.board.legal_moves)
-        
-        if legal_moves:
-            move = current_agent.select_action(state, legal_moves)
-            if move in legal_moves:
-                metrics.log_move(move, env.board)
-                state, _, done, _ = env.step(move)
-                print(env.board)
-                time.sleep(0.5)
-        else:
-            done = True
+    print(f"Training agent for {episodes} self-play games on {workers} workers...")
     
-    # End game
-    if env.board.is_checkmate():
-        winner = "white" if not env.board.turn else "black"
-    else:
-        winner = None
+    agent = ChessAgent(gae_lambda=gae_lambda, **(model_kwargs or {}))
     
-    metrics.end_game(winner)
-    print(f"Game complete! Winner: {winner if winner else 'Draw'}")
-    print(f"Total moves: {metrics.get_current_metrics()['total_moves']}")
-
-def visualize_game(env, model1_path, model2_path):
-    """Visualize a game between two agents."""
-    print(f"Visualizing game with models: {model1_path} and {model2_path}")
+    def training_state(games):
+        return {"episode": games, "agents": [agent.training_state()], "rng": capture_rng_state()}
+    
+    start = 0
+    state = checkpoints.load_latest() if checkpoints is not None and resume else None
+    if state is not None:
+        # Loaded before the pool starts, so the workers begin from the resumed weights
+        agent.load_training_state(state["agents"][0])
+        restore_rng_state(state["rng"])
+        start = state["episode"]
+        print(f"Resuming from {checkpoints.latest()} after game {start}")
+    elif resume:
+        print("No checkpoint found, starting from scratch")
     
-    # Create visualizer
-    visualizer = ChessVisualizer(window_size=800)
+    with SelfPlayPool(agent, num_workers=workers, max_staleness=max_staleness,
+                      game_store=game_store, envs_per_worker=envs_per_worker) as pool:
+        stats = pool.train(episodes, checkpoints=checkpoints, start_game=start,
+                           state_fn=training_state)
     
-    # Create agents
+    print(f"Throughput: {stats['games_per_sec']:.2f} games/s, "
+          f"{stats['plies_per_sec']:.1f} plies/s "
+          f"({stats['dropped_games']} stale games dropped)")
+    lookups = stats["cache_hits"] + stats["cache_misses"]
+    if lookups:
+        print(f"Evaluation cache hit rate: {stats['cache_hits'] / lookups:.1%}")
+    
+    # Both sides were played by the same network
+    agent.save_model("models/agent1.pth")
+    agent.save_model("models/agent2.pth")
+    print("Training complete!")
+
+def export_agent(model_path, export_path=None, quantize=False, quantize_trunk=False):
+    """Export a trained agent for inference-only play."""
+    from robo_knights.agents.chess_agent import ChessAgent
+    
+    export_path = export_path or os.path.splitext(model_path)[0] + ".pt"
+    agent = ChessAgent.load(model_path, training=False)
+    agent.export(export_path, quantize, quantize_trunk)
+    print(f"Exported {model_path} to {export_path}")
+
+def load_play_agents(model1_path, model2_path, quantize=False, agent="policy", simulations=200):
+    """Load both players, falling back to random agents."""
     try:
-        agent1 = ChessAgent()
-        agent2 = ChessAgent()
-        
-        if os.path.exists(model1_path):
-            agent1.load_model(model1_path)
-        else:
-            print(f"No model found at {model1_path}, using random agent")
-            agent1 = create_random_agent()
-        
-        if os.path.exists(model2_path):
-            agent2.load_model(model2_path)
-        else:
-            print(f"No model found at {model2_path}, using random agent")
-            agent2 = create_random_agent()
+        return (load_play_agent(model1_path, quantize, agent, simulations),
+                load_play_agent(model2_path, quantize, agent, simulations))
     except Exception as e:
         print(f"Error loading models: {e}")
         print("Using random agents")
-        agent1 = create_random_agent()
-        agent2 = create_random_agent()
-    
-    # Play game
-    state = env.reset()
-    metrics = MetricsTracker()
-    metrics.start_game()
-    done = False
-    selected_square = None
-    running = True
-    
-    while running and not done:
-        # Draw board
-        visualizer.draw_board(env.board, selected_square)
-        
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-        
-        # Make move
-        current_agent = agent1 if env.board.turn else agent2
-        legal_moves = list(env.board.legal_moves)
-        
-        if legal_moves:
-            move = current_agent.select_action(state, legal_moves)
-            if move in legal_moves:
-                metrics.log_move(move, env.board)
-                state, _, done, _ = env.step(move)
-                time.sleep(0.5)
-        else:
-            done = True
-    
-    # End game
-    if env.board.is_checkmate():
-        winner = "white" if not env.board.turn else "black"
-    else:
-        winner = None
+        return create_random_agent(), create_random_agent()
+
+def run_game(env, agent1, agent2, observers, pacing=None, pgn=None, names=("agent1", "agent2")):
+    """Play one game between two agents and report the result."""
+    observers = [*observers, MetricsObserver(MetricsTracker())]
+    if pgn:
+        observers.append(PGNObserver(pgn, *names))
+    with GameRunner(env, agent1, agent2, observers, pacing) as runner:
+        result = runner.play()
     
-    metrics.end_game(winner)
+    winner = result["winner"]
+    print(f"Game complete! Winner: {winner if winner else 'Draw'}")
+    print(f"Total moves: {result['plies']}")
+    return result
+
+def play_game(env, model1_path, model2_path, quantize=False, agent="policy", simulations=200,
+              pacing=None, quiet=False, pgn=None):
+    """Play a game between two agents."""
+    from robo_knights.evaluation.tournament import player_name
     
-    # Show final position
-    visualizer.draw_board(env.board)
-    time.sleep(2)
-    visualizer.close()
+    print(f"Playing game with models: {model1_path} and {model2_path}")
+    agent1, agent2 = load_play_agents(model1_path, model2_path, quantize, agent, simulations)
+    return run_game(env, agent1, agent2, [ConsoleObserver(show_board=not quiet)], pacing, pgn,
+                    (player_name(model1_path), player_name(model2_path)))
+
+def visualize_game(env, model1_path, model2_path, quantize=False, agent="policy", simulations=200,
+                   pacing=None, pgn=None):
+    """Visualize a game between two agents."""
+    from robo_knights.evaluation.tournament import player_name
     
-    print(f"Game complete! Winner: {winner if winner else 'Draw'}")
-    print(f"Total moves: {metrics.get_current_metrics()['total_moves']}")
+    print(f"Visualizing game with models: {model1_path} and {model2_path}")
+    agent1, agent2 = load_play_agents(model1_path, model2_path, quantize, agent, simulations)
+    return run_game(env, agent1, agent2, [PygameObserver(window_size=800)], pacing, pgn,
+                    (player_name(model1_path), player_name(model2_path)))
 
 def main():
     """Main entry point."""
     args = parse_args()
     
-    # Create environment
-    env = ChessEnv()
+    # Create environment; training never reads the step info, so skip it entirely
+    env = ChessEnv(info_level="none" if args.mode == "train" else "lazy")
     
     # Create models directory if it doesn't exist
     os.makedirs("models", exist_ok=True)
     
+    # Architecture of newly trained networks; loaded models carry their own
+    model_kwargs = {"policy_head": args.policy_head, "trunk": args.trunk,
+                    "channels": args.channels, "blocks": args.blocks}
+    
     # Run the selected mode
     if args.mode == "train":
-        train_agents(env, args.episodes)
+        # Instrumentation and profiling cover the single-process training loop
+        if args.instrument and not args.workers:
+            instrumentation.enable(instrumentation.Recorder([
+                instrumentation.JsonlSink("logs/instrumentation.jsonl"),
+                instrumentation.PrometheusSink("logs/robo_knights.prom"),
+            ]))
+        profiler = None
+        if args.profile and not args.workers:
+            profiler = instrumentation.ProfileWindow(args.profile, args.profile_start,
+                                                     args.profile_episodes, args.profile_output)
+        from robo_knights.training.checkpoint import (CheckpointManager, latest_run_directory,
+                                                      new_run_directory)
+        
+        checkpoints = None
+        if args.checkpoint_every or args.checkpoint_minutes or args.resume:
+            # Every run gets its own directory, so runs never prune or resume each other
+            run_dir = latest_run_directory(args.checkpoint_dir) if args.resume else None
+            checkpoints = CheckpointManager(run_dir or new_run_directory(args.checkpoint_dir),
+                                            args.checkpoint_every, args.checkpoint_minutes,
+                                            args.keep_checkpoints, resume=run_dir is not None)
+        try:
+            if args.workers:
+                train_agents_parallel(args.episodes, args.workers, args.max_staleness,
+                                      args.gae_lambda, model_kwargs, args.game_store,
+                                      args.envs_per_worker, checkpoints, args.resume)
+            else:
+                train_agents(env, args.episodes, args.gae_lambda, args.learner,
+                             args.games_per_update, args.ppo_epochs, model_kwargs, args.pgn,
+                             profiler, checkpoints, args.resume)
+        finally:
+            # Flushes the last queued checkpoint and the metric sinks, also when training crashed
+            if checkpoints is not None:
+                checkpoints.close()
+            instrumentation.disable()
     elif args.mode == "play":
-        play_game(env, args.model1, args.model2)
+        play_game(env, args.model1, args.model2, args.quantize, args.agent, args.simulations,
+                  build_pacing(args.pace, args.delay), args.quiet, args.pgn)
     elif args.mode == "visualize":
-        visualize_game(env, args.model1, args.model2)
+        visualize_game(env, args.model1, args.model2, args.quantize, args.agent, args.simulations,
+                       build_pacing(args.pace, args.delay), args.pgn)
+    elif args.mode == "tournament":
+        from robo_knights.evaluation.tournament import RANDOM_PLAYER, run_tournament
+        
+        players = args.players or [args.model1, args.model2, RANDOM_PLAYER]
+        missing = [p for p in players if p != RANDOM_PLAYER and not os.path.exists(p)]
+        for path in missing:
+            print(f"No model found at {path}, leaving it out of the tournament")
+        players = [p for p in players if p not in missing]
+        run_tournament(players, args.games_per_pair, args.schedule, args.workers, args.max_plies,
+                       args.agent, args.simulations, args.quantize,
+                       chunk_size=args.serve or 4, serve=bool(args.serve))
+    elif args.mode == "export":
+        export_agent(args.model1, args.export_path, args.quantize, args.quantize_trunk)
     
     print("Done!")
 
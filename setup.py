@@ -11,6 +11,10 @@ setup(
         "numpy>=1.26.0",
         "torch>=2.1.0",
     ],
+    extras_require={
+        "onnx": ["onnx", "onnxruntime"],
+        "parquet": ["pyarrow"],
+    },
     author="Robo-Knights Team",
     description="A chess reinforcement learning project with actor-critic neural networks",
     python_requires=">=3.8",
@@ -1,5 +1,11 @@
-from .environment import ChessEnv
-from .utils import ChessVisualizer, MetricsTracker
+from ._lazy import lazy_exports
 
 __version__ = "0.1.0"
-__all__ = ["ChessEnv", "ChessVisualizer", "MetricsTracker"] 
\ No newline at end of file
+__all__ = ["ChessEnv", "ChessVisualizer", "MetricsTracker"]
+
+# ChessVisualizer needs pygame, so nothing is imported until it is asked for
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ChessEnv": ".environment",
+    "ChessVisualizer": ".utils.visualization",
+    "MetricsTracker": ".utils.metrics",
+})
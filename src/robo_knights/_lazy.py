@@ -0,0 +1,38 @@
+"""
+Lazy package exports.
+
+A package ``__init__`` lists its public names with the submodule that
+defines each one, and the submodule is imported on first access of one of
+its names (PEP 562). Importing a package therefore does not pull in torch or
+pygame until something that needs them is used.
+"""
+
+import importlib
+import sys
+
+
+def lazy_exports(package, exports):
+    """
+    Build the module-level ``__getattr__`` and ``__dir__`` of a package.
+
+    Args:
+        package (str): ``__name__`` of the package
+        exports (dict): Public name -> submodule defining it, relative to the
+            package (e.g. ``".chess_agent"``)
+
+    Returns:
+        tuple: (__getattr__, __dir__)
+    """
+    def __getattr__(name):
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(submodule, package), name)
+        # Cached on the package, so later lookups never come back here
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,3 +1,22 @@
-from .chess_agent import ChessAgent
+from robo_knights._lazy import lazy_exports
 
-__all__ = ["ChessAgent"] 
\ No newline at end of file
+__all__ = [
+    "ChessAgent",
+    "EvaluationCache",
+    "InferenceAgent",
+    "MCTS",
+    "MCTSAgent",
+    "InferenceServer",
+    "ServedAgent",
+]
+
+# Imported on first use, so play never loads the training agent and its optimizer
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ChessAgent": ".chess_agent",
+    "EvaluationCache": ".eval_cache",
+    "InferenceAgent": ".inference_agent",
+    "MCTS": ".mcts",
+    "MCTSAgent": ".mcts",
+    "InferenceServer": ".inference_server",
+    "ServedAgent": ".inference_server",
+})
@@ -3,123 +3,440 @@
 Chess agent implementation.
 """
 
+import numpy as np
 import torch
 import torch.nn.functional as F
 import torch.optim as optim
 import random
 
+from robo_knights.environment.encoding import bitboards_to_planes, planes_to_bitboards
 from robo_knights.models.actor_critic import ActorCriticNetwork
-from robo_knights.utils.move_utils import move_to_index, index_to_move
+from robo_knights.models.export import export_model, load_network, save_atomic
+from robo_knights.utils.move_encoding import (
+    moves_to_indices, index_to_move, pad_legal_indices
+)
+from robo_knights.utils.instrumentation import count, section
+from robo_knights.utils.returns import compute_returns, compute_gae, normalize
 
 class ChessAgent:
     """
     Chess agent that uses an actor-critic network to play chess.
     """
-    def __init__(self, lr=1e-3, gamma=0.99):
+    def __init__(self, lr=1e-3, gamma=0.99, gae_lambda=None, buffer=None, policy_head="dense",
+                 trunk="mlp", channels=64, blocks=4, cache=None, model=None, training=True):
         """
         Initialize the chess agent.
         
         Args:
             lr (float): Learning rate for the optimizer
             gamma (float): Discount factor for future rewards
+            gae_lambda (float, optional): If set, advantages are computed with
+                GAE(lambda) instead of normalized returns minus the baseline
+            buffer (TrajectoryBuffer, optional): If given, transitions are recorded
+                into it without autograd graphs and ``finish_episode`` recomputes
+                log-probabilities in batched forward passes
+            policy_head (str): Policy head of the network: "dense", "bilinear"
+                or "compact" (see robo_knights.models.policy_heads)
+            trunk (str): Network trunk: "mlp" or "resnet"
+            channels (int): Width of the residual trunk
+            blocks (int): Number of residual blocks
+            cache (EvaluationCache, optional): Reuse evaluations of repeated
+                positions when ``select_action`` is given the board and no
+                autograd graph is needed
+            model (ActorCriticNetwork, optional): Use this network instead of
+                building one from policy_head, trunk, channels and blocks
+            training (bool): Create the optimizer; without it the agent can
+                only select moves
         """
+        self.lr = lr
         self.gamma = gamma
-        # Output size now 64*64*5 = 20480 (same indexing approach as before).
-        self.model = ActorCriticNetwork(output_size=64*64*5)
+        self.gae_lambda = gae_lambda
+        if model is None:
+            # Output size now 64*64*5 = 20480 (same indexing approach as before).
+            model = ActorCriticNetwork(output_size=64*64*5, policy_head=policy_head,
+                                       trunk=trunk, channels=channels, blocks=blocks)
+        self.model = model
         
-        self.optimizer = optim.Adam(self.model.parameters(), lr=lr)
+        self.optimizer = None
+        if training:
+            self._create_optimizer()
+        
+        # Bumped on every weight change, so cached evaluations go stale
+        self.weights_version = 0
+        self.cache = cache
         
         # For storing transitions
         self.saved_log_probs = []
         self.saved_values = []
         self.rewards = []
+        self.buffer = buffer
+    
+    @classmethod
+    def load(cls, path, training=True, **kwargs):
+        """
+        Create an agent around the network of a ``save_model`` checkpoint.
+        
+        The network is built directly around the loaded weights, skipping the
+        random initialization of a network that ``load_model`` would
+        overwrite. Without training they stay memory-mapped from the file;
+        an agent that trains gets its own copy, so that neither the optimizer
+        nor a later ``save_model`` to the same path touches the mapping.
+        
+        Args:
+            path (str): Checkpoint path
+            training (bool): Create the optimizer (not needed to play or export)
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            ChessAgent: The agent
+        """
+        return cls(model=load_network(path, copy=training), training=training, **kwargs)
+    
+    def _create_optimizer(self):
+        self.optimizer = optim.Adam(self.model.parameters(), lr=self.lr)
+        self.optimizer.register_step_post_hook(self._on_weights_changed)
+    
+    def _on_weights_changed(self, *args):
+        self.weights_version += 1
     
-    def select_action(self, state, legal_moves):
+    def select_action(self, state, legal_moves, board=None):
         """
         Select an action based on the current state and legal moves.
         
         Args:
             state (numpy.ndarray): Current state of the board
             legal_moves (list): List of legal chess.Move objects
+            board (chess.Board, optional): The position, used as the key of the
+                evaluation cache
             
         Returns:
             chess.Move: The selected move
         """
-        state_tensor = torch.FloatTensor(state.flatten()).unsqueeze(0)
-        policy_logits, value = self.model(state_tensor)
+        # With a buffer the graph is rebuilt at update time, so none is kept here
+        keep_graph = self.buffer is None and torch.is_grad_enabled()
+        with section("mask_building"):
+            legal_moves = [m for m in legal_moves if m is not None]
+            move_indices = moves_to_indices(legal_moves)
         
-        # Mask invalid moves
-        mask = torch.zeros(policy_logits.shape[1])
-        move_indices = [move_to_index(m) for m in legal_moves if m is not None]
-        for idx in move_indices:
-            if idx is not None and 0 <= idx < mask.numel():
-                mask[idx] = 1
+        # Cached evaluations carry no graph, so they only serve graph-free selection
+        use_cache = self.cache is not None and board is not None and not keep_graph
+        cached = None
+        if use_cache:
+            key = self.cache.key(board)
+            cached = self.cache.lookup(key, move_indices, self.weights_version)
         
-        masked_logits = policy_logits + torch.log(mask.unsqueeze(0) + 1e-10)
-        probs = F.softmax(masked_logits, dim=1)
+        with torch.set_grad_enabled(keep_graph):
+            if cached is not None:
+                legal_logits = torch.from_numpy(cached[0])
+                value = torch.tensor([[cached[1]]])
+            else:
+                state_tensor = torch.FloatTensor(state.flatten()).unsqueeze(0)
+                
+                # Only score legal moves instead of computing all 20480 logits
+                with section("inference"):
+                    legal_logits, value = self.model(state_tensor, torch.from_numpy(move_indices))
+                legal_logits = legal_logits[0]
+                if use_cache:
+                    self.cache.store(key, move_indices, legal_logits.numpy(), value.item(),
+                                     self.weights_version)
+            
+            dist = torch.distributions.Categorical(logits=legal_logits)
+            choice = dist.sample()
+            log_prob = dist.log_prob(choice)
         
-        dist = torch.distributions.Categorical(probs)
-        action_idx = dist.sample()
+        if self.buffer is not None:
+            self.buffer.add(planes_to_bitboards(state), move_indices, move_indices[choice.item()],
+                            log_prob=log_prob.item(), value=value.item())
+        else:
+            self.saved_log_probs.append(log_prob)
+            
+            # Save the value estimate at this time-step
+            self.saved_values.append(value.squeeze(0))
         
-        log_prob = dist.log_prob(action_idx)
-        self.saved_log_probs.append(log_prob)
+        chosen_move = legal_moves[choice.item()]
+        return chosen_move
+    
+    def select_actions(self, states, legal_indices):
+        """
+        Select one action per game for a batch of games with a single forward pass.
         
-        # Save the value estimate at this time-step
-        self.saved_values.append(value.squeeze(0))
+        Only the legal moves of each game are scored. Transitions are not
+        stored on the agent; the caller keeps the returned log-probabilities
+        and values for the games it is tracking (see
+        ``robo_knights.training.self_play.batched_self_play``).
         
-        chosen_move = index_to_move(action_idx.item())
-        return chosen_move
+        Args:
+            states (numpy.ndarray): Stacked board states of shape (N, 8, 8, 12)
+            legal_indices (list): One array of legal move indices per game, e.g.
+                ``BatchedChessEnv.get_legal_indices()``
+        
+        Returns:
+            tuple: (moves, log_probs, values) where moves is a list of N chess.Move
+                objects and log_probs and values are tensors of shape (N,)
+        """
+        padded, valid = pad_legal_indices(np.concatenate(legal_indices),
+                                          [len(indices) for indices in legal_indices])
+        padded = torch.from_numpy(padded)
+        state_tensor = torch.as_tensor(states, dtype=torch.float32).reshape(len(padded), -1)
+        with section("inference"):
+            legal_logits, value = self.model(state_tensor, padded)
+        
+        masked_logits = legal_logits.masked_fill(~torch.from_numpy(valid), float("-inf"))
+        dist = torch.distributions.Categorical(logits=masked_logits)
+        choice = dist.sample()
+        
+        action_idx = padded.gather(1, choice.unsqueeze(1)).squeeze(1)
+        moves = [index_to_move(idx) for idx in action_idx.tolist()]
+        return moves, dist.log_prob(choice), value.squeeze(1)
     
     def finish_episode(self):
         """
         Finish the current episode and update the model.
         """
-        # Compute returns
-        R = 0
-        returns = []
-        for r in reversed(self.rewards):
-            R = r + self.gamma * R
-            returns.insert(0, R)
-        returns = torch.tensor(returns)
-        
-        # Normalize returns
-        returns = (returns - returns.mean()) / (returns.std() + 1e-8)
-        
-        # Calculate losses
-        policy_loss = []
-        value_loss = []
-        for log_prob, value_est, ret in zip(self.saved_log_probs, self.saved_values, returns):
-            advantage = ret - value_est.item()
-            
-            # Policy loss = -log_prob * advantage
-            policy_loss.append(-log_prob * advantage)
+        if self.buffer is not None:
+            self._finish_buffered_episode()
+        elif self.saved_log_probs:
+            with section("loss"):
+                log_probs = torch.stack(self.saved_log_probs)
+                values = torch.cat(self.saved_values)
+                rewards = torch.tensor(self.rewards[:len(log_probs)], dtype=torch.float32)
+                
+                advantages, returns = self._compute_targets(rewards, values.detach())
+                
+                # Policy loss = -log_prob * advantage; value loss = smooth L1 to the returns
+                policy_loss = -(log_probs * advantages).sum()
+                value_loss = F.smooth_l1_loss(values, returns, reduction="sum")
             
-            # Value loss = MSE(advantage)
-            value_loss.append(F.smooth_l1_loss(value_est, torch.tensor([ret])))
-        
-        self.optimizer.zero_grad()
-        (torch.stack(policy_loss).sum() + torch.stack(value_loss).sum()).backward()
-        self.optimizer.step()
+            self._step(policy_loss + value_loss)
         
         # Clear buffers
         self.saved_log_probs = []
         self.saved_values = []
         self.rewards = []
     
+    def _step(self, loss):
+        """Backpropagate a loss and take one optimizer step."""
+        self.optimizer.zero_grad()
+        with section("backward"):
+            loss.backward()
+        with section("optimizer_step"):
+            self.optimizer.step()
+        count("updates")
+    
+    def _finish_buffered_episode(self):
+        """Close the episode in the buffer and update from everything it holds."""
+        self.store_episode()
+        self.update_from_buffer(self.buffer)
+        self.buffer.clear()
+    
+    def store_episode(self):
+        """
+        Close the current episode in the buffer without updating the model.
+        
+        Advantages and value targets are computed from the rewards collected in
+        ``self.rewards`` and the values recorded while acting. Used by learners
+        that update from several games at once (e.g. PPOLearner).
+        """
+        if self.buffer is None:
+            raise RuntimeError("store_episode requires the agent to have a buffer")
+        path = self.buffer.path_indices()
+        rewards = torch.tensor(self.rewards[:len(path)], dtype=torch.float32)
+        values = torch.from_numpy(self.buffer.values[path])
+        advantages, returns = self._compute_targets(rewards, values)
+        self.buffer.finish_path(advantages.numpy(), returns.numpy(), rewards=rewards.numpy())
+        self.rewards = []
+    
+    def update_from_buffer(self, buffer, batch_size=512):
+        """
+        Take one gradient step on every finished transition in a buffer.
+        
+        Log-probabilities are recomputed in batched forward passes of at most
+        ``batch_size`` positions; gradients are accumulated over the batches.
+        
+        Args:
+            buffer (TrajectoryBuffer): Buffer with finished paths
+            batch_size (int): Positions per forward pass
+        """
+        if len(buffer.finished_indices()) == 0:
+            return
+        self.optimizer.zero_grad()
+        for batch in buffer.minibatches(batch_size, shuffle=False):
+            with section("loss"):
+                states = batch["states"].reshape(len(batch["actions"]), -1)
+                legal_logits, values = self.model(states, batch["legal_indices"])
+                log_probs = self._legal_log_probs(legal_logits, batch["legal_valid"], batch["action_slots"])
+                policy_loss = -(log_probs * batch["advantages"]).sum()
+                value_loss = F.smooth_l1_loss(values.squeeze(1), batch["returns"], reduction="sum")
+            with section("backward"):
+                (policy_loss + value_loss).backward()
+        with section("optimizer_step"):
+            self.optimizer.step()
+        count("updates")
+    
+    @staticmethod
+    def _legal_log_probs(legal_logits, legal_valid, action_slots):
+        """
+        Log-probabilities of the taken actions under the policy restricted to legal moves.
+        
+        Args:
+            legal_logits (torch.Tensor): Logits of the padded legal moves, shape (B, K)
+            legal_valid (torch.Tensor): Boolean mask of the real (non-padding) entries, shape (B, K)
+            action_slots (torch.Tensor): Column of each taken action, shape (B,)
+            
+        Returns:
+            torch.Tensor: Log-probabilities of shape (B,)
+        """
+        log_probs = F.log_softmax(legal_logits.masked_fill(~legal_valid, float("-inf")), dim=1)
+        return log_probs.gather(1, action_slots.unsqueeze(1)).squeeze(1)
+    
+    def _compute_targets(self, rewards, values):
+        """
+        Compute advantages and value targets for one episode.
+        
+        Args:
+            rewards (torch.Tensor): Rewards of shape (T,)
+            values (torch.Tensor): Detached value estimates of shape (T,)
+            
+        Returns:
+            tuple: (advantages, returns), both of shape (T,)
+        """
+        if self.gae_lambda is None:
+            returns = normalize(compute_returns(rewards, self.gamma))
+            return returns - values, returns
+        advantages, returns = compute_gae(rewards, values, self.gamma, self.gae_lambda)
+        return normalize(advantages), returns
+    
+    def update_from_trajectories(self, trajectories):
+        """
+        Update the model from trajectories recorded elsewhere (e.g. by self-play workers).
+        
+        Log-probabilities and values are recomputed with one batched forward pass
+        that scores only the legal moves, then the same REINFORCE-with-baseline
+        loss as ``finish_episode`` is applied.
+        
+        Args:
+            trajectories (list): Trajectory objects from robo_knights.training.self_play
+        """
+        trajectories = [t for t in trajectories if len(t)]
+        if not trajectories:
+            return
+        
+        bitboards = np.concatenate([t.bitboards for t in trajectories])
+        actions = np.concatenate([t.actions for t in trajectories])
+        num_steps = len(actions)
+        
+        # Padded legal index rows rebuilt from the per-ply legal index lists
+        with section("mask_building"):
+            legal, valid = pad_legal_indices(
+                np.concatenate([t.legal_indices for t in trajectories]),
+                np.concatenate([np.diff(t.legal_offsets) for t in trajectories]))
+            # Padding repeats the first legal move, so take the first match
+            slots = (legal == actions[:, None]).argmax(axis=1)
+        
+        with section("encode_state"):
+            states = torch.from_numpy(bitboards_to_planes(bitboards)).reshape(num_steps, -1)
+        with section("loss"):
+            legal_logits, values = self.model(states, torch.from_numpy(legal))
+            values = values.squeeze(1)
+            
+            log_probs = self._legal_log_probs(legal_logits, torch.from_numpy(valid), torch.from_numpy(slots))
+            
+            advantages = []
+            returns = []
+            start = 0
+            for t in trajectories:
+                traj_values = values.detach()[start:start + len(t)]
+                traj_advantages, traj_returns = self._compute_targets(torch.from_numpy(t.rewards), traj_values)
+                advantages.append(traj_advantages)
+                returns.append(traj_returns)
+                start += len(t)
+            
+            policy_loss = -(log_probs * torch.cat(advantages)).sum()
+            value_loss = F.smooth_l1_loss(values, torch.cat(returns), reduction="sum")
+        
+        self._step(policy_loss + value_loss)
+    
+    def export(self, path, quantize=False, quantize_trunk=False):
+        """
+        Export the network for inference-only play with InferenceAgent.
+        
+        Args:
+            path (str): ``.onnx`` for ONNX, ``.rkw`` for memory-mapped weights,
+                ``.pt`` for TorchScript
+            quantize (bool): Store the policy head rows as int8
+            quantize_trunk (bool): Also quantize the trunk and value head
+                (``.pt`` and ``.onnx`` only, see ``export_model``)
+        """
+        export_model(self.model, path, quantize, quantize_trunk)
+    
     def save_model(self, path):
         """
         Save the model to a file.
         
+        The network's architecture config is stored next to its weights so
+        that ``load_model`` can rebuild the same network. The file is written
+        through a temporary file, so networks still mapped from ``path`` are
+        left intact.
+        
         Args:
             path (str): Path to save the model to
         """
-        torch.save(self.model.state_dict(), path)
+        save_atomic({"config": self.model.config, "state_dict": self.model.state_dict()}, path)
     
     def load_model(self, path):
         """
         Load the model from a file.
         
+        Checkpoints that carry an architecture config rebuild the network (and
+        optimizer) if it differs from the current one; plain state dicts from
+        older versions are loaded into the default dense network.
+        
         Args:
             path (str): Path to load the model from
         """
-        self.model.load_state_dict(torch.load(path, weights_only=True)) 
\ No newline at end of file
+        checkpoint = torch.load(path, mmap=True, weights_only=True)
+        if "state_dict" in checkpoint:
+            config, state_dict = checkpoint["config"], checkpoint["state_dict"]
+        else:
+            config, state_dict = None, checkpoint
+        
+        if config is not None and config != self.model.config:
+            # Copied out of the mapping: the file may be overwritten while training
+            state_dict = {key: value.clone() for key, value in state_dict.items()}
+            self.model = ActorCriticNetwork.from_state_dict(config, state_dict)
+            if self.optimizer is not None:
+                self._create_optimizer()
+        else:
+            self.model.load_state_dict(state_dict)
+        self._on_weights_changed()
+
+    def training_state(self):
+        """
+        Get everything needed to resume training this agent.
+
+        The tensors are references to the live ones; snapshot them (see
+        ``robo_knights.training.checkpoint``) before the next update.
+
+        Returns:
+            dict: config, state_dict, optimizer (Adam state) and weights_version
+        """
+        return {
+            "config": self.model.config,
+            "state_dict": self.model.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "weights_version": self.weights_version,
+        }
+
+    def load_training_state(self, state):
+        """
+        Restore the state returned by ``training_state``.
+
+        Args:
+            state (dict): Saved training state
+        """
+        if state["config"] != self.model.config:
+            self.model = ActorCriticNetwork.from_config(state["config"])
+            self._create_optimizer()
+        self.model.load_state_dict(state["state_dict"])
+        self.optimizer.load_state_dict(state["optimizer"])
+        self.weights_version = state["weights_version"]
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Transposition-keyed cache of network evaluations.
+
+Self-play and tournaments reach the same positions (openings above all) over
+and over. ``EvaluationCache`` remembers the legal-move logits and the value of
+each position, keyed by its Zobrist hash, so repeated positions skip the
+network. Entries are tagged with the weights version they were computed with
+and are dropped as soon as a newer version is stored.
+"""
+
+import threading
+from collections import OrderedDict
+
+import chess.polyglot
+import numpy as np
+
+
+class EvaluationCache:
+    """
+    Thread-safe LRU cache of (legal logits, value) per position.
+    """
+    def __init__(self, capacity=100000):
+        """
+        Initialize the cache.
+        
+        Args:
+            capacity (int): Maximum number of cached positions
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+    
+    @staticmethod
+    def key(board):
+        """
+        Cache key of a position.
+        
+        Args:
+            board (chess.Board): The position
+        
+        Returns:
+            int: Its Zobrist hash
+        """
+        return chess.polyglot.zobrist_hash(board)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @property
+    def hit_rate(self):
+        """float: Fraction of lookups answered from the cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+    
+    def clear(self):
+        """Drop every entry (the stats are kept)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def lookup(self, key, move_indices, version=0):
+        """
+        Get the cached evaluation of a position.
+        
+        Args:
+            key (int): Cache key of the position (see ``key``)
+            move_indices (numpy.ndarray): Legal move indices, in the order the
+                logits should be returned
+            version (int): Current weights version
+        
+        Returns:
+            tuple: (legal_logits, value) with one logit per entry of
+                ``move_indices``, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is not None:
+                sorted_indices, logits, value = entry
+                positions = np.searchsorted(sorted_indices, move_indices)
+                # Guard against hash collisions: the legal moves must match exactly
+                if (len(sorted_indices) == len(move_indices)
+                        and np.array_equal(sorted_indices[np.minimum(positions, len(sorted_indices) - 1)],
+                                           move_indices)):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return logits[positions], value
+            self.stats["misses"] += 1
+            return None
+    
+    def store(self, key, move_indices, legal_logits, value, version=0):
+        """
+        Cache the evaluation of a position.
+        
+        Storing with a newer version invalidates every older entry; results
+        computed with an older version than the cache's are ignored.
+        
+        Args:
+            key (int): Cache key of the position
+            move_indices (numpy.ndarray): Legal move indices
+            legal_logits (numpy.ndarray): One logit per entry of ``move_indices``
+            value (float): Value estimate of the position
+            version (int): Weights version the evaluation was computed with
+        """
+        move_indices = np.asarray(move_indices, dtype=np.int64)
+        order = np.argsort(move_indices)
+        entry = (move_indices[order], np.asarray(legal_logits, dtype=np.float32)[order], float(value))
+        with self._lock:
+            if version < self.version:
+                return
+            if version > self.version:
+                self._entries.clear()
+                self.version = version
+                self.stats["invalidations"] += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Inference-only chess agent.
+
+Loads an exported network (TorchScript ``.pt``, ONNX ``.onnx`` or
+memory-mapped weights ``.rkw``) or a training checkpoint (``.pth``) and
+selects moves without autograd, an optimizer or stored transitions, which
+keeps per-move latency and per-process memory low when many games are served.
+"""
+
+import numpy as np
+import torch
+
+from robo_knights.models.export import load_inference_weights, load_network, prepare_for_inference
+from robo_knights.utils.move_encoding import moves_to_indices
+
+
+class InferenceAgent:
+    """
+    Agent with the ChessAgent ``select_action`` API for play only.
+    """
+    def __init__(self, scorer, backend="torch", greedy=False, seed=None, cache=None):
+        """
+        Initialize the agent. Use ``load`` or ``from_agent`` to create one.
+        
+        Args:
+            scorer: Callable (states, move_indices) -> (legal_logits, value);
+                a torch module, or an onnxruntime session for ``backend="onnx"``
+            backend (str): "torch" or "onnx"
+            greedy (bool): Play the highest-scoring move instead of sampling
+            seed (int, optional): Seed for move sampling
+            cache (EvaluationCache, optional): Reuse evaluations of repeated
+                positions when ``select_action`` is given the board
+        """
+        self.scorer = scorer
+        self.backend = backend
+        self.greedy = greedy
+        self.rng = np.random.default_rng(seed)
+        self.cache = cache
+    
+    def reseed(self, seed):
+        """Restart move sampling from ``seed``."""
+        self.rng = np.random.default_rng(seed)
+    
+    @classmethod
+    def load(cls, path, quantize=False, **kwargs):
+        """
+        Load an agent from an exported model or a training checkpoint.
+        
+        Args:
+            path (str): ``.onnx`` (ONNX), ``.pt`` (TorchScript), ``.rkw``
+                (memory-mapped weights shared between processes) or a
+                ``ChessAgent.save_model`` checkpoint (copied when prepared
+                for inference, so not shared)
+            quantize (bool): Store the policy head rows as int8 when loading a
+                training checkpoint (exported models are quantized at export)
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            InferenceAgent: The agent
+        """
+        if path.endswith(".onnx"):
+            try:
+                import onnxruntime
+            except ImportError as e:
+                raise ImportError("Loading ONNX models needs 'onnxruntime': "
+                                  "pip install robo-knights[onnx]") from e
+            options = onnxruntime.SessionOptions()
+            # One thread per session: concurrency comes from running many games
+            options.intra_op_num_threads = 1
+            session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            return cls(session, backend="onnx", **kwargs)
+        
+        if path.endswith(".pt"):
+            return cls(torch.jit.load(path, map_location="cpu"), **kwargs)
+        
+        if path.endswith(".rkw"):
+            return cls(load_inference_weights(path), **kwargs)
+        
+        return cls(prepare_for_inference(load_network(path), quantize), **kwargs)
+    
+    @classmethod
+    def from_agent(cls, agent, quantize=False, **kwargs):
+        """
+        Create an inference copy of a ChessAgent's current network.
+        
+        Args:
+            agent (ChessAgent): The trained agent
+            quantize (bool): Store the policy head rows as int8
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            InferenceAgent: The agent
+        """
+        return cls(prepare_for_inference(agent.model, quantize), **kwargs)
+    
+    def evaluate_batch(self, states, move_indices):
+        """
+        Score the legal moves of a batch of positions in one network call.
+        
+        Args:
+            states (numpy.ndarray): Board states of shape (B, 8, 8, 12) or (B, 768)
+            move_indices (numpy.ndarray): Move indices of shape (B, K); rows with
+                fewer legal moves are padded with any of their legal indices
+        
+        Returns:
+            tuple: (logits of shape (B, K), values of shape (B,)) as numpy arrays
+        """
+        indices = np.asarray(move_indices, dtype=np.int64)
+        states = np.asarray(states, dtype=np.float32).reshape(len(indices), -1)
+        if self.backend == "onnx":
+            logits, values = self.scorer.run(None, {"states": states, "move_indices": indices})
+        else:
+            with torch.inference_mode():
+                logits, values = self.scorer(torch.from_numpy(states), torch.from_numpy(indices))
+            logits, values = logits.numpy(), values.numpy()
+        return logits, values[:, 0]
+    
+    def evaluate(self, state, move_indices, board=None):
+        """
+        Score the legal moves of one position and estimate its value.
+        
+        Args:
+            state (numpy.ndarray): Board state of shape (8, 8, 12)
+            move_indices (numpy.ndarray): Indices of the legal moves
+            board (chess.Board, optional): The position, used as the key of the
+                evaluation cache
+        
+        Returns:
+            tuple: (legal_logits, value), one logit per legal move
+        """
+        if self.cache is not None and board is not None:
+            # The weights never change, so every entry stays valid (version 0)
+            key = self.cache.key(board)
+            cached = self.cache.lookup(key, move_indices)
+            if cached is not None:
+                return cached
+        
+        logits, value = self.evaluate_batch(state, np.asarray(move_indices).reshape(1, -1))
+        logits, value = logits[0], float(value[0])
+        
+        if self.cache is not None and board is not None:
+            self.cache.store(key, move_indices, logits, value)
+        return logits, value
+    
+    def select_action(self, state, legal_moves, board=None):
+        """
+        Select an action based on the current state and legal moves.
+        
+        Args:
+            state (numpy.ndarray): Current state of the board
+            legal_moves (list): List of legal chess.Move objects
+            board (chess.Board, optional): The position, used as the key of the
+                evaluation cache
+        
+        Returns:
+            chess.Move: The selected move
+        """
+        legal_moves = [m for m in legal_moves if m is not None]
+        logits, _ = self.evaluate(state, moves_to_indices(legal_moves), board)
+        if self.greedy:
+            return legal_moves[int(np.argmax(logits))]
+        probs = np.exp(logits - logits.max())
+        return legal_moves[self.rng.choice(len(legal_moves), p=probs / probs.sum())]
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Batched inference server for action selection.
+
+Many concurrent games submit ``select_action`` requests to one server thread,
+which gathers them into a single ``ActorCriticNetwork.forward`` call under
+``torch.inference_mode`` and hands each game its sampled move.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+
+from robo_knights.utils.move_encoding import moves_to_indices
+
+_STOP = object()
+
+
+class InferenceServer:
+    """
+    Collects action requests from many threads and evaluates them in batches.
+    
+    A batch is dispatched as soon as ``max_batch_size`` requests are waiting or
+    ``max_wait_ms`` has passed since the first request of the batch arrived.
+    """
+    def __init__(self, model, max_batch_size=64, max_wait_ms=2.0, cache=None, version=None):
+        """
+        Initialize the server.
+        
+        Args:
+            model (ActorCriticNetwork): The network to evaluate (e.g. ``ChessAgent.model``)
+            max_batch_size (int): Largest batch passed to the network
+            max_wait_ms (float): Longest time a request waits for the batch to fill
+            cache (EvaluationCache, optional): Answer repeated positions without
+                queueing them (requests must pass the board)
+            version (callable, optional): Returns the current weights version of
+                ``model`` for cache invalidation (default: the weights never change)
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache = cache
+        self.version = version if version is not None else (lambda: 0)
+        self._requests = queue.Queue()
+        self._thread = None
+        self.stats = {"requests": 0, "batches": 0}
+    
+    @classmethod
+    def from_agent(cls, agent, **kwargs):
+        """
+        Create a server for the network of a ChessAgent.
+        
+        Args:
+            agent (ChessAgent): The agent whose model is served
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            InferenceServer: The server (not started)
+        """
+        return cls(agent.model, version=lambda: agent.weights_version, **kwargs)
+    
+    def start(self):
+        """Start the server thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._serve, name="inference-server", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the server thread after the pending requests are served."""
+        if self._thread is None:
+            return
+        self._requests.put(_STOP)
+        self._thread.join()
+        self._thread = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def client(self):
+        """
+        Get an agent that selects its moves through this server.
+        
+        Returns:
+            ServedAgent: A drop-in replacement for ChessAgent when playing
+        """
+        return ServedAgent(self)
+    
+    def submit(self, state, legal_indices, board=None):
+        """
+        Queue one action request.
+        
+        Args:
+            state (numpy.ndarray): Board state of shape (8, 8, 12)
+            legal_indices (numpy.ndarray): Indices of the legal moves
+            board (chess.Board, optional): The position, used as the key of the
+                evaluation cache
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the position of the sampled
+                move within ``legal_indices``
+        
+        Raises:
+            ValueError: If there are no legal moves to choose from
+        """
+        if self._thread is None:
+            raise RuntimeError("InferenceServer is not running; call start() first")
+        if len(legal_indices) == 0:
+            raise ValueError("Cannot select an action without legal moves")
+        future = Future()
+        
+        key = version = None
+        if self.cache is not None and board is not None:
+            key, version = self.cache.key(board), self.version()
+            cached = self.cache.lookup(key, legal_indices, version)
+            if cached is not None:
+                logits = torch.from_numpy(cached[0])
+                future.set_result(torch.distributions.Categorical(logits=logits).sample().item())
+                return future
+        
+        state = np.asarray(state, dtype=np.float32).reshape(-1)
+        self._requests.put((state, legal_indices, future, key, version))
+        return future
+    
+    @property
+    def mean_batch_size(self):
+        """float: Average number of requests per network call."""
+        return self.stats["requests"] / max(self.stats["batches"], 1)
+    
+    def _collect(self, first):
+        """Gather requests into a batch until it is full or the wait expires."""
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        stop = False
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._requests.get(timeout=timeout) if timeout > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                stop = True
+                break
+            batch.append(request)
+        return batch, stop
+    
+    def _serve(self):
+        """Server loop."""
+        while True:
+            first = self._requests.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            try:
+                self._evaluate(batch)
+            except Exception as e:
+                for _, _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+    
+    def _evaluate(self, batch):
+        """Run one forward pass for a batch and resolve its futures."""
+        states = torch.from_numpy(np.stack([request[0] for request in batch]))
+        counts = [len(request[1]) for request in batch]
+        
+        # Pad the legal index lists so that sampling is one batched op; padding
+        # repeats a legal index so every head can score it, then gets masked
+        padded = np.empty((len(batch), max(counts)), dtype=np.int64)
+        valid = np.zeros(padded.shape, dtype=bool)
+        for row, (_, legal, _, _, _) in enumerate(batch):
+            padded[row, :counts[row]] = legal
+            padded[row, counts[row]:] = legal[0]
+            valid[row, :counts[row]] = True
+        
+        with torch.inference_mode():
+            logits, values = self.model(states, torch.from_numpy(padded))
+            logits = logits.masked_fill(~torch.from_numpy(valid), float("-inf"))
+            choices = torch.distributions.Categorical(logits=logits).sample().tolist()
+        
+        self.stats["requests"] += len(batch)
+        self.stats["batches"] += 1
+        for row, ((_, legal, future, key, version), choice) in enumerate(zip(batch, choices)):
+            if key is not None:
+                self.cache.store(key, legal, logits[row, :counts[row]].numpy(),
+                                 values[row].item(), version)
+            future.set_result(choice)
+
+
+class ServedAgent:
+    """
+    Agent with the ChessAgent ``select_action`` API that delegates to an InferenceServer.
+    
+    Inference only: no transitions are stored, so it is meant for play,
+    visualization and self-play data generation rather than training.
+    """
+    def __init__(self, server):
+        """
+        Args:
+            server (InferenceServer): A running server
+        """
+        self.server = server
+    
+    def select_action(self, state, legal_moves, board=None):
+        """
+        Select an action based on the current state and legal moves.
+        
+        Args:
+            state (numpy.ndarray): Current state of the board
+            legal_moves (list): List of legal chess.Move objects
+            board (chess.Board, optional): The position, used as the key of the
+                server's evaluation cache
+        
+        Returns:
+            chess.Move: The selected move
+        """
+        legal_moves = [m for m in legal_moves if m is not None]
+        choice = self.server.submit(state, moves_to_indices(legal_moves), board).result()
+        return legal_moves[choice]
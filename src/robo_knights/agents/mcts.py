@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+AlphaZero-style PUCT tree search guided by the actor-critic network.
+
+The tree is stored in flat numpy arrays: every node owns a contiguous run of
+edges (one per legal move) holding the prior, visit count, value sum, pending
+virtual visits and child node id, so a search allocates no Python object per
+edge. Leaves are collected with virtual loss and evaluated by the network in
+batches. The subtree under the moves actually played is kept between moves.
+
+Values are from the perspective of the player to move, as in self-play
+training: +1 means the side to move is winning.
+"""
+
+import chess.polyglot
+import numpy as np
+
+from robo_knights.agents.inference_agent import InferenceAgent
+from robo_knights.environment.encoding import encode_board
+from robo_knights.utils.move_encoding import index_to_move, legal_indices, moves_to_indices
+
+
+class SearchTree:
+    """
+    Array-backed search tree.
+    """
+    def __init__(self, capacity=1024):
+        """
+        Args:
+            capacity (int): Initial number of node and edge slots (grown as needed)
+        """
+        self.num_nodes = 0
+        self.num_edges = 0
+        # Nodes
+        self.first_edge = np.zeros(capacity, dtype=np.int64)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.node_visits = np.zeros(capacity, dtype=np.int32)
+        self.expanded = np.zeros(capacity, dtype=bool)
+        self.terminal_value = np.full(capacity, np.nan, dtype=np.float32)
+        # Edges
+        self.move = np.zeros(capacity, dtype=np.int32)
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self.value_sum = np.zeros(capacity, dtype=np.float32)
+        self.virtual = np.zeros(capacity, dtype=np.int32)
+        self.child = np.zeros(capacity, dtype=np.int32)
+    
+    _NODE_ARRAYS = ("first_edge", "num_children", "node_visits", "expanded", "terminal_value")
+    _EDGE_ARRAYS = ("move", "prior", "visits", "value_sum", "virtual", "child")
+    
+    def _grow(self, names, needed):
+        size = len(getattr(self, names[0]))
+        if needed <= size:
+            return
+        new_size = max(needed, 2 * size)
+        for name in names:
+            old = getattr(self, name)
+            fill = np.nan if name == "terminal_value" else 0
+            new = np.full(new_size, fill, dtype=old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+    
+    def add_node(self):
+        """Append an unexpanded node and return its id."""
+        self._grow(self._NODE_ARRAYS, self.num_nodes + 1)
+        node = self.num_nodes
+        self.num_nodes += 1
+        return node
+    
+    def expand(self, node, moves, priors):
+        """
+        Give a node one edge per legal move.
+        
+        Args:
+            node (int): Node id
+            moves (numpy.ndarray): Legal move indices
+            priors (numpy.ndarray): Prior probability of each move
+        """
+        count = len(moves)
+        start = self.num_edges
+        self._grow(self._EDGE_ARRAYS, start + count)
+        end = start + count
+        self.move[start:end] = moves
+        self.prior[start:end] = priors
+        self.visits[start:end] = 0
+        self.value_sum[start:end] = 0.0
+        self.virtual[start:end] = 0
+        self.child[start:end] = -1
+        self.first_edge[node] = start
+        self.num_children[node] = count
+        self.expanded[node] = True
+        self.num_edges = end
+    
+    def edges(self, node):
+        """Slice of the node's edges."""
+        start = self.first_edge[node]
+        return slice(start, start + self.num_children[node])
+    
+    def child_of(self, edge):
+        """Child node behind an edge, created on first use."""
+        child = self.child[edge]
+        if child < 0:
+            child = self.add_node()
+            self.child[edge] = child
+        return child
+
+
+class MCTS:
+    """
+    PUCT search over a SearchTree with batched network evaluation.
+    """
+    def __init__(self, evaluator, simulations=100, batch_size=8, c_puct=1.5,
+                 dirichlet_alpha=None, dirichlet_epsilon=0.25, max_nodes=200000, seed=None):
+        """
+        Initialize the search.
+        
+        Args:
+            evaluator (InferenceAgent): Provides ``evaluate_batch`` for priors and
+                values and, optionally, an evaluation ``cache``
+            simulations (int): Simulations per search
+            batch_size (int): Leaves collected (with virtual loss) per network call
+            c_puct (float): Exploration constant
+            dirichlet_alpha (float, optional): Add Dirichlet noise with this alpha
+                to the root priors (for self-play exploration)
+            dirichlet_epsilon (float): Weight of the root noise
+            max_nodes (int): Discard the reused tree once it grows beyond this
+            seed (int, optional): Seed for the root noise
+        """
+        self.evaluator = evaluator
+        self.simulations = simulations
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.dirichlet_alpha = dirichlet_alpha
+        self.dirichlet_epsilon = dirichlet_epsilon
+        self.max_nodes = max_nodes
+        self.rng = np.random.default_rng(seed)
+        self.stats = {"searches": 0, "simulations": 0, "evaluations": 0, "batches": 0, "reused_visits": 0}
+        self.reset()
+    
+    def reset(self):
+        """Forget the current tree."""
+        self.tree = SearchTree()
+        self.root = self.tree.add_node()
+        self._root_key = None
+        self._root_ply = 0
+        self._root_prior = None
+    
+    def _advance(self, board):
+        """Re-root the tree at ``board`` if it was reached from the old root."""
+        tree = self.tree
+        played = len(board.move_stack) - self._root_ply
+        if self._root_key is None or played < 0 or tree.num_nodes > self.max_nodes:
+            self.reset()
+            return
+        node = self.root
+        history = board.move_stack[len(board.move_stack) - played:] if played else []
+        previous = board.copy(stack=played)
+        for _ in range(played):
+            previous.pop()
+        if self._root_key != chess.polyglot.zobrist_hash(previous):
+            self.reset()
+            return
+        for move in history:
+            if not tree.expanded[node]:
+                self.reset()
+                return
+            edges = tree.edges(node)
+            matches = np.flatnonzero(tree.move[edges] == moves_to_indices([move])[0])
+            if not len(matches) or tree.child[edges.start + matches[0]] < 0:
+                self.reset()
+                return
+            node = tree.child[edges.start + matches[0]]
+        self.root = node
+    
+    def _select_edge(self, node):
+        tree = self.tree
+        edges = tree.edges(node)
+        visits = tree.visits[edges] + tree.virtual[edges]
+        # Each pending virtual visit counts as a loss for the player choosing the edge
+        value_sum = tree.value_sum[edges] - tree.virtual[edges]
+        q = np.divide(value_sum, visits, out=np.zeros(len(visits), dtype=np.float32), where=visits > 0)
+        total = tree.node_visits[node] + tree.virtual[edges].sum()
+        prior = self._root_prior if node == self.root and self._root_prior is not None else tree.prior[edges]
+        u = self.c_puct * prior * np.sqrt(max(total, 1)) / (1.0 + visits)
+        return edges.start + int(np.argmax(q + u))
+    
+    def _backup(self, path, nodes, value):
+        """Propagate a leaf value (side to move at the leaf) up the path."""
+        tree = self.tree
+        for edge in reversed(path):
+            value = -value
+            tree.value_sum[edge] += value
+            tree.visits[edge] += 1
+            tree.virtual[edge] -= 1
+        tree.node_visits[nodes] += 1
+    
+    def _evaluate(self, leaves):
+        """Expand a batch of leaves and return their values."""
+        cache = getattr(self.evaluator, "cache", None)
+        results = [None] * len(leaves)
+        pending = []
+        for i, (_, board) in enumerate(leaves):
+            legal = legal_indices(board)
+            key = cache.key(board) if cache is not None else None
+            cached = cache.lookup(key, legal) if cache is not None else None
+            if cached is not None:
+                results[i] = (legal, cached[0], cached[1])
+            else:
+                pending.append((i, legal, key, board))
+        
+        if pending:
+            width = max(len(legal) for _, legal, _, _ in pending)
+            states = np.stack([encode_board(board) for _, _, _, board in pending])
+            padded = np.empty((len(pending), width), dtype=np.int64)
+            for row, (_, legal, _, _) in enumerate(pending):
+                padded[row, :len(legal)] = legal
+                padded[row, len(legal):] = legal[0]
+            logits, values = self.evaluator.evaluate_batch(states, padded)
+            for row, (i, legal, key, _) in enumerate(pending):
+                results[i] = (legal, logits[row, :len(legal)], float(values[row]))
+                if cache is not None:
+                    cache.store(key, legal, results[i][1], results[i][2])
+            self.stats["evaluations"] += len(pending)
+            self.stats["batches"] += 1
+        
+        values = []
+        for (node, _), (legal, logits, value) in zip(leaves, results):
+            priors = np.exp(logits - logits.max())
+            self.tree.expand(node, legal, priors / priors.sum())
+            values.append(float(np.clip(value, -1.0, 1.0)))
+        return values
+    
+    def _noisy_root_prior(self):
+        """
+        The root priors mixed with fresh Dirichlet noise.
+        
+        The tree keeps the network's priors: noise written into it would
+        compound every time a reused node became the root again.
+        """
+        tree = self.tree
+        edges = tree.edges(self.root)
+        noise = self.rng.dirichlet([self.dirichlet_alpha] * (edges.stop - edges.start))
+        return (1 - self.dirichlet_epsilon) * tree.prior[edges] + self.dirichlet_epsilon * noise
+    
+    @staticmethod
+    def _terminal_value(board):
+        outcome = board.outcome()
+        if outcome is None:
+            return None
+        # A decisive result always means the side to move has been mated
+        return 0.0 if outcome.winner is None else -1.0
+    
+    def search(self, board, simulations=None):
+        """
+        Run the search from a position.
+        
+        Args:
+            board (chess.Board): Position to search (not modified)
+            simulations (int, optional): Overrides ``self.simulations``
+        
+        Returns:
+            tuple: (move_indices, visit_distribution, root_value); the visit
+                distribution over the legal moves is the search policy target
+        """
+        simulations = simulations or self.simulations
+        self._advance(board)
+        tree = self.tree
+        root = self.root
+        self.stats["reused_visits"] += int(tree.node_visits[root])
+        self._root_key = chess.polyglot.zobrist_hash(board)
+        self._root_ply = len(board.move_stack)
+        
+        if not tree.expanded[root]:
+            self._evaluate([(root, board)])
+        self._root_prior = self._noisy_root_prior() if self.dirichlet_alpha is not None else None
+        
+        done = 0
+        while done < simulations:
+            leaves, paths, pending = [], [], set()
+            while len(leaves) < self.batch_size and done < simulations:
+                scratch = board.copy(stack=False)
+                node, path, nodes = root, [], [root]
+                while tree.expanded[node] and np.isnan(tree.terminal_value[node]):
+                    edge = self._select_edge(node)
+                    tree.virtual[edge] += 1
+                    path.append(edge)
+                    scratch.push(index_to_move(int(tree.move[edge])))
+                    node = tree.child_of(edge)
+                    nodes.append(node)
+                
+                done += 1
+                if not tree.expanded[node] and np.isnan(tree.terminal_value[node]):
+                    terminal = self._terminal_value(scratch)
+                    if terminal is not None:
+                        tree.terminal_value[node] = terminal
+                if not np.isnan(tree.terminal_value[node]):
+                    self._backup(path, nodes, float(tree.terminal_value[node]))
+                    continue
+                if node in pending:
+                    # Another path of this batch already waits for this leaf
+                    for edge in path:
+                        tree.virtual[edge] -= 1
+                    done -= 1
+                    break
+                pending.add(node)
+                leaves.append((node, scratch))
+                paths.append((path, nodes))
+            
+            if leaves:
+                for value, (path, nodes) in zip(self._evaluate(leaves), paths):
+                    self._backup(path, nodes, value)
+        self.stats["searches"] += 1
+        self.stats["simulations"] += simulations
+        
+        edges = tree.edges(root)
+        visits = tree.visits[edges].astype(np.float64)
+        total = visits.sum()
+        policy = visits / total if total else tree.prior[edges].astype(np.float64)
+        root_value = float(tree.value_sum[edges].sum() / total) if total else 0.0
+        return tree.move[edges].astype(np.int64), policy, root_value
+
+
+class MCTSAgent:
+    """
+    Agent with the ChessAgent ``select_action`` API that plays the search's choice.
+    """
+    def __init__(self, evaluator, simulations=100, batch_size=8, c_puct=1.5, temperature=0.0,
+                 reuse_tree=True, dirichlet_alpha=None, seed=None):
+        """
+        Initialize the agent.
+        
+        Args:
+            evaluator (InferenceAgent): Network used for priors and leaf values
+            simulations (int): Simulations per move
+            batch_size (int): Leaves per network call
+            c_puct (float): Exploration constant
+            temperature (float): 0 plays the most visited move; otherwise moves
+                are sampled in proportion to visits ** (1 / temperature)
+            reuse_tree (bool): Keep the searched subtree between moves
+            dirichlet_alpha (float, optional): Root noise for self-play
+            seed (int, optional): Seed for noise and move sampling
+        """
+        self.search = MCTS(evaluator, simulations, batch_size, c_puct,
+                           dirichlet_alpha=dirichlet_alpha, seed=seed)
+        self.temperature = temperature
+        self.reuse_tree = reuse_tree
+        self.rng = np.random.default_rng(seed)
+    
+    def reseed(self, seed):
+        """
+        Prepare for a new game played from ``seed``.
+        
+        The noise and move sampling restart from the seed and the tree is
+        dropped, so the game does not depend on the games played before it.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.search.rng = np.random.default_rng(seed)
+        self.search.reset()
+    
+    @classmethod
+    def load(cls, path, quantize=False, cache=None, **kwargs):
+        """
+        Create a search agent from an exported model or a training checkpoint.
+        
+        Args:
+            path (str): Model path (see ``InferenceAgent.load``)
+            quantize (bool): Store the policy head rows as int8
+            cache (EvaluationCache, optional): Evaluation cache for the leaves
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            MCTSAgent: The agent
+        """
+        return cls(InferenceAgent.load(path, quantize=quantize, cache=cache), **kwargs)
+    
+    def select_action(self, state, legal_moves, board=None):
+        """
+        Select an action by searching from the current position.
+        
+        Args:
+            state (numpy.ndarray): Current state of the board (unused; the
+                search encodes its own positions)
+            legal_moves (list): List of legal chess.Move objects
+            board (chess.Board): The current position (required)
+        
+        Returns:
+            chess.Move: The selected move
+        """
+        if board is None:
+            raise ValueError("MCTSAgent.select_action needs the board")
+        if not self.reuse_tree:
+            self.search.reset()
+        moves, policy, _ = self.search.search(board)
+        if self.temperature > 0:
+            weights = policy ** (1.0 / self.temperature)
+            choice = self.rng.choice(len(moves), p=weights / weights.sum())
+        else:
+            choice = int(np.argmax(policy))
+        return index_to_move(int(moves[choice]))
@@ -1,3 +1,7 @@
 from .chess_env import ChessEnv
+from .batched_env import BatchedChessEnv
+from .rewards import RewardFunction, OutcomeReward, MaterialReward
+from .game_runner import GameRunner, AsFastAsPossible, FixedDelay, RealTime, build_pacing
 
-__all__ = ["ChessEnv"] 
\ No newline at end of file
+__all__ = ["ChessEnv", "BatchedChessEnv", "RewardFunction", "OutcomeReward", "MaterialReward",
+           "GameRunner", "AsFastAsPossible", "FixedDelay", "RealTime", "build_pacing"]
@@ -0,0 +1,143 @@
+"""
+Batched chess environment that runs several games in lockstep.
+"""
+
+import numpy as np
+
+from robo_knights.environment.chess_env import ChessEnv
+from robo_knights.utils.move_encoding import NUM_MOVES, moves_to_indices
+
+
+class BatchedChessEnv:
+    """
+    Holds N independent chess games and steps them together.
+
+    Observations, rewards and done flags are returned as stacked arrays so that
+    an agent can run a single forward pass per ply across all games. Finished
+    games are reset automatically; the final observation and result of a game
+    are reported in its ``info`` dict. Legal moves are kept as index arrays;
+    the dense masks are only built when ``get_legal_masks`` is called.
+    """
+    def __init__(self, num_envs, copy_obs=True, info_level="none"):
+        """
+        Initialize the batched environment.
+
+        Args:
+            num_envs (int): Number of games to run in lockstep
+            copy_obs (bool): Return copies of the observation buffer. If False,
+                the returned array is overwritten by the next step.
+            info_level (str): Info level of every game (see ChessEnv)
+        """
+        if num_envs < 1:
+            raise ValueError("num_envs must be at least 1")
+        self.num_envs = num_envs
+        self.copy_obs = copy_obs
+        self._states = np.zeros((num_envs, 8, 8, 12), dtype=np.float32)
+        self.envs = [ChessEnv(state_buffer=self._states[i], info_level=info_level) for i in range(num_envs)]
+
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._dones = np.zeros(num_envs, dtype=bool)
+        self.legal_masks = np.zeros((num_envs, NUM_MOVES), dtype=bool)
+        self.legal_moves = [[] for _ in range(num_envs)]
+        self.legal_indices = [np.zeros(0, dtype=np.int64) for _ in range(num_envs)]
+
+    @property
+    def boards(self):
+        """list: The ``chess.Board`` of every game."""
+        return [env.board for env in self.envs]
+
+    def reset(self):
+        """
+        Reset every game to the initial position.
+
+        Returns:
+            numpy.ndarray: Stacked states of shape (N, 8, 8, 12)
+        """
+        for i, env in enumerate(self.envs):
+            env.reset()
+            self._update_legal(i)
+        return self._observation()
+
+    def reset_game(self, i):
+        """
+        Restart game ``i`` from the initial position, e.g. after a ply limit.
+
+        Returns:
+            numpy.ndarray: The new state of game ``i``, of shape (8, 8, 12)
+        """
+        state = self.envs[i].reset()
+        self._update_legal(i)
+        return state.copy() if self.copy_obs else state
+
+    def step(self, actions):
+        """
+        Play one move in every game.
+
+        Args:
+            actions (list): One chess.Move per game
+
+        Returns:
+            tuple: (states, rewards, dones, infos) where states has shape
+                (N, 8, 8, 12), rewards and dones have shape (N,) and infos is a
+                list of N dicts
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"Expected {self.num_envs} actions, got {len(actions)}")
+
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            state, reward, done, info = env.step(action)
+            self._rewards[i] = reward
+            self._dones[i] = done
+
+            if done:
+                info = dict(info)
+                info["final_state"] = state.copy()
+                info["result"] = env.board.result()
+                env.reset()
+
+            self._update_legal(i)
+            infos.append(info)
+
+        return self._observation(), self._rewards.copy(), self._dones.copy(), infos
+
+    def get_legal_masks(self):
+        """
+        Get the legal-move masks of every game.
+
+        Returns:
+            numpy.ndarray: Boolean array of shape (N, 64*64*5), overwritten by
+                the next call
+        """
+        self.legal_masks[:] = False
+        for i, indices in enumerate(self.legal_indices):
+            self.legal_masks[i, indices] = True
+        return self.legal_masks
+
+    def get_legal_indices(self):
+        """
+        Get the legal move indices of every game.
+
+        Returns:
+            list: One int64 array of move indices per game, in the order of
+                ``get_legal_moves``
+        """
+        return list(self.legal_indices)
+
+    def get_legal_moves(self):
+        """
+        Get the legal moves of every game.
+
+        Returns:
+            list: One list of legal chess.Move objects per game
+        """
+        return list(self.legal_moves)
+
+    def _update_legal(self, i):
+        """Refresh the legal moves of game ``i``."""
+        self.legal_moves[i] = list(self.envs[i].board.legal_moves)
+        self.legal_indices[i] = moves_to_indices(self.legal_moves[i])
+
+    def _observation(self):
+        """Return the stacked observation buffer."""
+        return self._states.copy() if self.copy_obs else self._states
@@ -1,17 +1,100 @@
+from collections.abc import Mapping
+
 import chess
-import numpy as np
+
+from robo_knights.environment.encoding import BoardEncoder, encode_board
+from robo_knights.environment.rewards import PIECE_VALUES, MaterialReward, count_material
+from robo_knights.utils.instrumentation import section
+
+INFO_LEVELS = ("none", "lazy", "full")
+
+def _termination(outcome):
+    return outcome.termination if outcome is not None else None
+
+class StepInfo(Mapping):
+    """
+    Read-only view of the info for one step.
+    
+    Fields are computed from the board on first access and then cached, so a
+    caller that never looks at the info pays nothing for it. The view is only
+    valid until the environment takes its next step or is reset.
+    """
+    FIELDS = {
+        "fen": lambda board, outcome: board.fen(),
+        "is_check": lambda board, outcome: board.is_check(),
+        "is_checkmate": lambda board, outcome: _termination(outcome) == chess.Termination.CHECKMATE,
+        "is_stalemate": lambda board, outcome: _termination(outcome) == chess.Termination.STALEMATE,
+        "is_insufficient_material": lambda board, outcome:
+            _termination(outcome) == chess.Termination.INSUFFICIENT_MATERIAL,
+        "legal_moves": lambda board, outcome: [move.uci() for move in board.legal_moves]
+    }
+    
+    def __init__(self, env):
+        """
+        Args:
+            env (ChessEnv): The environment, right after a step
+        """
+        self._env = env
+        self._step_id = env.step_id
+        self._values = {}
+    
+    def __getitem__(self, key):
+        if key in self._values:
+            return self._values[key]
+        compute = self.FIELDS[key]
+        if self._env.step_id != self._step_id:
+            raise RuntimeError(f"Info field '{key}' requested after the environment moved on")
+        value = self._values[key] = compute(self._env.board, self._env.outcome)
+        return value
+    
+    def __iter__(self):
+        return iter(self.FIELDS)
+    
+    def __len__(self):
+        return len(self.FIELDS)
+    
+    def __repr__(self):
+        return f"StepInfo({sorted(self._values)} computed)"
 
 class ChessEnv:
     """
     Chess environment for reinforcement learning.
     Wraps the chess library to provide a gym-like interface.
     """
-    def __init__(self):
+    def __init__(self, state_buffer=None, reward_fn=None, info_level="lazy"):
+        """
+        Initialize the environment.
+
+        Args:
+            state_buffer (numpy.ndarray, optional): Preallocated float32 array of
+                shape (8, 8, 12). When given, every state is written into it and
+                the same array is returned instead of a fresh one.
+            reward_fn (RewardFunction, optional): Reward function called after
+                every move (default: MaterialReward)
+            info_level (str): What ``step`` returns as info: "none" for an empty
+                dict, "lazy" for a StepInfo view evaluated on access, "full" for
+                an eagerly built dict
+        """
+        if info_level not in INFO_LEVELS:
+            raise ValueError(f"info_level must be one of {INFO_LEVELS}, got {info_level!r}")
         self.board = chess.Board()
+        self.state_buffer = state_buffer
+        self._encoder = BoardEncoder(state_buffer) if state_buffer is not None else None
+        self.reward_fn = reward_fn if reward_fn is not None else MaterialReward()
+        self.info_level = info_level
+        self.step_id = 0
+        
+        # Material per color ([black, white]), updated incrementally on every move
+        self.material = count_material(self.board)
+        self.outcome = None
         
     def reset(self):
         """Reset the environment to the initial state."""
         self.board.reset()
+        self.material = count_material(self.board)
+        self.outcome = None
+        self.step_id += 1
+        self.reward_fn.reset(self)
         return self.get_state()
     
     def get_state(self):
@@ -19,22 +102,11 @@ class ChessEnv:
         Get the current state of the board as a numpy array.
         
         Returns:
-            numpy.ndarray: A flattened representation of the board
+            numpy.ndarray: A 8x8x12 array (one plane per piece type and color)
         """
-        # Create a 8x8x12 array (one plane per piece type and color)
-        state = np.zeros((8, 8, 12), dtype=np.float32)
-        
-        # Fill the state array based on the current board
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece is not None:
-                # Calculate the plane index (0-11)
-                # 6 piece types * 2 colors = 12 planes
-                plane_idx = piece.piece_type - 1 + (0 if piece.color else 6)
-                rank, file = divmod(square, 8)
-                state[rank, file, plane_idx] = 1.0
-        
-        return state
+        if self._encoder is not None:
+            return self._encoder.encode(self.board)
+        return encode_board(self.board)
     
     def step(self, action):
         """
@@ -49,67 +121,57 @@ class ChessEnv:
         if action not in self.board.legal_moves:
             return self.get_state(), -1.0, True, {"error": "Illegal move"}
         
+        self._update_material(action)
+        
         # Make the move
         self.board.push(action)
+        self.step_id += 1
         
         # Get the new state
-        next_state = self.get_state()
+        with section("encode_state"):
+            next_state = self.get_state()
+        
+        # The outcome is computed once and every terminal flag derives from it
+        self.outcome = self.board.outcome()
         
         # Calculate reward
-        reward = self._calculate_reward()
+        reward = self.reward_fn(self, action, self.outcome)
         
         # Check if the game is over
-        done = self.is_game_over()
+        done = self.outcome is not None
         
-        info = {
-            "fen": self.board.fen(),
-            "is_check": self.board.is_check(),
-            "is_checkmate": self.board.is_checkmate(),
-            "is_stalemate": self.board.is_stalemate(),
-            "is_insufficient_material": self.board.is_insufficient_material(),
-            "legal_moves": [move.uci() for move in self.board.legal_moves]
-        }
-        
-        return next_state, reward, done, info
+        return next_state, reward, done, self.get_info()
     
-    def _calculate_reward(self):
+    def get_info(self):
         """
-        Calculate the reward for the current state.
+        Get the info for the last step according to ``info_level``.
         
         Returns:
-            float: The reward value
-        """
-        # Simple reward based on material difference
-        if self.board.is_game_over():
-            if self.board.is_checkmate():
-                # Checkmate: +1 for white win, -1 for black win
-                return 1.0 if self.board.turn == chess.BLACK else -1.0
-            else:
-                # Draw: 0 reward
-                return 0.0
-        
-        # Material-based reward
-        material_value = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
-        
-        white_material = sum(material_value[piece.piece_type] 
-                            for piece in self.board.piece_map().values() 
-                            if piece.color == chess.WHITE)
-        
-        black_material = sum(material_value[piece.piece_type] 
-                            for piece in self.board.piece_map().values() 
-                            if piece.color == chess.BLACK)
-        
-        # Normalize the material difference
-        material_diff = (white_material - black_material) / 100.0
+            Mapping: Keys are fen, is_check, is_checkmate, is_stalemate,
+                is_insufficient_material and legal_moves (empty for "none")
+        """
+        if self.info_level == "none":
+            return {}
+        info = StepInfo(self)
+        if self.info_level == "full":
+            return dict(info)
+        return info
+    
+    def _update_material(self, move):
+        """
+        Update the material counts for a move that is about to be pushed.
         
-        return material_diff
+        Args:
+            move (chess.Move): A legal move on the current board
+        """
+        mover = self.board.turn
+        captured = self.board.piece_type_at(move.to_square)
+        if captured is None and self.board.is_en_passant(move):
+            captured = chess.PAWN
+        if captured is not None:
+            self.material[not mover] -= PIECE_VALUES[captured]
+        if move.promotion is not None:
+            self.material[mover] += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
     
     def get_legal_moves(self):
         """
@@ -127,4 +189,4 @@ class ChessEnv:
         Returns:
             bool: True if the game is over, False otherwise
         """
-        return self.board.is_game_over() 
\ No newline at end of file
+        return self.outcome is not None 
\ No newline at end of file
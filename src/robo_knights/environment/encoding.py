@@ -0,0 +1,172 @@
+"""
+Bitboard-based board encoding.
+
+A position is described by 12 piece bitboards (white pawn..king, then black
+pawn..king). Unpacking those bitboards with NumPy produces the same
+(8, 8, 12) planes as the original per-square loop, indexed as
+``state[rank, file, plane]`` with ``plane = piece_type - 1 + (0 if white else 6)``.
+"""
+
+import chess
+import numpy as np
+
+NUM_PLANES = 12
+
+# _BYTE_BITS[b] holds the 8 bits of byte b, least significant first, as floats
+_BYTE_BITS = np.unpackbits(
+    np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder="little"
+).astype(np.float32)
+
+
+def board_to_bitboards(board, out=None):
+    """
+    Get the 12 piece bitboards of a board.
+
+    Args:
+        board (chess.Board): The board to encode
+        out (numpy.ndarray, optional): uint64 array of shape (12,) to write into
+
+    Returns:
+        numpy.ndarray: uint64 array of shape (12,)
+    """
+    if out is None:
+        out = np.empty(NUM_PLANES, dtype=np.uint64)
+
+    white = board.occupied_co[chess.WHITE]
+    black = board.occupied_co[chess.BLACK]
+    pieces = (board.pawns, board.knights, board.bishops,
+              board.rooks, board.queens, board.kings)
+
+    for i, mask in enumerate(pieces):
+        out[i] = mask & white
+        out[i + 6] = mask & black
+    return out
+
+
+def bitboards_to_planes(bitboards, out=None):
+    """
+    Unpack piece bitboards into one-hot board planes.
+
+    Args:
+        bitboards (numpy.ndarray): uint64 array of shape (..., 12)
+        out (numpy.ndarray, optional): float32 array of shape (..., 8, 8, 12) to write into
+
+    Returns:
+        numpy.ndarray: float32 array of shape (..., 8, 8, 12)
+    """
+    bitboards = np.asarray(bitboards, dtype="<u8")
+    batch_shape = bitboards.shape[:-1]
+    if out is None:
+        out = np.empty(batch_shape + (8, 8, NUM_PLANES), dtype=np.float32)
+
+    # Little-endian byte k of a bitboard is rank k, bit j of that byte is file j.
+    bits = np.unpackbits(bitboards.view(np.uint8), axis=-1, bitorder="little")
+    planes = np.swapaxes(bits.reshape(batch_shape + (NUM_PLANES, 64)), -1, -2)
+    if out.flags.c_contiguous:
+        # Write through a (..., 64, 12) view instead of copying the transpose first
+        out.reshape(batch_shape + (64, NUM_PLANES))[...] = planes
+    else:
+        out[...] = planes.reshape(batch_shape + (8, 8, NUM_PLANES))
+    return out
+
+
+def planes_to_bitboards(planes, out=None):
+    """
+    Pack one-hot board planes back into piece bitboards.
+
+    Args:
+        planes (numpy.ndarray): Array of shape (..., 8, 8, 12)
+        out (numpy.ndarray, optional): uint64 array of shape (..., 12) to write into
+
+    Returns:
+        numpy.ndarray: uint64 array of shape (..., 12)
+    """
+    planes = np.asarray(planes)
+    batch_shape = planes.shape[:-3]
+    bits = np.swapaxes(planes.reshape(batch_shape + (64, NUM_PLANES)) != 0, -1, -2)
+    packed = np.packbits(bits, axis=-1, bitorder="little")
+    bitboards = np.ascontiguousarray(packed).view("<u8").reshape(batch_shape + (NUM_PLANES,))
+    if out is None:
+        return bitboards.astype(np.uint64)
+    out[...] = bitboards
+    return out
+
+
+def encode_board(board, out=None):
+    """
+    Encode a board as (8, 8, 12) piece planes.
+
+    Args:
+        board (chess.Board): The board to encode
+        out (numpy.ndarray, optional): float32 array of shape (8, 8, 12) to write into
+
+    Returns:
+        numpy.ndarray: float32 array of shape (8, 8, 12)
+    """
+    return bitboards_to_planes(board_to_bitboards(board), out=out)
+
+
+def encode_boards(boards, out=None):
+    """
+    Encode several boards into a stacked array.
+
+    Args:
+        boards (list): List of chess.Board objects
+        out (numpy.ndarray, optional): float32 array of shape (N, 8, 8, 12) to write into
+
+    Returns:
+        numpy.ndarray: float32 array of shape (N, 8, 8, 12)
+    """
+    bitboards = np.empty((len(boards), NUM_PLANES), dtype=np.uint64)
+    for i, board in enumerate(boards):
+        board_to_bitboards(board, out=bitboards[i])
+    return bitboards_to_planes(bitboards, out=out)
+
+
+class BoardEncoder:
+    """
+    Encode boards into one reused (8, 8, 12) buffer without allocating.
+
+    The bitboards and the unpacked bits live in preallocated scratch arrays, and
+    the bits are looked up per byte straight into float32, so encoding a position
+    on the hot self-play path creates no temporary arrays.
+    """
+
+    def __init__(self, out=None):
+        """
+        Set up the scratch buffers.
+
+        Args:
+            out (numpy.ndarray, optional): float32 array of shape (8, 8, 12) to
+                encode into. A new one is allocated when not given.
+        """
+        if out is None:
+            out = np.empty((8, 8, NUM_PLANES), dtype=np.float32)
+        self.out = out
+        self.bitboards = np.empty(NUM_PLANES, dtype="<u8")
+        self._bytes = self.bitboards.view(np.uint8)
+        self._bits = np.empty((NUM_PLANES * 8, 8), dtype=np.float32)
+        # (64, 12) view of the unpacked bits, square-major like the output
+        self._planes = self._bits.reshape(NUM_PLANES, 64).T
+        if out.flags.c_contiguous:
+            self._out_view = out.reshape(64, NUM_PLANES)
+        else:
+            self._out_view = None
+
+    def encode(self, board):
+        """
+        Encode a board into the buffer.
+
+        Args:
+            board (chess.Board): The board to encode
+
+        Returns:
+            numpy.ndarray: The (8, 8, 12) buffer, overwritten
+        """
+        board_to_bitboards(board, out=self.bitboards)
+        np.take(_BYTE_BITS, self._bytes, axis=0, out=self._bits)
+        if self._out_view is not None:
+            self._out_view[...] = self._planes
+        else:
+            self.out[...] = self._planes.reshape(8, 8, NUM_PLANES)
+        return self.out
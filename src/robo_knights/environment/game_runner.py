@@ -0,0 +1,206 @@
+"""
+A single game loop shared by training, play and visualization.
+
+``GameRunner`` asks the side to move for an action, steps the environment and
+reports every move to a list of observers (console output, a pygame window,
+metrics, PGN files, reward collection). How fast the game runs is up to a
+pacing policy, so the same loop drives a watchable game or a headless batch
+job at full speed.
+"""
+
+import time
+
+import chess
+
+from robo_knights.utils.instrumentation import count, section
+
+
+class AsFastAsPossible:
+    """Pacing that never waits."""
+    def start(self):
+        pass
+
+    def wait(self):
+        pass
+
+
+class FixedDelay:
+    """Pacing that sleeps a fixed time after every move."""
+    def __init__(self, delay=0.5):
+        """
+        Args:
+            delay (float): Seconds to sleep after each move
+        """
+        self.delay = delay
+
+    def start(self):
+        pass
+
+    def wait(self):
+        time.sleep(self.delay)
+
+
+class RealTime:
+    """
+    Pacing that plays one move per ``seconds_per_move`` of wall time.
+
+    The time an agent spends thinking counts towards the budget, so a slow
+    search agent is not slowed down further.
+    """
+    def __init__(self, seconds_per_move=0.5):
+        """
+        Args:
+            seconds_per_move (float): Wall time per move
+        """
+        self.seconds_per_move = seconds_per_move
+        self._deadline = None
+
+    def start(self):
+        self._deadline = time.perf_counter() + self.seconds_per_move
+
+    def wait(self):
+        now = time.perf_counter()
+        if self._deadline is None:
+            self._deadline = now
+        remaining = self._deadline - now
+        if remaining > 0:
+            time.sleep(remaining)
+        # Late moves reset the clock instead of making the next ones hurry
+        self._deadline = max(self._deadline, now) + self.seconds_per_move
+
+
+PACING = {
+    "fast": AsFastAsPossible,
+    "fixed": FixedDelay,
+    "realtime": RealTime,
+}
+
+
+def build_pacing(name, delay=0.5):
+    """
+    Create a pacing policy by name.
+
+    Args:
+        name (str): "fast", "fixed" or "realtime"
+        delay (float): Seconds per move for "fixed" and "realtime"
+
+    Returns:
+        Pacing policy with ``start()`` and ``wait()``
+    """
+    if name not in PACING:
+        raise ValueError(f"Unknown pacing {name!r}; expected one of {sorted(PACING)}")
+    return PACING[name]() if name == "fast" else PACING[name](delay)
+
+
+def winner_name(board):
+    """
+    Winner of a finished game.
+
+    Args:
+        board (chess.Board): Final position
+
+    Returns:
+        str: "white", "black", or None for a draw or an unfinished game
+    """
+    outcome = board.outcome()
+    if outcome is None or outcome.winner is None:
+        return None
+    return "white" if outcome.winner == chess.WHITE else "black"
+
+
+class GameRunner:
+    """
+    Plays games between two agents in a ChessEnv.
+
+    Observers may implement any of ``on_game_start(board)``,
+    ``on_move(board, move, reward, agent)`` (called after the move was made),
+    ``on_game_end(board, winner)``, ``should_stop()`` (checked before every
+    move, e.g. when a window was closed) and ``close()``.
+    """
+    def __init__(self, env, white, black, observers=(), pacing=None, max_plies=None):
+        """
+        Initialize the runner.
+
+        Args:
+            env (ChessEnv): Environment the games are played in
+            white: Agent playing white, with
+                ``select_action(state, legal_moves, board=None)``
+            black: Agent playing black
+            observers (iterable): Observers notified of every move
+            pacing: Pacing policy (default: AsFastAsPossible)
+            max_plies (int, optional): Stop unfinished games after this many
+                plies
+        """
+        self.env = env
+        self.agents = (white, black)
+        self.observers = list(observers)
+        self.pacing = pacing if pacing is not None else AsFastAsPossible()
+        self.max_plies = max_plies
+        self._hooks = {}
+        for name in ("on_game_start", "on_move", "on_game_end", "should_stop", "close"):
+            self._hooks[name] = [getattr(observer, name) for observer in self.observers
+                                 if hasattr(observer, name)]
+
+    def _notify(self, hook, *args):
+        for callback in self._hooks[hook]:
+            callback(*args)
+
+    def _stop_requested(self):
+        return any(should_stop() for should_stop in self._hooks["should_stop"])
+
+    def play(self):
+        """
+        Play one game from the initial position.
+
+        Returns:
+            dict: winner ("white", "black" or None), plies, result (PGN
+                result string, "*" if unfinished) and stopped (True if an
+                observer ended the game early)
+        """
+        env = self.env
+        board = env.board
+        state = env.reset()
+        self._notify("on_game_start", board)
+        self.pacing.start()
+        done = False
+        stopped = False
+
+        while not done:
+            if self.max_plies is not None and len(board.move_stack) >= self.max_plies:
+                break
+            if self._stop_requested():
+                stopped = True
+                break
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            agent = self.agents[0] if board.turn == chess.WHITE else self.agents[1]
+            with section("select_action"):
+                move = agent.select_action(state, legal_moves, board=board)
+            with section("env_step"):
+                state, reward, done, info = env.step(move)
+            count("plies")
+            if "error" in info:
+                raise ValueError(f"{type(agent).__name__} chose illegal move {move} in {board.fen()}")
+            self._notify("on_move", board, move, reward, agent)
+            if not done:
+                self.pacing.wait()
+
+        winner = winner_name(board)
+        self._notify("on_game_end", board, winner)
+        return {
+            "winner": winner,
+            "plies": len(board.move_stack),
+            "result": board.result(),
+            "stopped": stopped,
+        }
+
+    def close(self):
+        """Release observer resources (windows, files)."""
+        self._notify("close")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,88 @@
+"""
+Reward functions for the chess environment.
+
+A reward function is called once per step with the environment, the move that
+was just pushed and the game outcome (``None`` while the game is running). It
+can read the material counts that ``ChessEnv`` keeps up to date incrementally,
+so no reward function needs to scan the board.
+"""
+
+import chess
+
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0
+}
+
+
+def count_material(board):
+    """
+    Count the material of both sides with a full board scan.
+
+    Args:
+        board (chess.Board): The board to count
+
+    Returns:
+        list: Material indexed by color ([black, white])
+    """
+    material = [0, 0]
+    for color in chess.COLORS:
+        for piece_type, value in PIECE_VALUES.items():
+            material[color] += value * chess.popcount(board.pieces_mask(piece_type, color))
+    return material
+
+
+class RewardFunction:
+    """Base class for pluggable reward functions."""
+
+    def reset(self, env):
+        """Called after the environment has been reset.
+
+        Args:
+            env (ChessEnv): The environment
+        """
+
+    def __call__(self, env, move, outcome):
+        """Compute the reward for the move that was just made.
+
+        Args:
+            env (ChessEnv): The environment, after the move was pushed
+            move (chess.Move): The move that was made
+            outcome (chess.Outcome): Game outcome, or None if the game is not over
+
+        Returns:
+            float: The reward value
+        """
+        raise NotImplementedError
+
+
+class OutcomeReward(RewardFunction):
+    """Sparse reward: +1 for a white win, -1 for a black win, 0 otherwise."""
+
+    def __call__(self, env, move, outcome):
+        if outcome is None or outcome.winner is None:
+            return 0.0
+        return 1.0 if outcome.winner == chess.WHITE else -1.0
+
+
+class MaterialReward(OutcomeReward):
+    """
+    Outcome reward at the end of the game, normalized material difference
+    (from white's point of view) while it is running.
+    """
+
+    def __init__(self, scale=100.0):
+        """
+        Args:
+            scale (float): Divisor applied to the material difference
+        """
+        self.scale = scale
+
+    def __call__(self, env, move, outcome):
+        if outcome is not None:
+            return super().__call__(env, move, outcome)
+        return (env.material[chess.WHITE] - env.material[chess.BLACK]) / self.scale
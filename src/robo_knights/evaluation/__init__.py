@@ -0,0 +1,18 @@
+"""
+Evaluation of trained agents: tournaments and Elo ratings.
+"""
+
+from robo_knights._lazy import lazy_exports
+
+__all__ = ['fit_elo', 'format_table', 'RandomPlayer', 'load_player', 'play_match', 'run_tournament',
+           'schedule']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'fit_elo': '.elo',
+    'format_table': '.elo',
+    'RandomPlayer': '.tournament',
+    'load_player': '.tournament',
+    'play_match': '.tournament',
+    'run_tournament': '.tournament',
+    'schedule': '.tournament',
+})
@@ -0,0 +1,113 @@
+"""
+Elo ratings from game results.
+
+Ratings are the maximum a posteriori Bradley-Terry strengths, fitted with
+minorization-maximization. A draw counts as half a win for each side and, as
+in BayesElo, a few virtual draws between every pair of opponents act as a
+prior, which keeps the ratings of unbeaten or winless players finite.
+Confidence intervals come from the Fisher information of the fit.
+"""
+
+import math
+
+import numpy as np
+
+ELO_PER_NATURAL_UNIT = 400.0 / math.log(10.0)
+
+
+def score_matrix(results, num_players):
+    """
+    Tabulate games and points per pair of players.
+
+    Args:
+        results (list): (white, black, score) tuples with player ids and the
+            white score (1, 0.5 or 0)
+        num_players (int): Number of players
+
+    Returns:
+        tuple: (games, points) arrays of shape (num_players, num_players);
+            points[i, j] is the score of i against j
+    """
+    games = np.zeros((num_players, num_players))
+    points = np.zeros((num_players, num_players))
+    for white, black, score in results:
+        games[white, black] += 1
+        games[black, white] += 1
+        points[white, black] += score
+        points[black, white] += 1.0 - score
+    return games, points
+
+
+def fit_elo(results, num_players, prior_draws=2.0, anchor=None, iterations=1000, tol=1e-10):
+    """
+    Fit Elo ratings with confidence intervals.
+
+    Args:
+        results (list): (white, black, score) tuples
+        num_players (int): Number of players
+        prior_draws (float): Virtual draws added between every pair that played
+        anchor (int, optional): Player fixed at 0 Elo (default: mean rating 0)
+        iterations (int): Maximum minorization-maximization iterations
+        tol (float): Convergence tolerance on the log-strengths
+
+    Returns:
+        tuple: (ratings, ci95), arrays of shape (num_players,) in Elo points
+    """
+    games, points = score_matrix(results, num_players)
+    played = games > 0
+    games = games + prior_draws * played
+    points = points + 0.5 * prior_draws * played
+
+    wins = points.sum(axis=1)
+    gamma = np.ones(num_players)
+    for _ in range(iterations):
+        denom = (games / (gamma[:, None] + gamma[None, :])).sum(axis=1)
+        new_gamma = np.where(denom > 0, wins / np.maximum(denom, 1e-300), gamma)
+        new_gamma /= np.exp(np.mean(np.log(new_gamma)))
+        converged = np.max(np.abs(np.log(new_gamma) - np.log(gamma))) < tol
+        gamma = new_gamma
+        if converged:
+            break
+
+    theta = np.log(gamma)
+    p = gamma[:, None] / (gamma[:, None] + gamma[None, :])
+    information = -games * p * p.T
+    np.fill_diagonal(information, 0.0)
+    np.fill_diagonal(information, -information.sum(axis=1))
+
+    if anchor is None:
+        # Gauge: mean rating 0. The pseudo-inverse projects out the common shift
+        covariance = np.linalg.pinv(information)
+    else:
+        theta = theta - theta[anchor]
+        keep = [i for i in range(num_players) if i != anchor]
+        covariance = np.zeros((num_players, num_players))
+        covariance[np.ix_(keep, keep)] = np.linalg.pinv(information[np.ix_(keep, keep)])
+
+    ratings = ELO_PER_NATURAL_UNIT * theta
+    ci95 = 1.96 * ELO_PER_NATURAL_UNIT * np.sqrt(np.maximum(np.diag(covariance), 0.0))
+    return ratings, ci95
+
+
+def format_table(names, results, ratings, ci95):
+    """
+    Render a ratings table sorted by Elo.
+
+    Args:
+        names (list): Player names
+        results (list): (white, black, score) tuples
+        ratings (numpy.ndarray): Elo ratings
+        ci95 (numpy.ndarray): 95% confidence half-widths
+
+    Returns:
+        str: The table
+    """
+    games, points = score_matrix(results, len(names))
+    width = max(len(name) for name in names)
+    lines = [f"{'#':>3} {'player':<{width}} {'elo':>7} {'95% ci':>8} {'games':>6} {'score':>6}"]
+    for rank, i in enumerate(np.argsort(-ratings), 1):
+        total = games[i].sum()
+        score = points[i].sum() / total if total else 0.0
+        lines.append(f"{rank:>3} {names[i]:<{width}} {ratings[i]:7.0f} {ci95[i]:>7.0f} "
+                     f"{int(total):6d} {score:6.1%}")
+    return "\n".join(lines)
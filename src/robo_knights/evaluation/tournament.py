@@ -0,0 +1,264 @@
+"""
+Parallel round-robin and gauntlet tournaments between agents.
+
+Players are given as model paths (checkpoints or exported models) or
+``"random"``. Games are scheduled with colours swapped between every pair and
+played headless across worker processes; each worker loads every player once
+and runs one torch thread, so the pool scales with the number of cores. With
+``serve`` a worker plays a whole chunk of games at once in threads, and the
+moves of each network player go through one ``InferenceServer`` that batches
+them into a single forward pass.
+"""
+
+import contextlib
+import itertools
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import chess
+import numpy as np
+import torch
+
+from robo_knights.agents.eval_cache import EvaluationCache
+from robo_knights.agents.inference_agent import InferenceAgent
+from robo_knights.agents.inference_server import InferenceServer
+from robo_knights.agents.mcts import MCTSAgent
+from robo_knights.environment.encoding import encode_board
+from robo_knights.evaluation.elo import fit_elo, format_table
+
+RANDOM_PLAYER = "random"
+
+# Players loaded by the current worker process, keyed by spec
+_players = {}
+_player_options = {}
+
+
+class RandomPlayer:
+    """Agent that plays a uniformly random legal move."""
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed):
+        self.rng = random.Random(seed)
+
+    def select_action(self, state, legal_moves, board=None):
+        return self.rng.choice(list(legal_moves))
+
+
+def player_name(spec):
+    """Short display name of a player spec."""
+    return spec if spec == RANDOM_PLAYER else os.path.splitext(os.path.basename(spec))[0]
+
+
+def load_player(spec, agent="policy", simulations=200, quantize=False, seed=None):
+    """
+    Create an agent from a player spec.
+
+    Args:
+        spec (str): ``"random"`` or a model path
+        agent (str): "policy" samples from the network, "mcts" searches
+        simulations (int): Search simulations per move (``agent="mcts"``)
+        quantize (bool): Store the policy head rows as int8
+        seed (int, optional): Seed for move sampling
+
+    Returns:
+        Agent with ``select_action(state, legal_moves, board=None)`` and
+            ``reseed(seed)``
+    """
+    if spec == RANDOM_PLAYER:
+        return RandomPlayer(seed)
+    if agent == "mcts":
+        return MCTSAgent.load(spec, quantize=quantize, cache=EvaluationCache(),
+                              simulations=simulations, seed=seed)
+    return InferenceAgent.load(spec, quantize=quantize, cache=EvaluationCache(), seed=seed)
+
+
+def schedule(num_players, games_per_pair, mode="round-robin"):
+    """
+    List the pairings of a tournament.
+
+    Args:
+        num_players (int): Number of players
+        games_per_pair (int): Games per pairing; colours alternate, so an even
+            number gives each side the same number of whites
+        mode (str): "round-robin" (every pair) or "gauntlet" (player 0 against
+            every other player)
+
+    Returns:
+        list: (white, black) player id tuples
+    """
+    if mode == "round-robin":
+        pairs = itertools.combinations(range(num_players), 2)
+    elif mode == "gauntlet":
+        pairs = ((0, j) for j in range(1, num_players))
+    else:
+        raise ValueError(f"Unknown schedule {mode!r}; expected 'round-robin' or 'gauntlet'")
+    games = []
+    for i, j in pairs:
+        for game in range(games_per_pair):
+            games.append((i, j) if game % 2 == 0 else (j, i))
+    return games
+
+
+def play_match(white, black, max_plies=400):
+    """
+    Play one headless game.
+
+    Args:
+        white: Agent playing white
+        black: Agent playing black
+        max_plies (int): Adjudicate the game as a draw after this many plies
+
+    Returns:
+        tuple: (white_score, plies) with white_score 1, 0.5 or 0
+    """
+    board = chess.Board()
+    state = np.empty((8, 8, 12), dtype=np.float32)
+    while len(board.move_stack) < max_plies:
+        outcome = board.outcome()
+        if outcome is not None:
+            if outcome.winner is None:
+                return 0.5, len(board.move_stack)
+            return (1.0 if outcome.winner == chess.WHITE else 0.0), len(board.move_stack)
+        agent = white if board.turn == chess.WHITE else black
+        move = agent.select_action(encode_board(board, out=state), list(board.legal_moves), board=board)
+        board.push(move)
+    return 0.5, len(board.move_stack)
+
+
+def _init_worker(specs, options):
+    torch.set_num_threads(1)
+    _players.clear()
+    _player_options.update(options, specs=specs)
+
+
+def _worker_player(player_id, seed):
+    """The worker's cached agent for a player, reseeded for the next game."""
+    spec = _player_options["specs"][player_id]
+    if spec not in _players:
+        options = {k: v for k, v in _player_options.items() if k != "specs"}
+        _players[spec] = load_player(spec, **options)
+    # Agents keep their own generators, so the global seeds alone do not fix their moves
+    _players[spec].reseed(seed)
+    return _players[spec]
+
+
+def _play_games(games, max_plies, seed):
+    """Worker task: play a chunk of scheduled games."""
+    results = []
+    for offset, (white, black) in enumerate(games):
+        # Every game has its own seed, whichever worker and chunk plays it
+        game_seed = seed + offset
+        random.seed(game_seed)
+        torch.manual_seed(game_seed)
+        score, plies = play_match(_worker_player(white, 2 * game_seed),
+                                  _worker_player(black, 2 * game_seed + 1), max_plies)
+        results.append((white, black, score, plies))
+    return results
+
+
+def _play_served_games(games, max_plies, seed):
+    """Worker task: play a chunk of games at once, batching each network player's moves."""
+    random.seed(seed)
+    torch.manual_seed(seed)
+    with contextlib.ExitStack() as stack:
+        agents = {}
+        for player_id in sorted({player for game in games for player in game}):
+            agent = _worker_player(player_id, seed + player_id)
+            if isinstance(agent, InferenceAgent):
+                if agent.backend != "torch":
+                    raise ValueError("Serving needs torch models; ONNX players cannot be served")
+                server = InferenceServer(agent.scorer, max_batch_size=len(games), cache=agent.cache)
+                agent = stack.enter_context(server).client()
+            agents[player_id] = agent
+        with ThreadPoolExecutor(len(games)) as executor:
+            futures = [executor.submit(play_match, agents[white], agents[black], max_plies)
+                       for white, black in games]
+            return [(white, black, *future.result())
+                    for (white, black), future in zip(games, futures)]
+
+
+def run_tournament(specs, games_per_pair=20, mode="round-robin", workers=None, max_plies=400,
+                   agent="policy", simulations=200, quantize=False, seed=0, anchor=None,
+                   chunk_size=4, verbose=True, serve=False):
+    """
+    Play a tournament and rate the players.
+
+    Args:
+        specs (list): Model paths and/or ``"random"``
+        games_per_pair (int): Games per pairing, colours alternating
+        mode (str): "round-robin" or "gauntlet" (first player against the rest)
+        workers (int, optional): Worker processes (default: CPU count; 0 plays
+            in this process)
+        max_plies (int): Adjudicate games as draws after this many plies
+        agent (str): "policy" or "mcts" for the network players
+        simulations (int): Search simulations per move for "mcts"
+        quantize (bool): Store the policy head rows as int8
+        seed (int): Base random seed
+        anchor (str, optional): Spec of the player rated 0 Elo (default: the
+            random player if present, otherwise the mean is 0)
+        chunk_size (int): Games per worker task
+        verbose (bool): Print progress and the final table
+        serve (bool): Play the games of a task concurrently, each network
+            player answering through a batched InferenceServer; the moves then
+            depend on thread timing, so results are not reproducible from ``seed``
+
+    Returns:
+        dict: names, results ((white, black, score, plies) tuples), ratings,
+            ci95, games_per_sec and the formatted table
+    """
+    if len(specs) < 2:
+        raise ValueError("A tournament needs at least two players")
+    if serve and agent == "mcts":
+        raise ValueError("Search agents batch their own evaluations and cannot be served")
+    options = {"agent": agent, "simulations": simulations, "quantize": quantize}
+    pairings = schedule(len(specs), games_per_pair, mode)
+    # Shuffle so that every chunk mixes pairings and workers finish together
+    random.Random(seed).shuffle(pairings)
+    chunks = [pairings[i:i + chunk_size] for i in range(0, len(pairings), chunk_size)]
+    workers = os.cpu_count() if workers is None else workers
+
+    play_games = _play_served_games if serve else _play_games
+
+    start = time.perf_counter()
+    results = []
+    if workers == 0:
+        _init_worker(specs, options)
+        for index, chunk in enumerate(chunks):
+            results.extend(play_games(chunk, max_plies, seed + index * chunk_size))
+    else:
+        context = mp.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(specs, options)) as pool:
+            futures = [pool.submit(play_games, chunk, max_plies, seed + index * chunk_size)
+                       for index, chunk in enumerate(chunks)]
+            report_every = max(len(pairings) // 10, 1)
+            next_report = report_every
+            for future in futures:
+                results.extend(future.result())
+                if verbose and len(results) >= next_report:
+                    print(f"{len(results)}/{len(pairings)} games played")
+                    next_report += report_every
+    elapsed = time.perf_counter() - start
+
+    if anchor is None and RANDOM_PLAYER in specs:
+        anchor = RANDOM_PLAYER
+    anchor_id = specs.index(anchor) if anchor is not None else None
+    scores = [(white, black, score) for white, black, score, _ in results]
+    ratings, ci95 = fit_elo(scores, len(specs), anchor=anchor_id)
+    names = [player_name(spec) for spec in specs]
+    table = format_table(names, scores, ratings, ci95)
+    if verbose:
+        print(table)
+        print(f"{len(results)} games in {elapsed:.1f}s ({len(results) / elapsed:.1f} games/s)")
+    return {
+        "names": names,
+        "results": results,
+        "ratings": ratings,
+        "ci95": ci95,
+        "games_per_sec": len(results) / elapsed,
+        "table": table,
+    }
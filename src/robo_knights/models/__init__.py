@@ -1,3 +1,17 @@
 from .actor_critic import ActorCriticNetwork
+from .residual import ResidualTrunk
+from .compression import compress_network, compare_policies, prune_policy_head, quantize_network
+from .policy_heads import DensePolicyHead, BilinearPolicyHead, CompactPolicyHead, build_policy_head
 
-__all__ = ["ActorCriticNetwork"] 
\ No newline at end of file
+__all__ = [
+    "ActorCriticNetwork",
+    "DensePolicyHead",
+    "BilinearPolicyHead",
+    "CompactPolicyHead",
+    "build_policy_head",
+    "ResidualTrunk",
+    "compress_network",
+    "compare_policies",
+    "prune_policy_head",
+    "quantize_network",
+]
\ No newline at end of file
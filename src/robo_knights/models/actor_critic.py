@@ -7,13 +7,17 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from robo_knights.models.policy_heads import build_policy_head
+from robo_knights.models.residual import ResidualTrunk
+
 class ActorCriticNetwork(nn.Module):
     """
     A single network that outputs:
       - A policy (move distribution) over all possible moves
       - A value estimate (scalar)
     """
-    def __init__(self, input_size=8*8*12, hidden_size=128, output_size=64*64*5):
+    def __init__(self, input_size=8*8*12, hidden_size=128, output_size=64*64*5,
+                 policy_head="dense", policy_dim=16, trunk="mlp", channels=64, blocks=4):
         """
         Initialize the actor-critic network.
         
@@ -21,31 +25,121 @@ class ActorCriticNetwork(nn.Module):
             input_size (int): Size of the input state (default: 8*8*12 for chess board)
             hidden_size (int): Size of the hidden layers
             output_size (int): Size of the policy output (default: 64*64*5 for all possible moves)
+            policy_head (str): "dense" (one row per move index), "bilinear"
+                (from-square x to-square factorization) or "compact" (one row per
+                geometrically possible move)
+            policy_dim (int): Embedding size of the bilinear policy head
+            trunk (str): "mlp" (two fully connected layers on the flattened
+                board) or "resnet" (residual CNN on the (N, 12, 8, 8) planes)
+            channels (int): Width of the residual trunk
+            blocks (int): Number of residual blocks
         """
         super(ActorCriticNetwork, self).__init__()
-        self.fc1 = nn.Linear(input_size, hidden_size)
-        self.fc2 = nn.Linear(hidden_size, hidden_size)
+        # Everything needed to rebuild the network, stored with checkpoints
+        self.config = {
+            "input_size": input_size,
+            "hidden_size": hidden_size,
+            "output_size": output_size,
+            "policy_head": policy_head,
+            "policy_dim": policy_dim,
+            "trunk": trunk,
+            "channels": channels,
+            "blocks": blocks,
+        }
+        
+        # Shared trunk; the MLP keeps its fc1/fc2 names for older checkpoints
+        if trunk == "mlp":
+            self.fc1 = nn.Linear(input_size, hidden_size)
+            self.fc2 = nn.Linear(hidden_size, hidden_size)
+            self.trunk = None
+        elif trunk == "resnet":
+            self.trunk = ResidualTrunk(hidden_size, channels, blocks)
+        else:
+            raise ValueError(f"Unknown trunk {trunk!r}; expected 'mlp' or 'resnet'")
         
         # Actor head (policy)
-        self.policy_head = nn.Linear(hidden_size, output_size)
+        self.policy_head = build_policy_head(policy_head, hidden_size, output_size, policy_dim)
         
         # Critic head (value)
         self.value_head = nn.Linear(hidden_size, 1)
     
-    def forward(self, x):
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a network from a ``config`` dict saved with a checkpoint.
+        
+        Args:
+            config (dict): Constructor arguments
+        
+        Returns:
+            ActorCriticNetwork: A freshly initialized network
+        """
+        return cls(**config)
+    
+    @classmethod
+    def from_state_dict(cls, config, state_dict):
+        """
+        Build a network around loaded weights without initializing it first.
+        
+        The layers are created on the meta device, which allocates nothing,
+        and the tensors of ``state_dict`` are then assigned to them as they
+        are. Weights loaded with ``torch.load(mmap=True)`` therefore stay
+        memory-mapped instead of being copied into fresh parameters.
+        
+        Args:
+            config (dict): Constructor arguments
+            state_dict (dict): Complete state dict of a network with that config
+        
+        Returns:
+            ActorCriticNetwork: The network, sharing the state dict's tensors
+        """
+        with torch.device("meta"):
+            model = cls.from_config(config)
+        model.load_state_dict(state_dict, assign=True)
+        return model
+    
+    def forward(self, x, move_indices=None):
         """
         Forward pass through the network.
         
         Args:
             x (torch.Tensor): Input state tensor
-            
+            move_indices (torch.Tensor, optional): If given, only these move
+                indices are scored: shape (K,) for the whole batch or (B, K)
+                per position
+        
         Returns:
-            tuple: (policy_logits, value)
+            tuple: (policy_logits, value), policy_logits of shape (B, 64*64*5)
+                or (B, K) when move_indices is given
         """
-        x = x.view(-1, 8*8*12)  # Flatten the input
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
+        if self.trunk is None:
+            x = x.view(-1, 8*8*12)  # Flatten the input
+            x = F.relu(self.fc1(x))
+            x = F.relu(self.fc2(x))
+        else:
+            x = self.trunk(x)
         
-        policy_logits = self.policy_head(x)
+        if move_indices is None:
+            policy_logits = self.policy_head(x)
+        else:
+            policy_logits = self.policy_head.score(x, move_indices)
         value = self.value_head(x)
-        return policy_logits, value 
\ No newline at end of file
+        return policy_logits, value
+    
+    def optimize_for_inference(self):
+        """
+        Prepare the network for CPU inference, in place.
+        
+        Switches to eval mode and, for the residual trunk, folds the
+        per-channel scales and shifts into the convolutions and moves the weights to channels_last. The
+        fused network has a different state dict, so save checkpoints before
+        calling this.
+        
+        Returns:
+            ActorCriticNetwork: self
+        """
+        self.eval()
+        if self.trunk is not None:
+            self.trunk.fuse()
+            self.trunk.to(memory_format=torch.channels_last)
+        return self
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Post-training compression of ActorCriticNetwork.
+
+Two independent steps, both returning a compressed copy:
+
+- ``prune_policy_head`` drops the policy rows of move indices that can never
+  be legal (from == to, non-queen/rook/bishop/knight geometry, promotions off
+  the last rank), turning the 20480-row dense head into the 1968-row compact
+  head. Legal moves score exactly as before.
+- ``quantize_network`` stores the policy rows as int8 with one scale per row
+  (dequantized only for the rows being scored) and can also apply dynamic
+  int8 quantization to the trunk and value head. The latter pays off for
+  batched evaluation; for single positions on CPU its per-call overhead
+  outweighs the small trunk matmuls, so it is off by default.
+
+``compare_policies`` checks a compressed network against the float original.
+"""
+
+import copy
+import io
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from robo_knights.environment.encoding import encode_boards
+from robo_knights.models.policy_heads import CompactPolicyHead, DensePolicyHead
+from robo_knights.utils.move_encoding import NUM_MOVES, legal_indices
+
+
+class Int8RowPolicyHead(nn.Module):
+    """
+    Dense or compact policy head with int8 weight rows.
+    
+    Each row is quantized symmetrically with its own scale, so a gathered
+    row costs one int8 read plus one multiply to dequantize.
+    """
+    def __init__(self, head):
+        """
+        Args:
+            head (DensePolicyHead or CompactPolicyHead): Trained float head
+        """
+        super(Int8RowPolicyHead, self).__init__()
+        linear = head.linear if isinstance(head, CompactPolicyHead) else head
+        weight = linear.weight.detach().float()
+        scale = weight.abs().amax(dim=1).clamp(min=1e-12) / 127.0
+        self.register_buffer("weight_int8", torch.round(weight / scale.unsqueeze(1)).to(torch.int8))
+        self.register_buffer("scale", scale)
+        self.register_buffer("bias", linear.bias.detach().float().clone())
+        
+        if isinstance(head, CompactPolicyHead):
+            self.register_buffer("candidates", head.candidates.clone())
+            self.register_buffer("slot_of_move", head.slot_of_move.clone())
+        else:
+            self.candidates = None
+            self.slot_of_move = None
+    
+    def _rows(self, slots):
+        return self.weight_int8[slots].float() * self.scale[slots].unsqueeze(-1)
+    
+    def forward(self, x):
+        weight = self.weight_int8.float() * self.scale.unsqueeze(1)
+        logits = F.linear(x, weight, self.bias)
+        if self.candidates is None:
+            return logits
+        full = x.new_full((x.shape[0], NUM_MOVES), float("-inf"))
+        full[:, self.candidates] = logits
+        return full
+    
+    def score(self, x, indices):
+        """See DensePolicyHead.score."""
+        slots = torch.as_tensor(indices, dtype=torch.long, device=x.device)
+        if self.slot_of_move is not None:
+            slots = self.slot_of_move[slots]
+        if slots.dim() == 1:
+            return F.linear(x, self._rows(slots), self.bias[slots])
+        return torch.bmm(self._rows(slots), x.unsqueeze(2)).squeeze(2) + self.bias[slots]
+
+
+def prune_policy_head(model):
+    """
+    Copy a network with its dense policy head pruned to the compact head.
+    
+    Args:
+        model (ActorCriticNetwork): Network with a dense policy head
+    
+    Returns:
+        ActorCriticNetwork: Copy with ``policy_head="compact"``; scores of legal
+            moves are unchanged
+    """
+    if not isinstance(model.policy_head, DensePolicyHead):
+        raise ValueError("Only a dense policy head can be pruned to the compact head")
+    pruned = copy.deepcopy(model)
+    dense = pruned.policy_head
+    compact = CompactPolicyHead(dense.in_features).to(dense.weight.device)
+    with torch.no_grad():
+        compact.linear.weight.copy_(dense.weight[compact.candidates])
+        compact.linear.bias.copy_(dense.bias[compact.candidates])
+    pruned.policy_head = compact
+    pruned.config = dict(model.config, policy_head="compact")
+    return pruned
+
+
+def quantize_dynamic(model):
+    """
+    Dynamic int8 quantization of the network's Linear layers.
+    
+    Policy head rows that are gathered per move (dense and compact heads)
+    stay in float, since only the legal rows are ever read from them.
+    
+    Args:
+        model (ActorCriticNetwork): Network in eval mode
+    
+    Returns:
+        ActorCriticNetwork: A quantized copy
+    """
+    gathered = set()
+    for name, module in model.named_modules():
+        if isinstance(module, DensePolicyHead):
+            gathered.add(name)
+        elif isinstance(module, CompactPolicyHead):
+            gathered.add(f"{name}.linear")
+    targets = {name for name, module in model.named_modules()
+               if type(module) is nn.Linear and name not in gathered}
+    return torch.ao.quantization.quantize_dynamic(model, targets, dtype=torch.qint8)
+
+
+def quantize_network(model, quantize_trunk=False):
+    """
+    Copy a network with int8 policy rows.
+    
+    The bilinear head has no per-move rows; it is only quantized (dynamically,
+    like the trunk) when ``quantize_trunk`` is set. The result is an
+    inference-only eval-mode network.
+    
+    Args:
+        model (ActorCriticNetwork): Trained float network
+        quantize_trunk (bool): Also apply dynamic int8 quantization to the
+            remaining Linear layers
+    
+    Returns:
+        ActorCriticNetwork: The quantized copy
+    """
+    quantized = copy.deepcopy(model).cpu().optimize_for_inference()
+    if isinstance(quantized.policy_head, (DensePolicyHead, CompactPolicyHead)):
+        quantized.policy_head = Int8RowPolicyHead(quantized.policy_head)
+    if quantize_trunk:
+        quantized = quantize_dynamic(quantized)
+    return quantized
+
+
+def compress_network(model, prune=True, quantize=True, quantize_trunk=False):
+    """
+    Apply the selected compression steps to a trained network.
+    
+    Args:
+        model (ActorCriticNetwork): Trained float network
+        prune (bool): Prune a dense policy head to the compact head
+        quantize (bool): Store the policy rows as int8
+        quantize_trunk (bool): Also quantize the trunk dynamically (needs ``quantize``)
+    
+    Returns:
+        ActorCriticNetwork: Compressed eval-mode copy
+    """
+    if prune and isinstance(model.policy_head, DensePolicyHead):
+        model = prune_policy_head(model)
+    if quantize:
+        return quantize_network(model, quantize_trunk)
+    return copy.deepcopy(model).cpu().optimize_for_inference()
+
+
+def model_size_bytes(model):
+    """
+    Size of a network's serialized state dict.
+    
+    Args:
+        model (nn.Module): The network
+    
+    Returns:
+        int: Number of bytes written by torch.save
+    """
+    stream = io.BytesIO()
+    torch.save(model.state_dict(), stream)
+    return stream.tell()
+
+
+def compare_policies(reference, candidate, boards):
+    """
+    Compare the legal-move policies of two networks on a set of positions.
+    
+    Args:
+        reference (ActorCriticNetwork): Float network
+        candidate (ActorCriticNetwork): Compressed network
+        boards (list): chess.Board positions, each with at least one legal move
+    
+    Returns:
+        dict: Mean ``kl`` (reference || candidate) over the legal moves,
+            ``top1`` agreement rate and ``max_value_error``
+    """
+    states = torch.from_numpy(encode_boards(boards)).reshape(len(boards), -1)
+    kls, agree, value_error = [], 0, 0.0
+    reference_mode = reference.training
+    reference.eval()
+    try:
+        with torch.inference_mode():
+            for i, board in enumerate(boards):
+                indices = torch.from_numpy(legal_indices(board))
+                ref_logits, ref_value = reference(states[i:i + 1], indices)
+                cand_logits, cand_value = candidate(states[i:i + 1], indices)
+                ref_log_probs = F.log_softmax(ref_logits[0], dim=0)
+                cand_log_probs = F.log_softmax(cand_logits[0], dim=0)
+                kls.append((ref_log_probs.exp() * (ref_log_probs - cand_log_probs)).sum().item())
+                agree += int(ref_logits[0].argmax() == cand_logits[0].argmax())
+                value_error = max(value_error, (ref_value - cand_value).abs().item())
+    finally:
+        reference.train(reference_mode)
+    return {"kl": float(np.mean(kls)), "top1": agree / len(boards), "max_value_error": value_error}
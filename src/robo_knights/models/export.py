@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Export of trained networks for inference-only play.
+
+``export_model`` writes an ActorCriticNetwork as a TorchScript archive
+(``.pt``) or an ONNX graph (``.onnx``). Both take a batch of flat states and a
+(B, K) tensor of legal move indices and return ``(legal_logits, value)``, so
+the exported graph only ever scores the legal moves.
+
+``.rkw`` files instead hold the weights of the network as prepared for
+inference (pruned, fused and optionally int8). ``load_inference_weights``
+memory-maps them and builds the network around the mapped tensors without
+copying, so processes loading the same file share its physical pages. Files
+are written through ``save_atomic``, because overwriting a mapped file in
+place would truncate it under the processes still reading it.
+
+ONNX export and quantization need the optional ``onnx`` and ``onnxruntime``
+packages (``pip install robo-knights[onnx]``).
+"""
+
+import os
+import warnings
+
+import torch
+import torch.nn as nn
+
+from robo_knights.models.actor_critic import ActorCriticNetwork
+from robo_knights.models.compression import Int8RowPolicyHead, compress_network
+from robo_knights.utils.move_encoding import candidate_move_indices
+
+
+class ScoringModule(nn.Module):
+    """Fixed-signature wrapper around ActorCriticNetwork used for export."""
+    def __init__(self, model):
+        super(ScoringModule, self).__init__()
+        self.model = model
+    
+    def forward(self, states, move_indices):
+        """
+        Args:
+            states (torch.Tensor): Flat states of shape (B, 768)
+            move_indices (torch.Tensor): Legal move indices of shape (B, K)
+        
+        Returns:
+            tuple: (legal_logits of shape (B, K), value of shape (B, 1))
+        """
+        return self.model(states, move_indices)
+
+
+def save_atomic(obj, path):
+    """
+    ``torch.save`` through a temporary file renamed over ``path``.
+    
+    Networks loaded from ``path`` may still be backed by a memory mapping of
+    it; the rename leaves their file intact instead of truncating it.
+    
+    Args:
+        obj: Object to save
+        path (str): Output path
+    """
+    tmp = f"{path}.tmp"
+    torch.save(obj, tmp)
+    os.replace(tmp, path)
+
+
+def load_network(path, map_location="cpu", copy=False):
+    """
+    Build an ActorCriticNetwork from a ``ChessAgent.save_model`` checkpoint.
+    
+    Args:
+        path (str): Checkpoint path; plain state dicts of the default network
+            are accepted too
+        map_location: Passed to torch.load
+        copy (bool): Copy the weights into memory instead of leaving them
+            mapped from the file, for networks that will be trained
+    
+    Returns:
+        ActorCriticNetwork: The network with the checkpoint's weights
+    """
+    # Memory-mapped and assigned without a throwaway random init
+    checkpoint = torch.load(path, map_location=map_location, mmap=True, weights_only=True)
+    if "state_dict" in checkpoint:
+        config, state_dict = checkpoint["config"], checkpoint["state_dict"]
+    else:
+        config, state_dict = {}, checkpoint
+    if copy:
+        state_dict = {key: value.clone() for key, value in state_dict.items()}
+    return ActorCriticNetwork.from_state_dict(config, state_dict)
+
+
+def prepare_for_inference(model, quantize=False, quantize_trunk=False):
+    """
+    Copy a network and optimize the copy for CPU inference.
+    
+    A dense policy head is pruned to the compact head, which leaves the
+    scores of all legal moves unchanged.
+    
+    Args:
+        model (ActorCriticNetwork): Trained network (left untouched)
+        quantize (bool): Store the policy head rows as int8
+        quantize_trunk (bool): Also apply dynamic int8 quantization to the
+            trunk and value head (implies ``quantize``)
+    
+    Returns:
+        ActorCriticNetwork: Eval-mode copy with fused convolutions, a pruned policy
+            head and, if requested, int8 policy rows and an int8 trunk
+    """
+    model = compress_network(model, prune=True, quantize=quantize or quantize_trunk,
+                             quantize_trunk=quantize_trunk)
+    for param in model.parameters():
+        param.requires_grad_(False)
+    return model
+
+
+def save_inference_weights(model, path, quantize=False):
+    """
+    Save the weights of the network as prepared for inference.
+    
+    Args:
+        model (ActorCriticNetwork): Trained network
+        path (str): Output path, conventionally ``.rkw``
+        quantize (bool): Store the policy head rows as int8
+    """
+    prepared = prepare_for_inference(model, quantize)
+    save_atomic({
+        "config": prepared.config,
+        "int8_policy": isinstance(prepared.policy_head, Int8RowPolicyHead),
+        "state_dict": prepared.state_dict(),
+    }, path)
+
+
+def load_inference_weights(path):
+    """
+    Memory-map a ``save_inference_weights`` file as an inference network.
+    
+    The tensors are mapped copy-on-write and assigned to the network as they
+    are, so nothing is read until it is used and every process that loads
+    the same file shares the same physical pages.
+    
+    Args:
+        path (str): ``.rkw`` file
+    
+    Returns:
+        ActorCriticNetwork: Eval-mode network without gradients
+    """
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    # The same structure prepare_for_inference produced, with no storage behind it
+    with torch.device("meta"):
+        model = ActorCriticNetwork.from_config(checkpoint["config"]).optimize_for_inference()
+        if checkpoint["int8_policy"]:
+            model.policy_head = Int8RowPolicyHead(model.policy_head)
+    model.load_state_dict(checkpoint["state_dict"], assign=True)
+    for param in model.parameters():
+        param.requires_grad_(False)
+    return model
+
+
+def _example_inputs(batch=2, num_legal=20):
+    # Real move indices, since the compact head rejects impossible moves
+    states = torch.zeros(batch, 8 * 8 * 12)
+    candidates = torch.from_numpy(candidate_move_indices()[:num_legal].copy())
+    return states, candidates.repeat(batch, 1)
+
+
+def export_torchscript(model, path, quantize=False, quantize_trunk=False):
+    """
+    Trace the network into a frozen TorchScript archive.
+    
+    Args:
+        model (ActorCriticNetwork): Trained network
+        path (str): Output path, conventionally ``.pt``
+        quantize (bool): Store the policy head rows as int8
+        quantize_trunk (bool): Also quantize the trunk and value head
+            dynamically (implies ``quantize``)
+    """
+    module = ScoringModule(prepare_for_inference(model, quantize, quantize_trunk)).eval()
+    with torch.no_grad(), warnings.catch_warnings():
+        # Shape-dependent Python branches are fixed to the (B, K) index path
+        warnings.simplefilter("ignore", torch.jit.TracerWarning)
+        traced = torch.jit.trace(module, _example_inputs(), check_trace=False)
+        traced = torch.jit.freeze(traced)
+    traced.save(path)
+
+
+def export_onnx(model, path, quantize=False, opset_version=17):
+    """
+    Export the network as an ONNX graph with dynamic batch and move dimensions.
+    
+    Args:
+        model (ActorCriticNetwork): Trained network
+        path (str): Output path, conventionally ``.onnx``
+        quantize (bool): Quantize the exported graph with onnxruntime's
+            dynamic int8 quantization
+        opset_version (int): ONNX opset
+    """
+    try:
+        import onnx  # noqa: F401  (needed by the exporter)
+    except ImportError as e:
+        raise ImportError("ONNX export needs the 'onnx' package: pip install robo-knights[onnx]") from e
+    
+    module = ScoringModule(prepare_for_inference(model)).eval()
+    target = path + ".fp32" if quantize else path
+    torch.onnx.export(
+        module, _example_inputs(), target,
+        input_names=["states", "move_indices"],
+        output_names=["legal_logits", "value"],
+        dynamic_axes={
+            "states": {0: "batch"},
+            "move_indices": {0: "batch", 1: "moves"},
+            "legal_logits": {0: "batch", 1: "moves"},
+            "value": {0: "batch"},
+        },
+        opset_version=opset_version,
+    )
+    
+    if quantize:
+        try:
+            from onnxruntime.quantization import QuantType
+            from onnxruntime.quantization import quantize_dynamic as ort_quantize_dynamic
+        except ImportError as e:
+            os.remove(target)
+            raise ImportError("ONNX quantization needs 'onnxruntime': pip install robo-knights[onnx]") from e
+        ort_quantize_dynamic(target, path, weight_type=QuantType.QInt8)
+        os.remove(target)
+
+
+def export_model(model, path, quantize=False, quantize_trunk=False):
+    """
+    Export a network in the format given by the file extension.
+    
+    Args:
+        model (ActorCriticNetwork): Trained network
+        path (str): ``.onnx`` for ONNX, ``.rkw`` for memory-mappable
+            inference weights, anything else for TorchScript
+        quantize (bool): Apply int8 quantization (for ``.pt`` and ``.rkw`` only
+            to the policy head rows, for ONNX to the whole graph)
+        quantize_trunk (bool): Also quantize the trunk and value head of a
+            TorchScript export dynamically; ONNX quantization already covers
+            them, and ``.rkw`` files cannot hold dynamically quantized layers
+    
+    Raises:
+        ValueError: If ``quantize_trunk`` is requested for ``.rkw``
+    """
+    if path.endswith(".onnx"):
+        export_onnx(model, path, quantize or quantize_trunk)
+    elif path.endswith(".rkw"):
+        if quantize_trunk:
+            raise ValueError("Memory-mapped .rkw weights keep the trunk in float; "
+                             "export to .pt or .onnx to quantize it")
+        save_inference_weights(model, path, quantize)
+    else:
+        export_torchscript(model, path, quantize, quantize_trunk)
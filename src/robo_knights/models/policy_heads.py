@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Policy heads for the actor-critic network.
+
+Every head maps trunk features of shape (B, hidden) to move logits in the
+64*64*5 move-index space. ``forward`` returns the full (B, 20480) logits;
+``score`` only evaluates the requested move indices, which is what action
+selection needs since only a few dozen moves are legal in any position.
+"""
+
+import math
+
+import torch
+import torch.nn as nn
+
+from robo_knights.utils.move_encoding import (
+    NUM_MOVES, INDEX_TO_FROM, INDEX_TO_TO, INDEX_TO_PROMO, candidate_move_indices
+)
+
+
+def _as_index_tensor(indices, device):
+    return torch.as_tensor(indices, dtype=torch.long, device=device)
+
+
+class DensePolicyHead(nn.Linear):
+    """
+    The original dense head: one output row per move index.
+    
+    Subclasses nn.Linear so that its parameters keep the ``policy_head.weight``
+    and ``policy_head.bias`` names of existing checkpoints.
+    """
+    def __init__(self, hidden_size, num_moves=NUM_MOVES):
+        super(DensePolicyHead, self).__init__(hidden_size, num_moves)
+    
+    def score(self, x, indices):
+        """
+        Logits of selected moves only.
+        
+        Args:
+            x (torch.Tensor): Features of shape (B, hidden)
+            indices (torch.Tensor): Move indices of shape (K,) shared by the batch,
+                or (B, K) per row
+        
+        Returns:
+            torch.Tensor: Logits of shape (B, K)
+        """
+        indices = _as_index_tensor(indices, x.device)
+        if indices.dim() == 1:
+            return nn.functional.linear(x, self.weight[indices], self.bias[indices])
+        weight = self.weight[indices]
+        return torch.bmm(weight, x.unsqueeze(2)).squeeze(2) + self.bias[indices]
+
+
+class BilinearPolicyHead(nn.Module):
+    """
+    Factorized head: logit(from, to, promo) = <e_from, e_to + e_promo> / sqrt(dim).
+    
+    The features are projected to a ``dim``-sized embedding per from-square,
+    per to-square and per promotion type, so the parameter count grows with
+    64 * dim instead of 20480.
+    """
+    def __init__(self, hidden_size, dim=16):
+        """
+        Args:
+            hidden_size (int): Size of the trunk features
+            dim (int): Embedding size per square
+        """
+        super(BilinearPolicyHead, self).__init__()
+        self.dim = dim
+        self.from_proj = nn.Linear(hidden_size, 64 * dim)
+        self.to_proj = nn.Linear(hidden_size, 64 * dim)
+        self.promo_embedding = nn.Parameter(torch.zeros(5, dim))
+        self.scale = 1.0 / math.sqrt(dim)
+        
+        self.register_buffer("index_from", torch.from_numpy(INDEX_TO_FROM.copy()), persistent=False)
+        self.register_buffer("index_to", torch.from_numpy(INDEX_TO_TO.copy()), persistent=False)
+        self.register_buffer("index_promo", torch.from_numpy(INDEX_TO_PROMO.copy()), persistent=False)
+    
+    def _embeddings(self, x):
+        batch = x.shape[0]
+        from_emb = self.from_proj(x).view(batch, 64, self.dim)
+        to_emb = self.to_proj(x).view(batch, 64, self.dim)
+        return from_emb, to_emb
+    
+    def forward(self, x):
+        from_emb, to_emb = self._embeddings(x)
+        # (B, 64, 1, 1, d) x (B, 1, 64, 5, d) -> (B, 64, 64, 5)
+        target = to_emb.unsqueeze(2) + self.promo_embedding
+        logits = torch.einsum("bfd,btpd->bftp", from_emb, target) * self.scale
+        return logits.reshape(x.shape[0], NUM_MOVES)
+    
+    def score(self, x, indices):
+        """See DensePolicyHead.score."""
+        indices = _as_index_tensor(indices, x.device)
+        from_emb, to_emb = self._embeddings(x)
+        from_sq = self.index_from[indices]
+        to_sq = self.index_to[indices]
+        promo = self.promo_embedding[self.index_promo[indices]]
+        if indices.dim() == 1:
+            f = from_emb[:, from_sq]
+            t = to_emb[:, to_sq] + promo
+        else:
+            rows = torch.arange(x.shape[0], device=x.device).unsqueeze(1)
+            f = from_emb[rows, from_sq]
+            t = to_emb[rows, to_sq] + promo
+        return (f * t).sum(dim=-1) * self.scale
+
+
+class CompactPolicyHead(nn.Module):
+    """
+    Head with one output row per geometrically possible move (~1968 rows).
+    
+    Move indices that can never be legal get a logit of -inf in the full
+    output and are never scored.
+    """
+    def __init__(self, hidden_size):
+        super(CompactPolicyHead, self).__init__()
+        candidates = torch.from_numpy(candidate_move_indices().copy())
+        self.linear = nn.Linear(hidden_size, len(candidates))
+        
+        # Built on the CPU like the tables, also when the layers are created on the meta device
+        slot_of_move = torch.full((NUM_MOVES,), -1, dtype=torch.long, device=candidates.device)
+        slot_of_move[candidates] = torch.arange(len(candidates), device=candidates.device)
+        self.register_buffer("candidates", candidates, persistent=False)
+        self.register_buffer("slot_of_move", slot_of_move, persistent=False)
+    
+    def forward(self, x):
+        logits = x.new_full((x.shape[0], NUM_MOVES), float("-inf"))
+        logits[:, self.candidates] = self.linear(x)
+        return logits
+    
+    def score(self, x, indices):
+        """See DensePolicyHead.score."""
+        slots = self.slot_of_move[_as_index_tensor(indices, x.device)]
+        if (slots < 0).any():
+            raise ValueError("Requested a move index that can never be legal")
+        if slots.dim() == 1:
+            return nn.functional.linear(x, self.linear.weight[slots], self.linear.bias[slots])
+        weight = self.linear.weight[slots]
+        return torch.bmm(weight, x.unsqueeze(2)).squeeze(2) + self.linear.bias[slots]
+
+
+POLICY_HEADS = {
+    "dense": DensePolicyHead,
+    "bilinear": BilinearPolicyHead,
+    "compact": CompactPolicyHead,
+}
+
+
+def build_policy_head(kind, hidden_size, output_size=NUM_MOVES, dim=16):
+    """
+    Create a policy head by name.
+    
+    Args:
+        kind (str): "dense", "bilinear" or "compact"
+        hidden_size (int): Size of the trunk features
+        output_size (int): Number of move indices (dense head only)
+        dim (int): Embedding size (bilinear head only)
+    
+    Returns:
+        nn.Module: The policy head
+    """
+    if kind == "dense":
+        return DensePolicyHead(hidden_size, output_size)
+    if kind == "bilinear":
+        return BilinearPolicyHead(hidden_size, dim)
+    if kind == "compact":
+        return CompactPolicyHead(hidden_size)
+    raise ValueError(f"Unknown policy head {kind!r}; expected one of {sorted(POLICY_HEADS)}")
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Residual convolutional trunk for the actor-critic network.
+
+The environment state is laid out as (8, 8, 12) = (rank, file, plane), so
+viewing a batch as (N, 8, 8, 12) and permuting it to (N, 12, 8, 8) gives a
+channels-first tensor that is already stored channels_last, which is the
+layout the CPU convolution kernels prefer. No copy is needed.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+def board_planes(x):
+    """
+    View flat or (N, 8, 8, 12) states as a channels-first (N, 12, 8, 8) batch.
+    
+    Args:
+        x (torch.Tensor): States of shape (N, 768) or (N, 8, 8, 12)
+    
+    Returns:
+        torch.Tensor: (N, 12, 8, 8) view with channels_last strides
+    """
+    return x.reshape(-1, 8, 8, 12).permute(0, 3, 1, 2)
+
+
+class ChannelAffine(nn.Module):
+    """Learned per-channel scale and shift of a (N, C, H, W) feature map."""
+    def __init__(self, channels):
+        super(ChannelAffine, self).__init__()
+        self.weight = nn.Parameter(torch.ones(channels))
+        self.bias = nn.Parameter(torch.zeros(channels))
+    
+    def forward(self, x):
+        return x * self.weight.view(-1, 1, 1) + self.bias.view(-1, 1, 1)
+
+
+class ConvBlock(nn.Module):
+    """
+    3x3 convolution followed by a learned per-channel scale and shift.
+    
+    This stands in for batch norm. Moves are sampled from single-position
+    forwards, and the learners recompute the same positions in large batches.
+    Batch statistics would score a position differently in the two, so a PPO
+    ratio would not start at 1, and running statistics would differ between
+    the rollout and the update. The affine layer behaves the same in train
+    and eval mode and can still be folded into the convolution.
+    """
+    def __init__(self, in_channels, out_channels):
+        super(ConvBlock, self).__init__()
+        self.conv = nn.Conv2d(in_channels, out_channels, 3, padding=1, bias=False)
+        self.affine = ChannelAffine(out_channels)
+    
+    def forward(self, x):
+        return self.affine(self.conv(x))
+    
+    def fuse(self):
+        """Fold the scale and shift into the convolution."""
+        if isinstance(self.affine, ChannelAffine):
+            with torch.no_grad():
+                weight = self.conv.weight * self.affine.weight.view(-1, 1, 1, 1)
+                bias = self.affine.bias.clone()
+            self.conv.weight = nn.Parameter(weight)
+            self.conv.bias = nn.Parameter(bias)
+            self.affine = nn.Identity()
+    
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Checkpoints from before the affine layer hold a batch norm whose
+        # running statistics were never updated; convert it to scale and shift
+        bn = prefix + "bn."
+        if bn + "weight" in state_dict:
+            var = state_dict.pop(bn + "running_var")
+            mean = state_dict.pop(bn + "running_mean")
+            state_dict.pop(bn + "num_batches_tracked", None)
+            scale = state_dict.pop(bn + "weight") / torch.sqrt(var + 1e-5)
+            state_dict[prefix + "affine.weight"] = scale
+            state_dict[prefix + "affine.bias"] = state_dict.pop(bn + "bias") - mean * scale
+        super(ConvBlock, self)._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+
+class ResidualBlock(nn.Module):
+    """Two conv-affine layers with an identity skip connection."""
+    def __init__(self, channels):
+        super(ResidualBlock, self).__init__()
+        self.conv1 = ConvBlock(channels, channels)
+        self.conv2 = ConvBlock(channels, channels)
+    
+    def forward(self, x):
+        out = F.relu(self.conv1(x))
+        return F.relu(x + self.conv2(out))
+
+
+class ResidualTrunk(nn.Module):
+    """
+    Residual CNN mapping board states to a feature vector.
+    
+    A 3x3 stem widens the 12 piece planes to ``channels``, ``blocks``
+    residual blocks follow, and a 1x1 convolution plus a linear layer reduce
+    the 8x8 feature map to ``hidden_size`` features for the policy and value
+    heads.
+    """
+    def __init__(self, hidden_size=128, channels=64, blocks=4, in_planes=12):
+        """
+        Args:
+            hidden_size (int): Size of the output features
+            channels (int): Width of the convolutional layers
+            blocks (int): Number of residual blocks
+            in_planes (int): Number of input planes
+        """
+        super(ResidualTrunk, self).__init__()
+        self.stem = ConvBlock(in_planes, channels)
+        self.blocks = nn.Sequential(*[ResidualBlock(channels) for _ in range(blocks)])
+        self.reduce = nn.Conv2d(channels, 8, 1)
+        self.fc = nn.Linear(8 * 8 * 8, hidden_size)
+    
+    def forward(self, x):
+        """
+        Args:
+            x (torch.Tensor): States of shape (N, 768), (N, 8, 8, 12) or
+                channels-first (N, 12, 8, 8)
+        
+        Returns:
+            torch.Tensor: Features of shape (N, hidden_size)
+        """
+        if x.dim() != 4 or x.shape[1] != self.stem.conv.in_channels:
+            x = board_planes(x)
+        x = F.relu(self.stem(x))
+        x = self.blocks(x)
+        x = F.relu(self.reduce(x))
+        return F.relu(self.fc(x.flatten(1)))
+    
+    def fuse(self):
+        """
+        Fold every scale and shift into its convolution for inference.
+        
+        The fused trunk has a different state dict, so it should not be
+        saved as a training checkpoint.
+        """
+        for module in self.modules():
+            if isinstance(module, ConvBlock):
+                module.fuse()
+        return self
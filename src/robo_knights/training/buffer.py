@@ -0,0 +1,211 @@
+"""
+Array-backed trajectory buffer.
+
+Transitions are stored in preallocated ring arrays instead of Python lists of
+tensors: positions as 12 packed piece bitboards (96 bytes instead of 3 KB of
+float32 planes), the legal move indices (at most 218 int16 per position),
+plus actions, rewards, done flags and the behaviour policy's log-probabilities
+and values. Minibatches are unpacked into tensors only when they are sampled,
+so a learner can recompute log-probabilities in batched forward passes that
+score only the legal moves, instead of keeping one autograd graph per move
+alive.
+"""
+
+import numpy as np
+import torch
+
+from robo_knights.environment.encoding import NUM_PLANES, bitboards_to_planes
+from robo_knights.utils.move_encoding import MAX_LEGAL_MOVES
+
+
+class TrajectoryBuffer:
+    """
+    Fixed-capacity ring buffer of transitions grouped into paths (episodes).
+
+    Transitions are appended with ``add``. When an episode ends, ``finish_path``
+    stores its advantages and value targets and marks the last step as done.
+    Once the buffer is full the oldest transitions are overwritten.
+    """
+    def __init__(self, capacity):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity (int): Maximum number of transitions kept
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.bitboards = np.zeros((capacity, NUM_PLANES), dtype=np.uint64)
+        # Legal move indices, padded with the position's first legal move
+        self.legal_indices = np.zeros((capacity, MAX_LEGAL_MOVES), dtype=np.int16)
+        self.legal_counts = np.zeros(capacity, dtype=np.int16)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.log_probs = np.zeros(capacity, dtype=np.float32)
+        self.values = np.zeros(capacity, dtype=np.float32)
+        self.advantages = np.zeros(capacity, dtype=np.float32)
+        self.returns = np.zeros(capacity, dtype=np.float32)
+        self.clear()
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        """Drop every stored transition."""
+        self.ptr = 0
+        self.size = 0
+        self.path_start = 0
+        self.path_length = 0
+
+    def add(self, bitboards, legal_indices, action, log_prob=0.0, value=0.0, reward=0.0):
+        """
+        Append one transition to the current path.
+
+        Args:
+            bitboards (numpy.ndarray): uint64 piece bitboards of shape (12,)
+            legal_indices (numpy.ndarray): Indices of the legal moves
+            action (int): Index of the move played
+            log_prob (float): Log-probability of the move under the behaviour policy
+            value (float): Value estimate of the position
+            reward (float): Reward for the move (can also be set in ``finish_path``)
+
+        Returns:
+            int: Slot the transition was written to
+        """
+        if self.path_length >= self.capacity:
+            raise RuntimeError("Path is longer than the buffer capacity")
+        legal_indices = np.asarray(legal_indices)
+        if not 0 < len(legal_indices) <= MAX_LEGAL_MOVES:
+            raise ValueError(f"A position has 1 to {MAX_LEGAL_MOVES} legal moves, got {len(legal_indices)}")
+        i = self.ptr
+        self.bitboards[i] = bitboards
+        self.legal_indices[i] = legal_indices[0]
+        self.legal_indices[i, :len(legal_indices)] = legal_indices
+        self.legal_counts[i] = len(legal_indices)
+        self.actions[i] = action
+        self.log_probs[i] = log_prob
+        self.values[i] = value
+        self.rewards[i] = reward
+        self.dones[i] = False
+        self.advantages[i] = 0.0
+        self.returns[i] = 0.0
+
+        self.ptr = (self.ptr + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.path_length += 1
+        return i
+
+    def path_indices(self):
+        """
+        Get the slots of the current, unfinished path in order.
+
+        Returns:
+            numpy.ndarray: Slot indices
+        """
+        return (self.path_start + np.arange(self.path_length)) % self.capacity
+
+    def finish_path(self, advantages, returns, rewards=None):
+        """
+        Close the current path.
+
+        Args:
+            advantages (array-like): Advantages of each step of the path
+            returns (array-like): Value targets of each step of the path
+            rewards (array-like, optional): Rewards to store for the path
+
+        Returns:
+            numpy.ndarray: Slot indices of the finished path
+        """
+        idx = self.path_indices()
+        if rewards is not None:
+            self.rewards[idx] = np.asarray(rewards, dtype=np.float32)
+        self.advantages[idx] = np.asarray(advantages, dtype=np.float32)
+        self.returns[idx] = np.asarray(returns, dtype=np.float32)
+        if len(idx):
+            self.dones[idx[-1]] = True
+        self.path_start = self.ptr
+        self.path_length = 0
+        return idx
+
+    def get(self, indices):
+        """
+        Unpack the transitions at the given slots.
+
+        Args:
+            indices (numpy.ndarray): Slot indices
+
+        Returns:
+            dict: Tensors states (B, 8, 8, 12); legal_indices (B, K) with K the
+                largest number of legal moves in the batch, padded with each
+                position's first legal move; legal_valid (B, K) bool marking the
+                real entries; action_slots (B,), the column of the played move in
+                legal_indices; actions, rewards, dones, log_probs, values,
+                advantages and returns (B,)
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        states = bitboards_to_planes(self.bitboards[indices])
+        width = int(self.legal_counts[indices].max()) if len(indices) else 0
+        legal = self.legal_indices[indices, :width].astype(np.int64)
+        valid = np.arange(width) < self.legal_counts[indices, None]
+        actions = self.actions[indices]
+        # Padding repeats the first legal move, so take the first match
+        slots = (legal == actions[:, None]).argmax(axis=1)
+        return {
+            "states": torch.from_numpy(states),
+            "legal_indices": torch.from_numpy(legal),
+            "legal_valid": torch.from_numpy(valid),
+            "action_slots": torch.from_numpy(slots),
+            "actions": torch.from_numpy(actions),
+            "rewards": torch.from_numpy(self.rewards[indices]),
+            "dones": torch.from_numpy(self.dones[indices]),
+            "log_probs": torch.from_numpy(self.log_probs[indices]),
+            "values": torch.from_numpy(self.values[indices]),
+            "advantages": torch.from_numpy(self.advantages[indices]),
+            "returns": torch.from_numpy(self.returns[indices]),
+        }
+
+    def finished_indices(self):
+        """
+        Get the slots that belong to finished paths.
+
+        Returns:
+            numpy.ndarray: Slot indices
+        """
+        # The current path is always the newest part of the stored range
+        finished = self.size - self.path_length
+        return (self.ptr - self.size + np.arange(finished)) % self.capacity
+
+    def sample(self, batch_size, rng=None):
+        """
+        Sample a random minibatch of finished transitions.
+
+        Args:
+            batch_size (int): Number of transitions
+            rng (numpy.random.Generator, optional): Random generator
+
+        Returns:
+            dict: See ``get``
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        return self.get(rng.choice(self.finished_indices(), size=batch_size))
+
+    def minibatches(self, batch_size, shuffle=True, rng=None):
+        """
+        Iterate over all finished transitions in minibatches.
+
+        Args:
+            batch_size (int): Transitions per minibatch
+            shuffle (bool): Visit the transitions in random order
+            rng (numpy.random.Generator, optional): Random generator
+
+        Yields:
+            dict: See ``get``
+        """
+        indices = self.finished_indices()
+        if shuffle:
+            rng = rng if rng is not None else np.random.default_rng()
+            indices = rng.permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            yield self.get(indices[start:start + batch_size])
@@ -0,0 +1,296 @@
+"""
+Resumable training checkpoints written from a background thread.
+
+``CheckpointManager.save`` takes a CPU snapshot of the training state on the
+calling thread (a copy of every tensor, so later optimizer steps cannot
+change it) and hands it to a writer thread. The training loop only waits for
+the copy, never for the disk. If a snapshot is still waiting when the next
+one arrives, the older one is dropped: only the latest state matters.
+
+Checkpoints are written to a temporary file and renamed into place, so a
+crash mid-write never leaves a truncated ``ckpt-<episode>.pt`` behind, and
+only the newest ``keep`` checkpoints written by the manager are retained.
+A directory holds the checkpoints of a single run: ``new_run_directory``
+creates one per run and ``latest_run_directory`` finds it again to resume.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import torch
+
+_CHECKPOINT_RE = re.compile(r"^ckpt-(\d+)\.pt$")
+_RUN_RE = re.compile(r"^run-\d{8}-\d{6}-\d+$")
+
+
+def new_run_directory(root="checkpoints"):
+    """
+    Path of a fresh checkpoint directory for a new run.
+
+    Args:
+        root (str): Directory holding one subdirectory per run
+
+    Returns:
+        str: ``root/run-<time>-<pid>`` (not created yet)
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(root, f"run-{stamp}-{os.getpid()}")
+
+
+def latest_run_directory(root="checkpoints"):
+    """
+    The most recently started run directory under ``root``.
+
+    Returns:
+        str: Path, or None if there is no run directory
+    """
+    if not os.path.isdir(root):
+        return None
+    runs = [name for name in os.listdir(root)
+            if _RUN_RE.match(name) and os.path.isdir(os.path.join(root, name))]
+    if not runs:
+        return None
+    # Sorted by start time, then by pid for runs started in the same second
+    runs.sort(key=lambda name: (name.rsplit("-", 1)[0], int(name.rsplit("-", 1)[1])))
+    return os.path.join(root, runs[-1])
+
+
+def snapshot(obj):
+    """
+    Copy a nested structure of tensors, dicts, lists and tuples to the CPU.
+
+    Args:
+        obj: A state dict or any nesting of containers holding tensors
+
+    Returns:
+        The same structure with every tensor detached and copied to the CPU
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {key: snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot(value) for value in obj)
+    return obj
+
+
+def capture_rng_state():
+    """
+    Capture the python, numpy and torch global random states.
+
+    The numpy state is stored as plain python values so that the checkpoint
+    loads with ``torch.load(weights_only=True)``.
+
+    Returns:
+        dict: python, numpy and torch states
+    """
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        "python": random.getstate(),
+        "numpy": (name, keys.tolist(), pos, has_gauss, cached_gaussian),
+        "torch": torch.get_rng_state(),
+    }
+
+
+def restore_rng_state(state):
+    """Restore the random states captured by ``capture_rng_state``."""
+    random.setstate(state["python"])
+    name, keys, pos, has_gauss, cached_gaussian = state["numpy"]
+    np.random.set_state((name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian))
+    torch.set_rng_state(state["torch"])
+
+
+class CheckpointManager:
+    """
+    Saves training checkpoints periodically and finds the latest one.
+    """
+    def __init__(self, directory, every_episodes=None, every_minutes=None, keep=3, resume=False):
+        """
+        Initialize the manager and start its writer thread.
+
+        Args:
+            directory (str): Directory of this run's ``ckpt-<episode>.pt`` files
+            every_episodes (int, optional): Checkpoint every this many episodes
+            every_minutes (float, optional): Checkpoint when this many minutes
+                have passed since the last checkpoint
+            keep (int): Number of checkpoints written by this manager to
+                retain (0 keeps all)
+            resume (bool): Continue the run whose checkpoints are already in
+                ``directory``; otherwise the directory must hold none
+
+        Raises:
+            ValueError: If ``directory`` already holds checkpoints and
+                ``resume`` is not set
+        """
+        self.directory = directory
+        self.every_episodes = every_episodes
+        self.every_minutes = every_minutes
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        if not resume and self.checkpoints():
+            raise ValueError(f"{directory} already holds checkpoints of another run; "
+                             "resume it or use another directory")
+
+        self.saved = 0
+        # Only these are ever pruned
+        self._written = []
+        self.error = None
+        self._last_save = time.monotonic()
+        self._pending = None
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def path(self, episode):
+        """Path of the checkpoint taken after ``episode`` episodes."""
+        return os.path.join(self.directory, f"ckpt-{episode:08d}.pt")
+
+    def checkpoints(self):
+        """
+        List the complete checkpoints in the directory.
+
+        Returns:
+            list: (episode, path) pairs, oldest first
+        """
+        found = []
+        for name in os.listdir(self.directory):
+            match = _CHECKPOINT_RE.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def latest(self):
+        """Path of the newest checkpoint, or None if there is none."""
+        checkpoints = self.checkpoints()
+        return checkpoints[-1][1] if checkpoints else None
+
+    def load_latest(self):
+        """
+        Load the newest checkpoint.
+
+        Returns:
+            dict: The saved state, or None if there is no checkpoint
+        """
+        path = self.latest()
+        if path is None:
+            return None
+        return torch.load(path, weights_only=True)
+
+    def due(self, episode):
+        """
+        Whether a checkpoint should be taken after ``episode`` episodes.
+
+        Args:
+            episode (int): Number of episodes completed
+        """
+        if self.every_episodes and episode % self.every_episodes == 0:
+            return True
+        if self.every_minutes and time.monotonic() - self._last_save >= self.every_minutes * 60:
+            return True
+        return False
+
+    def save(self, episode, state):
+        """
+        Snapshot ``state`` and queue it for writing.
+
+        Args:
+            episode (int): Number of episodes completed, used in the file name
+            state (dict): Training state; tensors are copied before returning
+        """
+        if self.error is not None:
+            raise RuntimeError("Checkpoint writer failed") from self.error
+        item = (episode, snapshot(state))
+        self._last_save = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("CheckpointManager is closed")
+            self._pending = item
+            self._cond.notify_all()
+
+    def maybe_save(self, episode, state_fn):
+        """
+        Save a checkpoint if one is due.
+
+        Args:
+            episode (int): Number of episodes completed
+            state_fn (callable): Builds the state; only called when saving
+
+        Returns:
+            bool: Whether a checkpoint was queued
+        """
+        if not self.due(episode):
+            return False
+        self.save(episode, state_fn())
+        return True
+
+    def wait(self):
+        """Block until every queued checkpoint has been written."""
+        with self._cond:
+            while self._pending is not None or self._writing:
+                self._cond.wait()
+        if self.error is not None:
+            raise RuntimeError("Checkpoint writer failed") from self.error
+
+    def close(self):
+        """Write the queued checkpoint, if any, and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self.error is not None:
+            raise RuntimeError("Checkpoint writer failed") from self.error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                (episode, state), self._pending = self._pending, None
+                self._writing = True
+            try:
+                path = self._write(episode, state)
+                if path not in self._written:
+                    self._written.append(path)
+                self._prune()
+                self.saved += 1
+            except Exception as e:
+                self.error = e
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, episode, state):
+        path = self.path(episode)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return path
+
+    def _prune(self):
+        if self.keep <= 0:
+            return
+        while len(self._written) > self.keep:
+            path = self._written.pop(0)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,138 @@
+"""
+PPO-style learner for ActorCriticNetwork.
+
+Instead of one REINFORCE step per game, a batch of games is collected into a
+TrajectoryBuffer and the network is trained for several epochs of clipped
+surrogate-objective minibatch updates on it, with entropy regularisation
+and clipped value targets.
+"""
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from robo_knights.utils.instrumentation import count, section
+
+
+class PPOLearner:
+    """
+    Multi-epoch minibatch PPO updates for a ChessAgent's network.
+    """
+    def __init__(self, agent, epochs=4, minibatch_size=256, clip_ratio=0.2, value_clip=0.2,
+                 entropy_coef=0.01, value_coef=0.5, max_grad_norm=0.5, target_kl=None, seed=None):
+        """
+        Initialize the learner.
+
+        Args:
+            agent (ChessAgent): Agent whose model and optimizer are trained
+            epochs (int): Passes over the buffer per update
+            minibatch_size (int): Transitions per gradient step
+            clip_ratio (float): Clipping range of the probability ratio
+            value_clip (float): Clipping range of the value change (None to disable)
+            entropy_coef (float): Weight of the entropy bonus
+            value_coef (float): Weight of the value loss
+            max_grad_norm (float): Gradient norm clipping (None to disable)
+            target_kl (float, optional): Stop the update early once the approximate
+                KL divergence from the behaviour policy exceeds this value
+            seed (int, optional): Seed for minibatch shuffling
+        """
+        self.agent = agent
+        self.epochs = epochs
+        self.minibatch_size = minibatch_size
+        self.clip_ratio = clip_ratio
+        self.value_clip = value_clip
+        self.entropy_coef = entropy_coef
+        self.value_coef = value_coef
+        self.max_grad_norm = max_grad_norm
+        self.target_kl = target_kl
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, buffer):
+        """
+        Train on every finished transition in the buffer.
+
+        Args:
+            buffer (TrajectoryBuffer): Buffer filled by the agent's rollouts
+
+        Returns:
+            dict: Mean policy_loss, value_loss, entropy, approx_kl and clip_fraction
+                over the minibatches, plus the number of gradient steps
+        """
+        model = self.agent.model
+        optimizer = self.agent.optimizer
+        totals = {"policy_loss": 0.0, "value_loss": 0.0, "entropy": 0.0,
+                  "approx_kl": 0.0, "clip_fraction": 0.0}
+        steps = 0
+
+        for _ in range(self.epochs):
+            epoch_kl = []
+            for batch in buffer.minibatches(self.minibatch_size, rng=self.rng):
+                with section("loss"):
+                    stats = self._minibatch_loss(model, batch)
+                optimizer.zero_grad()
+                with section("backward"):
+                    stats.pop("loss").backward()
+                with section("optimizer_step"):
+                    if self.max_grad_norm is not None:
+                        torch.nn.utils.clip_grad_norm_(model.parameters(), self.max_grad_norm)
+                    optimizer.step()
+                count("updates")
+
+                for key, value in stats.items():
+                    totals[key] += value
+                epoch_kl.append(stats["approx_kl"])
+                steps += 1
+
+            if self.target_kl is not None and epoch_kl and np.mean(epoch_kl) > self.target_kl:
+                break
+
+        result = {key: value / max(steps, 1) for key, value in totals.items()}
+        result["steps"] = steps
+        return result
+
+    def _minibatch_loss(self, model, batch):
+        """
+        Compute the PPO loss and diagnostics for one minibatch.
+
+        Only the stored legal moves are scored. Advantages are used as stored:
+        they were already normalized per episode when the paths were finished.
+        """
+        old_log_probs = batch["log_probs"]
+        old_values = batch["values"]
+        returns = batch["returns"]
+        advantages = batch["advantages"]
+        valid = batch["legal_valid"]
+
+        legal_logits, values = model(batch["states"].reshape(len(valid), -1), batch["legal_indices"])
+        values = values.squeeze(1)
+
+        log_probs_legal = F.log_softmax(legal_logits.masked_fill(~valid, float("-inf")), dim=1)
+        log_probs = log_probs_legal.gather(1, batch["action_slots"].unsqueeze(1)).squeeze(1)
+        entropy = -(log_probs_legal.exp() * log_probs_legal.masked_fill(~valid, 0.0)).sum(dim=1).mean()
+
+        # Clipped surrogate objective
+        ratio = torch.exp(log_probs - old_log_probs)
+        clipped_ratio = ratio.clamp(1.0 - self.clip_ratio, 1.0 + self.clip_ratio)
+        policy_loss = -torch.min(ratio * advantages, clipped_ratio * advantages).mean()
+
+        # Clipped value loss
+        value_loss = (values - returns).pow(2)
+        if self.value_clip is not None:
+            clipped_values = old_values + (values - old_values).clamp(-self.value_clip, self.value_clip)
+            value_loss = torch.max(value_loss, (clipped_values - returns).pow(2))
+        value_loss = 0.5 * value_loss.mean()
+
+        loss = policy_loss + self.value_coef * value_loss - self.entropy_coef * entropy
+
+        with torch.no_grad():
+            approx_kl = (old_log_probs - log_probs).mean().item()
+            clip_fraction = ((ratio - 1.0).abs() > self.clip_ratio).float().mean().item()
+
+        return {
+            "loss": loss,
+            "policy_loss": policy_loss.item(),
+            "value_loss": value_loss.item(),
+            "entropy": entropy.item(),
+            "approx_kl": approx_kl,
+            "clip_fraction": clip_fraction,
+        }
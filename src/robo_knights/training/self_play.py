@@ -0,0 +1,456 @@
+"""
+Multiprocess self-play: a pool of actor processes feeding a central learner.
+
+Each worker keeps a CPU copy of the learner's ActorCriticNetwork, plays
+ChessEnv games against itself (one at a time, or several in lockstep in a
+BatchedChessEnv with one forward pass per ply) and streams the finished
+trajectories over a queue. The learner (the process that owns the pool) batches trajectories
+into updates and broadcasts new weights through a shared-memory model that
+workers pull from whenever its version changes.
+"""
+
+import copy
+import queue
+import random
+import time
+import traceback
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from robo_knights.agents.chess_agent import ChessAgent
+from robo_knights.agents.eval_cache import EvaluationCache
+from robo_knights.environment.batched_env import BatchedChessEnv
+from robo_knights.environment.chess_env import ChessEnv
+from robo_knights.environment.encoding import board_to_bitboards
+from robo_knights.utils.game_storage import GameStoreWriter
+from robo_knights.utils.move_encoding import legal_indices, index_to_move, move_to_index
+
+# Marks a queue message that carries a worker's traceback instead of a game
+WORKER_ERROR = "error"
+
+
+class Trajectory:
+    """
+    The moves one side made in one game, in a compact array form.
+    
+    Positions are stored as 12 piece bitboards, legal moves as a flat index
+    array with per-ply offsets, and rewards from the mover's point of view.
+    """
+    def __init__(self, color, weights_version=0):
+        """
+        Args:
+            color (bool): chess.WHITE or chess.BLACK
+            weights_version (int): Version of the weights that generated the moves
+        """
+        self.color = color
+        self.weights_version = weights_version
+        self.bitboards = []
+        self.actions = []
+        self.legal_indices = []
+        self.legal_offsets = [0]
+        self.rewards = []
+    
+    def __len__(self):
+        return len(self.actions)
+    
+    def append(self, bitboards, legal, action, reward=0.0):
+        """
+        Record one move.
+        
+        Args:
+            bitboards (numpy.ndarray): uint64 bitboards of the position before the move
+            legal (numpy.ndarray): Legal move indices of that position
+            action (int): Index of the move that was played
+            reward (float): Reward for the move, from the mover's point of view
+        """
+        self.bitboards.append(bitboards)
+        self.actions.append(action)
+        self.legal_indices.append(legal)
+        self.legal_offsets.append(self.legal_offsets[-1] + len(legal))
+        self.rewards.append(reward)
+    
+    def finalize(self):
+        """Convert the recorded lists to NumPy arrays (done before sending)."""
+        self.bitboards = np.asarray(self.bitboards, dtype=np.uint64).reshape(-1, 12)
+        self.actions = np.asarray(self.actions, dtype=np.int64)
+        self.legal_indices = (np.concatenate(self.legal_indices).astype(np.int64)
+                              if self.legal_indices else np.zeros(0, dtype=np.int64))
+        self.legal_offsets = np.asarray(self.legal_offsets, dtype=np.int64)
+        self.rewards = np.asarray(self.rewards, dtype=np.float32)
+        return self
+
+
+def _self_play_env():
+    """Environment that encodes every state into the same buffer."""
+    # Each state is consumed before the next move, so nothing is allocated per ply
+    return ChessEnv(state_buffer=np.empty((8, 8, 12), dtype=np.float32), info_level="none")
+
+
+def play_self_play_game(model, env=None, weights_version=0, max_plies=None, cache=None):
+    """
+    Play one game of a model against itself without building autograd graphs.
+    
+    Args:
+        model (ActorCriticNetwork): The network playing both sides
+        env (ChessEnv, optional): Environment to reuse
+        weights_version (int): Version tag stored on the trajectories
+        max_plies (int, optional): Stop the game after this many plies
+        cache (EvaluationCache, optional): Reuse evaluations of positions seen
+            in earlier games with the same weights version
+    
+    Returns:
+        tuple: (white_trajectory, black_trajectory)
+    """
+    env = env if env is not None else _self_play_env()
+    trajectories = (Trajectory(False, weights_version), Trajectory(True, weights_version))
+    state = env.reset()
+    done = False
+    
+    with torch.inference_mode():
+        while not done and (max_plies is None or len(env.board.move_stack) < max_plies):
+            board = env.board
+            mover = board.turn
+            bitboards = board_to_bitboards(board)
+            legal = legal_indices(board)
+            
+            cached = None
+            if cache is not None:
+                key = cache.key(board)
+                cached = cache.lookup(key, legal, weights_version)
+            if cached is not None:
+                logits = torch.from_numpy(cached[0])
+            else:
+                logits, value = model(torch.from_numpy(state).reshape(1, -1), torch.from_numpy(legal))
+                logits = logits[0]
+                if cache is not None:
+                    cache.store(key, legal, logits.numpy(), value.item(), weights_version)
+            choice = torch.distributions.Categorical(logits=logits).sample().item()
+            action = int(legal[choice])
+            
+            state, reward, done, _ = env.step(index_to_move(action))
+            
+            # Rewards are white-perspective; store them from the mover's side
+            own_reward = reward if mover else -reward
+            trajectories[mover].append(bitboards, legal, action, own_reward)
+            
+            # The side that just got mated (or drawn) also sees the outcome
+            opponent = trajectories[not mover]
+            if done and len(opponent):
+                opponent.rewards[-1] += -own_reward
+    
+    white, black = trajectories[True], trajectories[False]
+    return white.finalize(), black.finalize()
+
+
+def batched_self_play(agent, env, max_plies=None, weights_version=lambda: 0):
+    """
+    Play games of an agent against itself in every game of a BatchedChessEnv.
+    
+    All games advance together: each ply is one ``agent.select_actions``
+    forward pass over the whole batch. A finished game is replaced by a new
+    one, so the generator never runs dry.
+    
+    Args:
+        agent (ChessAgent): The agent playing both sides of every game
+        env (BatchedChessEnv): The games
+        max_plies (int, optional): Stop a game after this many plies
+        weights_version (callable): Returns the version tag of the weights,
+            read when a game starts
+    
+    Yields:
+        tuple: (white_trajectory, black_trajectory, result) of every finished
+            game; the result is "*" for games stopped at ``max_plies``
+    """
+    def new_game():
+        version = weights_version()
+        return Trajectory(False, version), Trajectory(True, version)
+    
+    games = [new_game() for _ in range(env.num_envs)]
+    states = env.reset()
+    while True:
+        boards = env.boards
+        movers = [board.turn for board in boards]
+        bitboards = [board_to_bitboards(board) for board in boards]
+        legal = env.get_legal_indices()
+        with torch.inference_mode():
+            moves, _, _ = agent.select_actions(states, legal)
+        states, rewards, dones, infos = env.step(moves)
+        
+        for i, move in enumerate(moves):
+            # Rewards are white-perspective; store them from the mover's side
+            own_reward = float(rewards[i]) if movers[i] else -float(rewards[i])
+            game = games[i]
+            game[movers[i]].append(bitboards[i], legal[i], move_to_index(move), own_reward)
+            
+            truncated = max_plies is not None and len(game[0]) + len(game[1]) >= max_plies
+            if not (dones[i] or truncated):
+                continue
+            if dones[i] and len(game[not movers[i]]):
+                # The side that just got mated (or drawn) also sees the outcome
+                game[not movers[i]].rewards[-1] += -own_reward
+            else:
+                states[i] = env.reset_game(i)
+            result = infos[i]["result"] if dones[i] else "*"
+            games[i] = new_game()
+            yield game[True].finalize(), game[False].finalize(), result
+
+
+def _self_play_worker(worker_id, shared_model, version, lock, output, stop_event, seed, max_plies,
+                      cache_size, envs_per_worker=1):
+    """Actor process: play games with the latest broadcast weights until stopped."""
+    try:
+        _play_until_stopped(worker_id, shared_model, version, lock, output, stop_event, seed,
+                            max_plies, cache_size, envs_per_worker)
+    except Exception:
+        # Hand the traceback to the learner, which would otherwise wait forever
+        output.put((worker_id, WORKER_ERROR, traceback.format_exc()), timeout=5)
+        raise
+
+
+def _play_until_stopped(worker_id, shared_model, version, lock, output, stop_event, seed, max_plies,
+                        cache_size, envs_per_worker):
+    """Body of ``_self_play_worker``."""
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    
+    with lock:
+        model = copy.deepcopy(shared_model)
+        local_version = version.value
+    model.eval()
+    if envs_per_worker > 1:
+        games = batched_self_play(ChessAgent(model=model, training=False),
+                                  BatchedChessEnv(envs_per_worker, copy_obs=False), max_plies,
+                                  lambda: local_version)
+    else:
+        env = _self_play_env()
+    cache = EvaluationCache(cache_size) if cache_size and envs_per_worker == 1 else None
+    
+    while not stop_event.is_set():
+        if version.value != local_version:
+            with lock:
+                model.load_state_dict(shared_model.state_dict())
+                local_version = version.value
+        
+        start = time.perf_counter()
+        lookups = (cache.stats["hits"], cache.stats["misses"]) if cache is not None else (0, 0)
+        if envs_per_worker > 1:
+            white, black, result = next(games)
+        else:
+            white, black = play_self_play_game(model, env, local_version, max_plies, cache)
+            result = env.board.result()
+        elapsed = time.perf_counter() - start
+        if cache is not None:
+            lookups = (cache.stats["hits"] - lookups[0], cache.stats["misses"] - lookups[1])
+        
+        while not stop_event.is_set():
+            try:
+                output.put((worker_id, white, black, elapsed, lookups, result), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class SelfPlayPool:
+    """
+    A pool of self-play worker processes feeding a learner agent.
+    """
+    def __init__(self, agent, num_workers=2, max_staleness=1, games_per_update=None,
+                 max_plies=None, seed=0, cache_size=100000, game_store=None, envs_per_worker=1):
+        """
+        Initialize the pool.
+        
+        Args:
+            agent (ChessAgent): The learner; its model is broadcast to the workers
+            num_workers (int): Number of actor processes
+            max_staleness (int): Trajectories generated with weights more than this
+                many updates old are dropped
+            games_per_update (int, optional): Games per learner update
+                (default: num_workers)
+            max_plies (int, optional): Truncate self-play games after this many plies
+            seed (int): Base random seed for the workers
+            cache_size (int): Positions in each worker's evaluation cache (0 to disable)
+            game_store (str, optional): Append every game trained on to this
+                game store (see ``robo_knights.utils.game_storage``)
+            envs_per_worker (int): Games each worker plays in lockstep, with one
+                forward pass per ply across them (the evaluation cache is
+                only used with one game per worker)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.agent = agent
+        self.num_workers = num_workers
+        self.max_staleness = max_staleness
+        self.games_per_update = games_per_update or num_workers
+        self.max_plies = max_plies
+        self.seed = seed
+        self.cache_size = cache_size
+        self.game_store = game_store
+        self.envs_per_worker = envs_per_worker
+        self._store = None
+        
+        self._ctx = mp.get_context("spawn")
+        self._workers = []
+        self.weights_version = 0
+        self.stats = {"games": 0, "plies": 0, "updates": 0, "dropped_games": 0,
+                      "cache_hits": 0, "cache_misses": 0}
+    
+    def start(self):
+        """Start the worker processes."""
+        if self._workers:
+            return
+        self._shared_model = copy.deepcopy(self.agent.model).cpu()
+        self._shared_model.share_memory()
+        self._version = self._ctx.Value("l", self.weights_version, lock=False)
+        self._lock = self._ctx.Lock()
+        self._queue = self._ctx.Queue(maxsize=2 * self.num_workers)
+        self._stop_event = self._ctx.Event()
+        
+        for worker_id in range(self.num_workers):
+            process = self._ctx.Process(
+                target=_self_play_worker,
+                args=(worker_id, self._shared_model, self._version, self._lock, self._queue,
+                      self._stop_event, self.seed + worker_id, self.max_plies, self.cache_size,
+                      self.envs_per_worker),
+                daemon=True,
+            )
+            process.start()
+            self._workers.append(process)
+    
+    def broadcast(self):
+        """Publish the learner's current weights to the workers."""
+        self.weights_version += 1
+        with self._lock:
+            # load_state_dict copies in place, so the shared storage is kept
+            self._shared_model.load_state_dict(self.agent.model.state_dict())
+            self._version.value = self.weights_version
+    
+    def train(self, num_games, log_every=10, checkpoints=None, start_game=0, state_fn=None):
+        """
+        Run self-play and learner updates until ``num_games`` games have been used.
+        
+        Args:
+            num_games (int): Number of accepted games to train on, counting the
+                ``start_game`` games of a resumed run
+            log_every (int): Print throughput every this many updates (0 to disable)
+            checkpoints (CheckpointManager, optional): Saves a checkpoint after the
+                first update at or past each due game count and after the last one
+            start_game (int): Games already trained on by a resumed run
+            state_fn (callable, optional): Called with the number of games used to
+                build the checkpointed state (required with ``checkpoints``)
+        
+        Returns:
+            dict: Throughput statistics (games, plies, updates, dropped_games,
+                cache_hits, cache_misses, games_per_sec, plies_per_sec)
+        
+        Raises:
+            RuntimeError: If a worker process fails
+        """
+        self.start()
+        start = time.perf_counter()
+        batch = []
+        used = start_game
+        checkpoint_due = False
+        
+        while used < num_games:
+            _, white, black, _, (hits, misses), result = self._next_game()
+            self.stats["cache_hits"] += hits
+            self.stats["cache_misses"] += misses
+            if self.weights_version - white.weights_version > self.max_staleness:
+                self.stats["dropped_games"] += 1
+                continue
+            
+            batch.extend(t for t in (white, black) if len(t))
+            if self.game_store is not None:
+                self._record(white, black, result)
+            used += 1
+            self.stats["games"] += 1
+            self.stats["plies"] += len(white) + len(black)
+            if checkpoints is not None:
+                checkpoint_due = checkpoint_due or checkpoints.due(used) or used == num_games
+            
+            if used % self.games_per_update == 0 or used == num_games:
+                self.agent.update_from_trajectories(batch)
+                batch = []
+                self.stats["updates"] += 1
+                self.broadcast()
+                if checkpoint_due:
+                    checkpoints.save(used, state_fn(used))
+                    checkpoint_due = False
+                
+                if log_every and self.stats["updates"] % log_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"Games {used}/{num_games}: "
+                          f"{self.stats['games'] / elapsed:.2f} games/s, "
+                          f"{self.stats['plies'] / elapsed:.1f} plies/s")
+        
+        if self._store is not None:
+            self._store.flush()
+        elapsed = time.perf_counter() - start
+        stats = dict(self.stats)
+        stats["games_per_sec"] = stats["games"] / elapsed
+        stats["plies_per_sec"] = stats["plies"] / elapsed
+        return stats
+    
+    def _next_game(self, poll=1.0):
+        """
+        Take the next finished game off the queue.
+        
+        Args:
+            poll (float): Seconds between checks that the workers are still alive
+        
+        Returns:
+            tuple: (worker_id, white, black, elapsed, lookups, result)
+        
+        Raises:
+            RuntimeError: If a worker sent its traceback or died without one
+        """
+        while True:
+            try:
+                message = self._queue.get(timeout=poll)
+            except queue.Empty:
+                for worker_id, process in enumerate(self._workers):
+                    if not process.is_alive():
+                        raise RuntimeError(f"Self-play worker {worker_id} exited with code "
+                                           f"{process.exitcode}")
+                continue
+            if message[1] == WORKER_ERROR:
+                raise RuntimeError(f"Self-play worker {message[0]} failed:\n{message[2]}")
+            return message
+    
+    def _record(self, white, black, result):
+        """Append a game to the game store."""
+        if self._store is None:
+            self._store = GameStoreWriter(self.game_store)
+        moves = np.empty(len(white) + len(black), dtype=np.int64)
+        moves[0::2] = white.actions
+        moves[1::2] = black.actions
+        self._store.write(moves, result, white.weights_version, black.weights_version)
+    
+    def stop(self):
+        """Stop and join the worker processes."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        if not self._workers:
+            return
+        self._stop_event.set()
+        # Drain so that workers blocked on a full queue can exit
+        while any(p.is_alive() for p in self._workers):
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for process in self._workers:
+            process.join()
+        self._workers = []
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -37,7 +37,7 @@ def train_agents(num_episodes=10, save_path_agent1="agent1.pth", save_path_agent
             if move not in env.get_legal_moves():
                 move = random.choice(env.get_legal_moves())
             
-            next_state, reward, done = env.step(move)
+            next_state, reward, done, _ = env.step(move)
             
             # White's perspective reward
             if turn_white:
@@ -1,4 +1,20 @@
-from .visualization import ChessVisualizer
-from .metrics import MetricsTracker
+from robo_knights._lazy import lazy_exports
 
-__all__ = ["ChessVisualizer", "MetricsTracker"] 
\ No newline at end of file
+__all__ = ["ChessVisualizer", "MetricsTracker", "ConsoleObserver", "PygameObserver",
+           "MetricsObserver", "RewardObserver", "PGNObserver", "GameStore", "GameStoreWriter",
+           "pgn_to_store", "store_to_pgn"]
+
+# Imported on first use: ChessVisualizer needs pygame, which headless runs never load
+__getattr__, __dir__ = lazy_exports(__name__, {
+    "ChessVisualizer": ".visualization",
+    "MetricsTracker": ".metrics",
+    "ConsoleObserver": ".observers",
+    "PygameObserver": ".observers",
+    "MetricsObserver": ".observers",
+    "RewardObserver": ".observers",
+    "PGNObserver": ".observers",
+    "GameStore": ".game_storage",
+    "GameStoreWriter": ".game_storage",
+    "pgn_to_store": ".game_storage",
+    "store_to_pgn": ".game_storage",
+})
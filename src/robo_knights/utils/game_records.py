@@ -0,0 +1,168 @@
+"""
+Streaming writer for completed game records.
+
+Games are handed to ``GameRecordWriter.write`` and serialized by a background
+thread in batches, so the game loop never waits on json encoding or disk.
+The queue between the two is bounded: if the disk cannot keep up, ``write``
+blocks instead of letting memory grow without limit.
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+FORMATS = ("jsonl", "parquet")
+
+# Sentinels understood by the writer thread
+_FLUSH = object()
+_CLOSE = object()
+
+
+class _JsonlSink:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, records):
+        self._file.write("".join(json.dumps(record, separators=(",", ":")) + "\n"
+                                 for record in records))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet game records need pyarrow: "
+                              "pip install robo-knights[parquet]") from e
+        self._pa = pa
+        self._schema = pa.schema([
+            ("game_id", pa.int64()),
+            ("start_time", pa.string()),
+            ("end_time", pa.string()),
+            ("winner", pa.string()),
+            ("total_moves", pa.int32()),
+            ("duration_ns", pa.int64()),
+            ("first_ply", pa.int32()),
+            ("start_fen", pa.string()),
+            ("moves", pa.list_(pa.string())),
+            ("move_ns", pa.list_(pa.int64())),
+        ])
+        # A Parquet file cannot be appended to, so every batch is a row group
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def write(self, records):
+        columns = {name: [record.get(name) for record in records] for name in self._schema.names}
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class GameRecordWriter:
+    """
+    Appends game records to a JSONL or Parquet file from a background thread.
+    """
+    def __init__(self, path, format="jsonl", max_pending=1024, batch_size=256, flush_interval=1.0):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            path (str): Output file. JSONL files are appended to; Parquet files
+                are overwritten.
+            format (str): "jsonl" or "parquet" (needs pyarrow)
+            max_pending (int): Records held in memory before ``write`` blocks
+            batch_size (int): Records serialized together
+            flush_interval (float): Seconds after which a partial batch is
+                written anyway
+        """
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, got {format!r}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.format = format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._sink = _JsonlSink(self.path) if format == "jsonl" else _ParquetSink(self.path)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="game-record-writer", daemon=True)
+        self._thread.start()
+        # The thread is a daemon, so make sure pending games reach the file at exit
+        atexit.register(self.close)
+
+    def write(self, record):
+        """
+        Queue one game record.
+
+        Args:
+            record (dict): JSON-serializable game record
+        """
+        self._check()
+        if self._closed:
+            raise RuntimeError("GameRecordWriter is closed")
+        self._queue.put(record)
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        self._check()
+        if not self._closed:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._check()
+
+    def close(self):
+        """Write the pending records, close the file and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        atexit.unregister(self.close)
+        self._check()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Writing game records to {self.path} failed") from error
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            control = item is None or item is _FLUSH or item is _CLOSE
+            if not control:
+                batch.append(item)
+            if batch and (control or len(batch) >= self.batch_size):
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+            if control:
+                deadline = time.monotonic() + self.flush_interval
+            if item is _FLUSH or item is _CLOSE:
+                self._queue.task_done()
+            if item is _CLOSE:
+                break
+        self._sink.close()
+
+    def _write(self, batch):
+        try:
+            self._sink.write(batch)
+            self.written += len(batch)
+        except Exception as e:
+            # Reported to the game loop on its next call
+            self._error = e
@@ -0,0 +1,371 @@
+"""
+Compact binary storage for large numbers of games.
+
+A store is two files. The data file holds, for every game, a 16-byte header
+(length, model versions, result) followed by its moves as 16-bit move indices
+(the ``move_to_index`` scheme). The side index ``<path>.idx`` holds the byte
+offset of every game, so game k is found in O(1). Both files are read through
+``numpy.memmap``: headers and move arrays are views of the mapped file, and
+nothing is loaded until it is touched. A writer that died mid-game leaves a
+torn tail; readers ignore it and the next writer truncates both files back
+to the last complete game before appending.
+
+A game costs 16 bytes plus 2 bytes per ply (padded to 8 bytes), against
+hundreds of bytes per ply for JSON with FENs.
+"""
+
+import os
+
+import chess
+import chess.pgn
+import numpy as np
+
+from robo_knights.environment.encoding import encode_board
+from robo_knights.utils.move_encoding import NUM_MOVES, indices_to_moves, moves_to_indices
+
+DATA_MAGIC = b"RKGAMES1"
+INDEX_MAGIC = b"RKINDEX1"
+
+HEADER_DTYPE = np.dtype([
+    ("length", "<u4"),
+    ("white_version", "<u4"),
+    ("black_version", "<u4"),
+    ("result", "u1"),
+    ("reserved", "u1", (3,)),
+])
+
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+_RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+# Games start on 8-byte boundaries
+_ALIGN = 8
+
+assert NUM_MOVES <= np.iinfo(np.uint16).max + 1
+
+
+def index_path(path):
+    """Path of the side index of a store."""
+    return f"{path}.idx"
+
+
+def _open_for_append(path, magic):
+    exists = os.path.exists(path) and os.path.getsize(path) > 0
+    f = open(path, "r+b" if exists else "wb")
+    if exists:
+        if f.read(len(magic)) != magic:
+            f.close()
+            raise ValueError(f"{path} is not a game store file")
+        f.seek(0, os.SEEK_END)
+    else:
+        f.write(magic)
+    return f
+
+
+class GameStoreWriter:
+    """
+    Appends games to a store.
+    """
+    def __init__(self, path):
+        """
+        Open a store for appending, creating it if needed.
+
+        A torn tail left by a writer that died mid-game is truncated first.
+
+        Args:
+            path (str): Data file of the store; the index is ``<path>.idx``
+        """
+        self.path = str(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._data = _open_for_append(self.path, DATA_MAGIC)
+        self._index = _open_for_append(index_path(self.path), INDEX_MAGIC)
+        self._offset, self._count = self._recover()
+
+    def _recover(self):
+        """
+        Truncate both files to the last game that was written completely.
+
+        Index entries whose game runs past the end of the data file are
+        dropped, and so are data bytes after the last indexed game (a game
+        written without its index entry, or a partial one).
+
+        Returns:
+            tuple: (end of the data, number of games)
+        """
+        data_size = self._data.seek(0, os.SEEK_END)
+        count = (self._index.seek(0, os.SEEK_END) - len(INDEX_MAGIC)) // 8
+        end = len(DATA_MAGIC)
+        while count:
+            self._index.seek(len(INDEX_MAGIC) + 8 * (count - 1))
+            offset = int(np.frombuffer(self._index.read(8), dtype="<u8")[0])
+            if offset + HEADER_DTYPE.itemsize <= data_size:
+                self._data.seek(offset)
+                length = int(np.frombuffer(self._data.read(4), dtype="<u4")[0])
+                size = HEADER_DTYPE.itemsize + 2 * length
+                game_end = offset + size + (-size % _ALIGN)
+                if game_end <= data_size:
+                    end = game_end
+                    break
+            count -= 1
+        self._data.truncate(end)
+        self._index.truncate(len(INDEX_MAGIC) + 8 * count)
+        self._data.seek(end)
+        self._index.seek(len(INDEX_MAGIC) + 8 * count)
+        return end, count
+
+    def __len__(self):
+        return self._count
+
+    def write(self, moves, result="*", white_version=0, black_version=0):
+        """
+        Append one game played from the standard starting position.
+
+        Args:
+            moves: chess.Move objects, or an integer array of move indices
+            result (str): "1-0", "0-1", "1/2-1/2" or "*"
+            white_version (int): Weights version of the white player
+            black_version (int): Weights version of the black player
+
+        Returns:
+            int: Id of the game in the store
+        """
+        if isinstance(moves, np.ndarray) and moves.dtype.kind in "iu":
+            indices = moves.astype("<u2")
+        else:
+            indices = moves_to_indices(moves).astype("<u2")
+        if result not in _RESULT_CODES:
+            raise ValueError(f"Unknown result {result!r}; expected one of {RESULTS}")
+
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["length"] = len(indices)
+        header["white_version"] = white_version
+        header["black_version"] = black_version
+        header["result"] = _RESULT_CODES[result]
+        size = HEADER_DTYPE.itemsize + indices.nbytes
+        padding = -size % _ALIGN
+
+        self._data.write(header.tobytes())
+        self._data.write(indices.tobytes())
+        self._data.write(b"\0" * padding)
+        self._index.write(np.array([self._offset], dtype="<u8").tobytes())
+        self._offset += size + padding
+        self._count += 1
+        return self._count - 1
+
+    def write_board(self, board, white_version=0, black_version=0):
+        """
+        Append the game played on a board.
+
+        Args:
+            board (chess.Board): Board whose move stack starts from the
+                standard starting position
+            white_version (int): Weights version of the white player
+            black_version (int): Weights version of the black player
+
+        Returns:
+            int: Id of the game in the store
+        """
+        if board.move_stack and board.root().fen() != chess.STARTING_FEN:
+            raise ValueError("Only games from the standard starting position can be stored")
+        return self.write(board.move_stack, board.result(), white_version, black_version)
+
+    def flush(self):
+        """Write buffered games to disk, data before index."""
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        """Flush and close the store."""
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameStore:
+    """
+    Read-only, memory-mapped access to a store.
+
+    ``store[k]`` is the uint16 move-index array of game k, a view of the
+    mapped file.
+    """
+    def __init__(self, path):
+        """
+        Map a store.
+
+        Args:
+            path (str): Data file of the store
+        """
+        self.path = str(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:len(DATA_MAGIC)]) != DATA_MAGIC:
+            raise ValueError(f"{self.path} is not a game store file")
+        idx = index_path(self.path)
+        with open(idx, "rb") as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"{idx} is not a game store index")
+        count = (os.path.getsize(idx) - len(INDEX_MAGIC)) // 8
+        if count:
+            offsets = np.memmap(idx, dtype="<u8", mode="r", offset=len(INDEX_MAGIC), shape=(count,))
+        else:
+            offsets = np.zeros(0, dtype="<u8")
+        # A writer that died mid-game can leave index entries past the data
+        while count and not self._complete(int(offsets[count - 1])):
+            count -= 1
+        self.offsets = offsets[:count]
+
+    def _complete(self, offset):
+        start = offset + HEADER_DTYPE.itemsize
+        if start > len(self._data):
+            return False
+        length = int(self._data[offset:offset + 4].view("<u4")[0])
+        return start + 2 * length <= len(self._data)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, k):
+        return self.move_indices(k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self.move_indices(k)
+
+    def header(self, k):
+        """
+        Header of game k.
+
+        Returns:
+            numpy.void: Record with length, white_version, black_version and
+                result (an index into RESULTS)
+        """
+        offset = int(self.offsets[k])
+        return self._data[offset:offset + HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+
+    def headers(self):
+        """
+        Headers of every game (copied into one structured array).
+
+        Returns:
+            numpy.ndarray: HEADER_DTYPE array of shape (num_games,)
+        """
+        rows = self.offsets.astype(np.int64)[:, None] + np.arange(HEADER_DTYPE.itemsize)
+        return np.ascontiguousarray(self._data[rows]).view(HEADER_DTYPE).reshape(-1)
+
+    def move_indices(self, k):
+        """
+        Moves of game k as a zero-copy uint16 view.
+
+        Returns:
+            numpy.ndarray: Move indices, in the order they were played
+        """
+        offset = int(self.offsets[k]) + HEADER_DTYPE.itemsize
+        length = int(self.header(k)["length"])
+        return self._data[offset:offset + 2 * length].view("<u2")
+
+    def moves(self, k):
+        """Moves of game k as chess.Move objects."""
+        return indices_to_moves(self.move_indices(k))
+
+    def result(self, k):
+        """Result of game k as a PGN result string."""
+        return RESULTS[self.header(k)["result"]]
+
+    def board(self, k):
+        """Final position of game k, with its move stack."""
+        board = chess.Board()
+        for move in self.moves(k):
+            board.push(move)
+        return board
+
+    def positions(self, k, out=None):
+        """
+        Replay game k.
+
+        Args:
+            k (int): Game id
+            out (numpy.ndarray, optional): float32 (8, 8, 12) buffer the planes
+                are written into; it is reused for every position
+
+        Yields:
+            tuple: (board, state, move_index) for every position before a
+                move, with ``state`` in the ``ChessEnv.get_state`` layout.
+                The board and state are only valid until the next item.
+        """
+        if out is None:
+            out = np.empty((8, 8, 12), dtype=np.float32)
+        board = chess.Board()
+        indices = self.move_indices(k)
+        for index, move in zip(indices.tolist(), indices_to_moves(indices)):
+            yield board, encode_board(board, out=out), index
+            board.push(move)
+
+    def to_pgn(self, k):
+        """
+        Game k as a PGN game.
+
+        Returns:
+            chess.pgn.Game: The game, with the model versions as headers
+        """
+        header = self.header(k)
+        game = chess.pgn.Game.from_board(self.board(k))
+        game.headers["Round"] = str(k + 1)
+        game.headers["Result"] = RESULTS[header["result"]]
+        game.headers["WhiteVersion"] = str(int(header["white_version"]))
+        game.headers["BlackVersion"] = str(int(header["black_version"]))
+        return game
+
+
+def store_to_pgn(store_path, pgn_path):
+    """
+    Convert a store to a PGN file.
+
+    Args:
+        store_path (str): Data file of the store
+        pgn_path (str): PGN file to write
+
+    Returns:
+        int: Number of games written
+    """
+    store = GameStore(store_path)
+    with open(pgn_path, "w") as f:
+        for k in range(len(store)):
+            print(store.to_pgn(k), file=f, end="\n\n")
+    return len(store)
+
+
+def pgn_to_store(pgn_path, store_path):
+    """
+    Append the games of a PGN file to a store.
+
+    Games that do not start from the standard position are skipped.
+    ``WhiteVersion``/``BlackVersion`` headers are kept as model versions.
+
+    Args:
+        pgn_path (str): PGN file to read
+        store_path (str): Data file of the store
+
+    Returns:
+        int: Number of games stored
+    """
+    stored = 0
+    with open(pgn_path) as f, GameStoreWriter(store_path) as writer:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            if game.board().fen() != chess.STARTING_FEN:
+                continue
+            result = game.headers.get("Result", "*")
+            writer.write(list(game.mainline_moves()), result if result in _RESULT_CODES else "*",
+                         int(game.headers.get("WhiteVersion", 0)),
+                         int(game.headers.get("BlackVersion", 0)))
+            stored += 1
+    return stored
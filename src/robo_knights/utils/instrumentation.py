@@ -0,0 +1,336 @@
+"""
+Low-overhead timers and counters for the training loop.
+
+Hot paths are wrapped in ``with section("name"):`` and call ``count("name")``.
+Until ``enable`` installs a Recorder both are a global lookup and a shared
+no-op, so instrumented code costs next to nothing when it is not in use.
+
+The Recorder aggregates per episode (``end_episode``) and over a rolling
+window of episodes, and hands every episode to its sinks: JSONL lines, or a
+Prometheus text file that a local scraper (or node_exporter's textfile
+collector) can read. ``ProfileWindow`` captures a torch.profiler trace or a
+cProfile dump for a chosen range of episodes.
+"""
+
+import cProfile
+import json
+import os
+import time
+from collections import defaultdict, deque
+
+_recorder = None
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add_time(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+def section(name):
+    """
+    Time a block of code.
+
+    Args:
+        name (str): Section name, e.g. "env_step" or "backward"
+
+    Returns:
+        Context manager; a shared no-op when instrumentation is disabled
+    """
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SECTION
+    return _Section(recorder, name)
+
+
+def count(name, n=1):
+    """
+    Increment a counter (no-op when instrumentation is disabled).
+
+    Args:
+        name (str): Counter name
+        n (int): Increment
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.add_count(name, n)
+
+
+def enable(recorder):
+    """Install a recorder; ``section`` and ``count`` report to it from now on."""
+    global _recorder
+    _recorder = recorder
+    return recorder
+
+
+def disable():
+    """Remove the installed recorder and close its sinks."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.close()
+
+
+def get_recorder():
+    """The installed Recorder, or None when instrumentation is disabled."""
+    return _recorder
+
+
+class Recorder:
+    """
+    Aggregates section times and counters per episode and over a rolling window.
+    """
+    def __init__(self, sinks=(), window=100):
+        """
+        Args:
+            sinks (iterable): Objects with ``write(record, recorder)`` and
+                ``close()``, called once per episode
+            window (int): Episodes in the rolling window
+        """
+        self.sinks = list(sinks)
+        self.window = window
+        self.episodes = 0
+        self._episode_ns = defaultdict(int)
+        self._episode_calls = defaultdict(int)
+        self._episode_counts = defaultdict(int)
+        self.total_ns = defaultdict(int)
+        self.total_calls = defaultdict(int)
+        self.total_counts = defaultdict(int)
+        self.wall_ns = 0
+        self._history = deque(maxlen=window)
+        self._episode_start = time.perf_counter_ns()
+
+    def add_time(self, name, ns):
+        self._episode_ns[name] += ns
+        self._episode_calls[name] += 1
+
+    def add_count(self, name, n=1):
+        self._episode_counts[name] += n
+
+    def window_means(self):
+        """
+        Mean per-episode seconds of every section over the rolling window.
+
+        Returns:
+            dict: Section name -> mean seconds per episode
+        """
+        if not self._history:
+            return {}
+        totals = defaultdict(int)
+        for episode_ns in self._history:
+            for name, ns in episode_ns.items():
+                totals[name] += ns
+        return {name: ns / len(self._history) / 1e9 for name, ns in totals.items()}
+
+    def end_episode(self, **extra):
+        """
+        Close the current episode and send its record to the sinks.
+
+        Args:
+            **extra: Additional JSON-serializable fields for the record
+
+        Returns:
+            dict: episode, wall_s, sections ({name: {"s", "calls"}}),
+                counters, window_s (rolling means) and the extra fields
+        """
+        now = time.perf_counter_ns()
+        episode_ns = dict(self._episode_ns)
+        for name, ns in episode_ns.items():
+            self.total_ns[name] += ns
+            self.total_calls[name] += self._episode_calls[name]
+        for name, n in self._episode_counts.items():
+            self.total_counts[name] += n
+        self._history.append(episode_ns)
+        self.episodes += 1
+        self.wall_ns += now - self._episode_start
+
+        record = {
+            "episode": self.episodes,
+            "wall_s": (now - self._episode_start) / 1e9,
+            "sections": {name: {"s": ns / 1e9, "calls": self._episode_calls[name]}
+                         for name, ns in episode_ns.items()},
+            "counters": dict(self._episode_counts),
+            "window_s": self.window_means(),
+            **extra,
+        }
+        self._episode_ns.clear()
+        self._episode_calls.clear()
+        self._episode_counts.clear()
+        self._episode_start = now
+        for sink in self.sinks:
+            sink.write(record, self)
+        return record
+
+    def summary(self):
+        """
+        Render cumulative section times as a table.
+
+        Sections nest (``select_action`` contains ``inference``), so the
+        shares of wall time add up to more than 100%.
+
+        Returns:
+            str: One line per section, slowest first
+        """
+        total = self.wall_ns or 1
+        lines = [f"{'section':20s} {'total s':>9s} {'wall':>7s} {'calls':>9s} {'us/call':>9s}"]
+        for name, ns in sorted(self.total_ns.items(), key=lambda item: -item[1]):
+            calls = self.total_calls[name]
+            lines.append(f"{name:20s} {ns / 1e9:9.2f} {ns / total:7.1%} {calls:9d} "
+                         f"{ns / 1e3 / max(calls, 1):9.1f}")
+        return "\n".join(lines)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class JsonlSink:
+    """Appends one JSON line per episode."""
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record, recorder):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class PrometheusSink:
+    """
+    Keeps cumulative metrics in a Prometheus text-format file.
+
+    The file is rewritten atomically every ``every`` episodes, so a scraper
+    never reads a partial file.
+    """
+    def __init__(self, path, every=1, prefix="robo_knights"):
+        """
+        Args:
+            path (str): Output file (conventionally ``*.prom``)
+            every (int): Rewrite the file every this many episodes
+            prefix (str): Metric name prefix
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.every = every
+        self.prefix = prefix
+
+    def write(self, record, recorder):
+        if recorder.episodes % self.every == 0:
+            self._dump(recorder)
+
+    def _dump(self, recorder):
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_episodes_total Episodes completed.",
+            f"# TYPE {p}_episodes_total counter",
+            f"{p}_episodes_total {recorder.episodes}",
+            f"# HELP {p}_section_seconds_total Time spent in each instrumented section.",
+            f"# TYPE {p}_section_seconds_total counter",
+        ]
+        lines += [f'{p}_section_seconds_total{{section="{name}"}} {ns / 1e9:.9f}'
+                  for name, ns in sorted(recorder.total_ns.items())]
+        lines += [f"# HELP {p}_section_calls_total Calls of each instrumented section.",
+                  f"# TYPE {p}_section_calls_total counter"]
+        lines += [f'{p}_section_calls_total{{section="{name}"}} {calls}'
+                  for name, calls in sorted(recorder.total_calls.items())]
+        lines += [f"# HELP {p}_section_window_seconds Mean seconds per episode over the "
+                  f"last {recorder.window} episodes.",
+                  f"# TYPE {p}_section_window_seconds gauge"]
+        lines += [f'{p}_section_window_seconds{{section="{name}"}} {seconds:.9f}'
+                  for name, seconds in sorted(recorder.window_means().items())]
+        lines += [f"# HELP {p}_events_total Instrumented event counters.",
+                  f"# TYPE {p}_events_total counter"]
+        lines += [f'{p}_events_total{{name="{name}"}} {n}'
+                  for name, n in sorted(recorder.total_counts.items())]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
+    def close(self):
+        pass
+
+
+class ProfileWindow:
+    """
+    Profiles a range of episodes with torch.profiler or cProfile.
+
+    Call ``step(episode)`` at the start of every episode and ``close()`` at
+    the end of the run.
+    """
+    KINDS = ("torch", "cprofile")
+
+    def __init__(self, kind, start=1, episodes=1, output=None):
+        """
+        Args:
+            kind (str): "torch" (Chrome trace, viewable in chrome://tracing or
+                Perfetto) or "cprofile" (pstats dump)
+            start (int): First profiled episode (0-based)
+            episodes (int): Number of profiled episodes
+            output (str, optional): Output file (default:
+                ``logs/profile.json`` or ``logs/profile.prof``)
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"kind must be one of {self.KINDS}, got {kind!r}")
+        self.kind = kind
+        self.start = start
+        self.stop = start + episodes
+        self.output = output or os.path.join("logs", "profile.json" if kind == "torch" else "profile.prof")
+        self._profiler = None
+
+    def step(self, episode):
+        """Start or stop profiling before ``episode`` is played."""
+        if episode == self.start and self._profiler is None:
+            self._begin()
+        elif episode == self.stop:
+            self.close()
+
+    def _begin(self):
+        if self.kind == "torch":
+            import torch.profiler
+            self._profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True)
+            self._profiler.__enter__()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def close(self):
+        """Stop profiling, if running, and write the capture."""
+        if self._profiler is None:
+            return
+        profiler, self._profiler = self._profiler, None
+        os.makedirs(os.path.dirname(os.path.abspath(self.output)), exist_ok=True)
+        if self.kind == "torch":
+            profiler.__exit__(None, None, None)
+            profiler.export_chrome_trace(self.output)
+        else:
+            profiler.disable()
+            profiler.dump_stats(self.output)
+        print(f"Profile of episodes {self.start}-{self.stop - 1} written to {self.output}")
@@ -2,84 +2,159 @@
 Metrics tracking utilities.
 """
 
-import json
+import os
+import time
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import chess
+
+from robo_knights.utils.game_records import GameRecordWriter
 
 class MetricsTracker:
-    """A class for tracking and logging game metrics."""
+    """A class for tracking and logging game metrics.
     
-    def __init__(self, log_dir="logs"):
+    Only the move, its ply and a monotonic timestamp are kept per move; FENs
+    and game-state flags are derived by replaying the game when they are
+    asked for. Completed games are streamed to ``log_dir`` by a background
+    writer, so tracking costs the game loop next to nothing and memory stays
+    bounded however many games are played.
+    """
+    
+    def __init__(self, log_dir="logs", stream=True, format="jsonl", max_pending=1024,
+                 flush_interval=1.0):
         """Initialize the metrics tracker.
         
         Args:
             log_dir (str): Directory to store log files
+            stream (bool): Write every completed game to
+                ``log_dir/games-<time>-<pid>.<format>``
+            format (str): "jsonl" or "parquet" (needs pyarrow)
+            max_pending (int): Completed games held in memory before
+                ``end_game`` waits for the writer
+            flush_interval (float): Seconds between writes of partial batches
         """
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
-        self.current_game = {
-            "moves": [],
-            "start_time": None,
-            "end_time": None,
-            "winner": None,
-            "total_moves": 0,
-            "game_duration": None
-        }
+        self.stream = stream
+        self.format = format
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.writer = None
+        self.games = 0
+        self._reset()
+    
+    def _reset(self):
+        self._start_time = None
+        self._start_ns = None
+        self._end_time = None
+        self._end_ns = None
+        self._winner = None
+        self._root = None
+        # Per move: (move, ply after the move, monotonic ns)
+        self._moves = []
     
     def start_game(self):
         """Start tracking a new game."""
-        self.current_game = {
-            "moves": [],
-            "start_time": datetime.now().isoformat(),
-            "end_time": None,
-            "winner": None,
-            "total_moves": 0,
-            "game_duration": None
-        }
+        self._reset()
+        self._start_time = datetime.now()
+        self._start_ns = time.monotonic_ns()
     
     def log_move(self, move, board):
-        """Log a move and the resulting board state.
+        """Log a move.
         
         Args:
             move (chess.Move): The move that was made
             board (chess.Board): The board after the move
         """
-        self.current_game["moves"].append({
-            "move": move.uci(),
-            "timestamp": datetime.now().isoformat(),
-            "fen": board.fen(),
-            "is_check": board.is_check(),
-            "is_checkmate": board.is_checkmate(),
-            "is_stalemate": board.is_stalemate(),
-            "is_insufficient_material": board.is_insufficient_material(),
-            "is_game_over": board.is_game_over()
-        })
-        self.current_game["total_moves"] = len(self.current_game["moves"])
+        if self._root is None:
+            # Starting position, to replay the game from when details are requested
+            self._root = board.root()
+        self._moves.append((move, board.ply(), time.monotonic_ns()))
     
     def end_game(self, winner=None):
-        """End the current game and save metrics.
+        """End the current game and queue it for writing.
         
         Args:
             winner (str, optional): The winner of the game ('white', 'black', or None for draw)
         """
-        self.current_game["end_time"] = datetime.now().isoformat()
-        self.current_game["winner"] = winner
-        
-        # Calculate game duration
-        if self.current_game["start_time"]:
-            start = datetime.fromisoformat(self.current_game["start_time"])
-            end = datetime.fromisoformat(self.current_game["end_time"])
-            self.current_game["game_duration"] = str(end - start)
+        self._end_time = datetime.now()
+        self._end_ns = time.monotonic_ns()
+        self._winner = winner
+        self.games += 1
         
+        if self.stream:
+            if self.writer is None:
+                stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+                path = self.log_dir / f"games-{stamp}-{os.getpid()}.{self.format}"
+                self.writer = GameRecordWriter(path, self.format, self.max_pending,
+                                               flush_interval=self.flush_interval)
+            self.writer.write(self.get_record())
+    
+    def get_record(self):
+        """Get the compact record of the current game, as it is written to disk.
         
+        Returns:
+            dict: game_id, start_time, end_time, winner, total_moves,
+                duration_ns, first_ply, start_fen (None for the standard
+                starting position), moves (UCI) and move_ns (nanoseconds since
+                the start of the game)
+        """
+        start_fen = None
+        if self._root is not None and self._root.fen() != chess.STARTING_FEN:
+            start_fen = self._root.fen()
+        return {
+            "game_id": self.games,
+            "start_time": self._start_time.isoformat() if self._start_time else None,
+            "end_time": self._end_time.isoformat() if self._end_time else None,
+            "winner": self._winner,
+            "total_moves": len(self._moves),
+            "duration_ns": self._end_ns - self._start_ns if self._end_ns and self._start_ns else None,
+            "first_ply": self._moves[0][1] if self._moves else 0,
+            "start_fen": start_fen,
+            "moves": [move.uci() for move, _, _ in self._moves],
+            "move_ns": [ns - self._start_ns for _, _, ns in self._moves] if self._start_ns else [],
+        }
     
     def get_current_metrics(self):
         """Get the metrics for the current game.
         
+        The per-move details are derived by replaying the game, so this is
+        much slower than tracking it.
+        
         Returns:
             dict: Current game metrics
         """
-        return self.current_game.copy()
+        moves = []
+        board = self._root.copy() if self._root is not None else chess.Board()
+        for move, ply, ns in self._moves:
+            board.push(move)
+            timestamp = None
+            if self._start_time is not None:
+                timestamp = (self._start_time + timedelta(microseconds=(ns - self._start_ns) / 1000)).isoformat()
+            moves.append({
+                "move": move.uci(),
+                "ply": ply,
+                "timestamp": timestamp,
+                "fen": board.fen(),
+                "is_check": board.is_check(),
+                "is_checkmate": board.is_checkmate(),
+                "is_stalemate": board.is_stalemate(),
+                "is_insufficient_material": board.is_insufficient_material(),
+                "is_game_over": board.is_game_over()
+            })
+        
+        duration = None
+        if self._start_time and self._end_time:
+            duration = str(self._end_time - self._start_time)
+        return {
+            "moves": moves,
+            "start_time": self._start_time.isoformat() if self._start_time else None,
+            "end_time": self._end_time.isoformat() if self._end_time else None,
+            "winner": self._winner,
+            "total_moves": len(self._moves),
+            "game_duration": duration
+        }
     
     def get_move_history(self):
         """Get the move history for the current game.
@@ -87,4 +162,14 @@ class MetricsTracker:
         Returns:
             list: List of moves in UCI format
         """
-        return [move["move"] for move in self.current_game["moves"]] 
\ No newline at end of file
+        return [move.uci() for move, _, _ in self._moves]
+    
+    def flush(self):
+        """Block until every completed game has been written."""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def close(self):
+        """Write the pending games and stop the writer."""
+        if self.writer is not None:
+            self.writer.close()
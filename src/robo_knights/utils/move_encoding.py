@@ -0,0 +1,243 @@
+"""
+Move encoding with precomputed lookup tables.
+
+Moves are indexed as ``from_square * 320 + to_square * 5 + promo_idx`` where
+``promo_idx`` is 0 for no promotion and 1-4 for queen, rook, bishop and knight.
+The tables below are built once at import time so that converting between
+moves and indices, and building legal-move masks, never rebuilds them.
+"""
+
+import functools
+
+import chess
+import numpy as np
+
+NUM_MOVES = 64 * 64 * 5
+
+# Most legal moves any reachable chess position has
+MAX_LEGAL_MOVES = 218
+
+# Indexed by piece type (0 stands for "no promotion"). Pawn and king
+# promotions are not valid and fall back to 0, as before.
+PROMOTION_TO_INDEX = np.zeros(7, dtype=np.int64)
+PROMOTION_TO_INDEX[chess.QUEEN] = 1
+PROMOTION_TO_INDEX[chess.ROOK] = 2
+PROMOTION_TO_INDEX[chess.BISHOP] = 3
+PROMOTION_TO_INDEX[chess.KNIGHT] = 4
+
+INDEX_TO_PROMOTION = (None, chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
+
+# Per-index decoding tables.
+INDEX_TO_FROM = np.repeat(np.arange(64, dtype=np.int64), 64 * 5)
+INDEX_TO_TO = np.tile(np.repeat(np.arange(64, dtype=np.int64), 5), 64)
+INDEX_TO_PROMO = np.tile(np.arange(5, dtype=np.int64), 64 * 64)
+
+_PROMO_INDEX = PROMOTION_TO_INDEX.tolist()
+_INDEX_TO_MOVE = tuple(
+    chess.Move(from_sq, to_sq, promotion=INDEX_TO_PROMOTION[promo_idx])
+    for from_sq in range(64)
+    for to_sq in range(64)
+    for promo_idx in range(5)
+)
+
+
+def move_to_index(move):
+    """
+    Convert a chess move to its index.
+    
+    Args:
+        move (chess.Move): The chess move to convert
+    
+    Returns:
+        int: Index in [0, 64*64*5)
+    """
+    return move.from_square * 320 + move.to_square * 5 + _PROMO_INDEX[move.promotion or 0]
+
+
+def index_to_move(idx):
+    """
+    Convert an index back to a chess move.
+    
+    Args:
+        idx (int): The index to convert
+    
+    Returns:
+        chess.Move: The corresponding move, or None if the index is out of range
+    """
+    if idx < 0 or idx >= NUM_MOVES:
+        return None
+    return _INDEX_TO_MOVE[idx]
+
+
+def moves_to_indices(moves):
+    """
+    Convert a sequence of moves to an index array.
+    
+    Args:
+        moves (iterable): chess.Move objects
+    
+    Returns:
+        numpy.ndarray: int64 array of move indices
+    """
+    promo = _PROMO_INDEX
+    return np.array(
+        [m.from_square * 320 + m.to_square * 5 + promo[m.promotion or 0] for m in moves],
+        dtype=np.int64,
+    )
+
+
+def indices_to_moves(indices):
+    """
+    Convert an index array back to moves.
+    
+    Args:
+        indices (iterable): Move indices
+    
+    Returns:
+        list: chess.Move objects
+    """
+    return [_INDEX_TO_MOVE[idx] for idx in np.asarray(indices).tolist()]
+
+
+def legal_indices(board):
+    """
+    Get the indices of all legal moves on a board.
+    
+    Args:
+        board (chess.Board): The board
+    
+    Returns:
+        numpy.ndarray: int64 array of legal move indices
+    """
+    return moves_to_indices(board.legal_moves)
+
+
+def pad_legal_indices(indices, counts):
+    """
+    Lay out per-position legal move lists as rows of a padded matrix.
+    
+    Padding repeats the row's first legal index, so every policy head can
+    score it; the returned validity mask marks the real entries.
+    
+    Args:
+        indices (numpy.ndarray): Legal move indices of all positions, concatenated
+        counts (numpy.ndarray): Number of legal moves of each position
+    
+    Returns:
+        tuple: (padded int64 array of shape (N, K), valid bool array of shape
+            (N, K)) with K the largest count
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    width = int(counts.max()) if len(counts) else 0
+    valid = np.arange(width) < counts[:, None]
+    padded = np.zeros((len(counts), width), dtype=np.int64)
+    if len(indices):
+        # A row without legal moves borrows the next row's first index; it is all padding
+        padded[:] = indices[np.minimum(starts, len(indices) - 1), None]
+    padded[valid] = indices
+    return padded, valid
+
+
+def legal_mask(board, out=None, as_tensor=False):
+    """
+    Build the legal-move mask of a board in one shot.
+    
+    Args:
+        board (chess.Board): The board
+        out (numpy.ndarray, optional): bool array of shape (64*64*5,) to write into
+        as_tensor (bool): Return a torch.BoolTensor instead of a NumPy array
+    
+    Returns:
+        numpy.ndarray or torch.Tensor: Boolean mask of shape (64*64*5,)
+    """
+    if out is None:
+        out = np.zeros(NUM_MOVES, dtype=bool)
+    else:
+        out[:] = False
+    out[legal_indices(board)] = True
+    if as_tensor:
+        # Imported here so that the environment never needs torch
+        import torch
+        return torch.from_numpy(out)
+    return out
+
+
+def batch_legal_mask(boards, out=None, as_tensor=False):
+    """
+    Build the legal-move masks of several boards.
+    
+    Args:
+        boards (list): chess.Board objects
+        out (numpy.ndarray, optional): bool array of shape (N, 64*64*5) to write into
+        as_tensor (bool): Return a torch.BoolTensor instead of a NumPy array
+    
+    Returns:
+        numpy.ndarray or torch.Tensor: Boolean masks of shape (N, 64*64*5)
+    """
+    if out is None:
+        out = np.zeros((len(boards), NUM_MOVES), dtype=bool)
+    else:
+        out[:] = False
+    rows = []
+    cols = []
+    for i, board in enumerate(boards):
+        indices = legal_indices(board)
+        rows.append(np.full(len(indices), i, dtype=np.int64))
+        cols.append(indices)
+    if boards:
+        out[np.concatenate(rows), np.concatenate(cols)] = True
+    if as_tensor:
+        import torch
+        return torch.from_numpy(out)
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def candidate_move_indices():
+    """
+    Indices of every move that can ever be legal.
+    
+    These are the queen-line and knight moves between two squares without
+    promotion, plus the four promotions of pawn moves onto the last rank.
+    Fewer than 2000 of the 20480 indices qualify.
+    
+    Returns:
+        numpy.ndarray: Sorted int64 array of move indices (read-only)
+    """
+    indices = []
+    for from_sq in range(64):
+        from_file, from_rank = chess.square_file(from_sq), chess.square_rank(from_sq)
+        for to_sq in range(64):
+            if to_sq == from_sq:
+                continue
+            df = abs(chess.square_file(to_sq) - from_file)
+            dr = abs(chess.square_rank(to_sq) - from_rank)
+            if df == 0 or dr == 0 or df == dr or (df, dr) in ((1, 2), (2, 1)):
+                indices.append(from_sq * 320 + to_sq * 5)
+            # Pawn promotions: rank 7 -> 8 for white, rank 2 -> 1 for black
+            if df <= 1 and (from_rank, chess.square_rank(to_sq)) in ((6, 7), (1, 0)):
+                indices.extend(from_sq * 320 + to_sq * 5 + promo for promo in range(1, 5))
+    result = np.array(sorted(indices), dtype=np.int64)
+    result.flags.writeable = False
+    return result
+
+
+def gather_legal_logits(policy_logits, indices):
+    """
+    Gather policy logits at legal move indices only.
+    
+    This is the compact "legal-only" representation: a softmax over the
+    result is a distribution over legal moves, in the order of ``indices``.
+    
+    Args:
+        policy_logits (torch.Tensor): Logits of shape (..., 64*64*5)
+        indices (numpy.ndarray or torch.Tensor): Legal move indices
+    
+    Returns:
+        torch.Tensor: Logits of shape (..., len(indices))
+    """
+    import torch
+    indices = torch.as_tensor(indices, dtype=torch.long, device=policy_logits.device)
+    return policy_logits.index_select(-1, indices)
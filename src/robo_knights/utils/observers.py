@@ -0,0 +1,158 @@
+"""
+Game observers for GameRunner.
+
+Each observer reacts to a game as it is played: printing it, drawing it,
+recording metrics or writing it out as PGN. Observers only implement the
+hooks they need (see ``robo_knights.environment.game_runner.GameRunner``).
+"""
+
+import time
+from pathlib import Path
+
+import chess
+import chess.pgn
+
+
+class ConsoleObserver:
+    """Prints the game to stdout."""
+    def __init__(self, show_board=True):
+        """
+        Args:
+            show_board (bool): Print the ASCII board after every move; if
+                False only the moves are printed
+        """
+        self.show_board = show_board
+
+    def on_move(self, board, move, reward, agent):
+        if self.show_board:
+            print(board)
+            print()
+        else:
+            print(f"{len(board.move_stack)}. {move.uci()}")
+
+
+class PygameObserver:
+    """
+    Draws the game in a pygame window.
+
+    The board is redrawn only when a move is made. Closing the window or
+    pressing escape stops the game.
+    """
+    def __init__(self, window_size=800, final_delay=2.0):
+        """
+        Args:
+            window_size (int): Size of the window in pixels
+            final_delay (float): Seconds the final position stays on screen
+        """
+        # Imported here so that headless runs never initialize a display
+        from robo_knights.utils.visualization import ChessVisualizer
+        import pygame
+        self._pygame = pygame
+        self.visualizer = ChessVisualizer(window_size=window_size)
+        self.final_delay = final_delay
+        self.closed = False
+
+    def on_game_start(self, board):
+        self.visualizer.draw_board(board)
+
+    def on_move(self, board, move, reward, agent):
+        self.visualizer.draw_board(board)
+
+    def should_stop(self):
+        pygame = self._pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.closed = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.closed = True
+        return self.closed
+
+    def on_game_end(self, board, winner):
+        if self.closed:
+            return
+        self.visualizer.draw_board(board)
+        deadline = time.perf_counter() + self.final_delay
+        while time.perf_counter() < deadline and not self.should_stop():
+            time.sleep(0.05)
+
+    def close(self):
+        self.visualizer.close()
+
+
+class MetricsObserver:
+    """Records every game in a MetricsTracker."""
+    def __init__(self, tracker):
+        """
+        Args:
+            tracker (MetricsTracker): Tracker to log the games to
+        """
+        self.tracker = tracker
+
+    def on_game_start(self, board):
+        self.tracker.start_game()
+
+    def on_move(self, board, move, reward, agent):
+        self.tracker.log_move(move, board)
+
+    def on_game_end(self, board, winner):
+        self.tracker.end_game(winner)
+
+    def close(self):
+        self.tracker.close()
+
+
+class RewardObserver:
+    """
+    Appends the reward of every move to the ``rewards`` of the agent that made it.
+
+    The environment's rewards are from white's point of view; they are stored
+    from the mover's, as in self-play. When the game ends, the side that did
+    not make the last move also gets the outcome, from its own point of view.
+    """
+    def __init__(self):
+        self._agents = {}
+        self._last_reward = 0.0
+
+    def on_game_start(self, board):
+        self._agents = {}
+        self._last_reward = 0.0
+
+    def on_move(self, board, move, reward, agent):
+        # The move has been made, so the mover is the side not to move now
+        mover = not board.turn
+        own_reward = reward if mover == chess.WHITE else -reward
+        agent.rewards.append(own_reward)
+        self._agents[mover] = agent
+        self._last_reward = own_reward
+
+    def on_game_end(self, board, winner):
+        if board.outcome() is None:
+            return
+        opponent = self._agents.get(board.turn)
+        if opponent is not None and opponent.rewards:
+            opponent.rewards[-1] += -self._last_reward
+
+
+class PGNObserver:
+    """Appends every finished game to a PGN file."""
+    def __init__(self, path, white="White", black="Black", event="Robo-Knights"):
+        """
+        Args:
+            path (str): PGN file; games are appended to it
+            white (str): Name of the white player
+            black (str): Name of the black player
+            event (str): Event header of the games
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.headers = {"Event": event, "White": white, "Black": black}
+        self.games = 0
+
+    def on_game_end(self, board, winner):
+        game = chess.pgn.Game.from_board(board)
+        game.headers.update(self.headers)
+        game.headers["Round"] = str(self.games + 1)
+        game.headers["Date"] = time.strftime("%Y.%m.%d")
+        with open(self.path, "a") as f:
+            print(game, file=f, end="\n\n")
+        self.games += 1
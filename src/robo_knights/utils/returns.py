@@ -0,0 +1,84 @@
+"""
+Vectorized return and advantage computation.
+"""
+
+import torch
+
+
+def discounted_cumsum(x, discount):
+    """
+    Reverse discounted cumulative sum: ``y[t] = sum_k discount**k * x[t + k]``.
+
+    Computed as a log-step scan, so an episode of length n takes O(log n)
+    tensor operations instead of an O(n) Python loop, without the underflow
+    of dividing by ``discount**t``.
+
+    Args:
+        x (torch.Tensor): 1-D tensor
+        discount (float): Discount factor
+
+    Returns:
+        torch.Tensor: Tensor of the same shape as ``x``
+    """
+    y = x.clone()
+    n = y.shape[0]
+    shift = 1
+    factor = discount
+    while shift < n:
+        y[:-shift] = y[:-shift] + factor * y[shift:]
+        shift *= 2
+        factor *= factor
+    return y
+
+
+def compute_returns(rewards, gamma):
+    """
+    Discounted returns of one episode.
+
+    Args:
+        rewards (torch.Tensor): Rewards of shape (T,)
+        gamma (float): Discount factor
+
+    Returns:
+        torch.Tensor: Returns of shape (T,)
+    """
+    return discounted_cumsum(rewards, gamma)
+
+
+def compute_gae(rewards, values, gamma, lam, last_value=0.0):
+    """
+    Generalized advantage estimation, GAE(lambda), for one episode.
+
+    Args:
+        rewards (torch.Tensor): Rewards of shape (T,)
+        values (torch.Tensor): Value estimates of shape (T,) (no gradient)
+        gamma (float): Discount factor
+        lam (float): GAE lambda
+        last_value (float): Value of the state after the last step (0 if terminal)
+
+    Returns:
+        tuple: (advantages, returns), both of shape (T,)
+    """
+    next_values = torch.cat([values[1:], values.new_tensor([last_value])])
+    deltas = rewards + gamma * next_values - values
+    advantages = discounted_cumsum(deltas, gamma * lam)
+    return advantages, advantages + values
+
+
+def normalize(x, eps=1e-8):
+    """
+    Standardize a tensor to zero mean and unit variance.
+
+    Tensors with fewer than two elements are only centered, since their
+    standard deviation is undefined.
+
+    Args:
+        x (torch.Tensor): Input tensor
+        eps (float): Added to the standard deviation
+
+    Returns:
+        torch.Tensor: Standardized tensor
+    """
+    if x.numel() < 2:
+        return x - x.mean()
+    return (x - x.mean()) / (x.std() + eps)
@@ -1,6 +1,7 @@
 import pygame
-import sys
-import random
+
+from robo_knights.environment.game_runner import GameRunner, RealTime
+from robo_knights.utils.observers import PygameObserver
 
 # Constants for the display
 WHITE_COLOR = (255, 255, 255)
@@ -65,51 +66,19 @@ def draw_board(screen, board_state, font):
                 ))
                 screen.blit(text_surface, text_rect)
 
-def play_match(agent1, agent2, env):
+def play_match(agent1, agent2, env, seconds_per_move=1.0):
     """
     Play a match between two agents and display it using Pygame.
     
     Args:
-        agent1: First chess agent
-        agent2: Second chess agent
+        agent1: First chess agent (white)
+        agent2: Second chess agent (black)
         env: Chess environment
-    """
-    state = env.reset()
-    done = False
-    turn_white = True
-    
-    pygame.init()
-    font = pygame.font.SysFont(None, 30)
-    screen = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE))
-    pygame.display.set_caption("RL Chess Match")
-    clock = pygame.time.Clock()
-    
-    while not done:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-        
-        screen.fill(GRAY_COLOR)
-        draw_board(screen, state, font)
-        pygame.display.flip()
-        clock.tick(1)  # 1 move/sec
-        
-        legal_moves = env.get_legal_moves()
-        if turn_white:
-            move = agent1.select_action(state, legal_moves)
-        else:
-            move = agent2.select_action(state, legal_moves)
-        
-        if move not in legal_moves:
-            move = random.choice(legal_moves)
-        
-        next_state, reward, done = env.step(move)
-        state = next_state
-        turn_white = not turn_white
+        seconds_per_move (float): Wall time per move
     
-    # Final board
-    draw_board(screen, state, font)
-    pygame.display.flip()
-    pygame.time.wait(2000)
-    pygame.quit() 
\ No newline at end of file
+    Returns:
+        dict: Game result (see GameRunner.play)
+    """
+    with GameRunner(env, agent1, agent2, [PygameObserver(SCREEN_SIZE)],
+                    RealTime(seconds_per_move)) as runner:
+        return runner.play()
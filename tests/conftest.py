@@ -0,0 +1,22 @@
+import os
+import random
+import sys
+
+import chess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def play_random_game(max_plies=120, seed=0):
+    """Play random legal moves from the starting position."""
+    rng = random.Random(seed)
+    board = chess.Board()
+    while board.ply() < max_plies and not board.is_game_over():
+        board.push(rng.choice(list(board.legal_moves)))
+    return board
+
+
+@pytest.fixture
+def random_game():
+    return play_random_game
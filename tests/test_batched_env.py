@@ -0,0 +1,99 @@
+import chess
+import numpy as np
+import pytest
+
+from robo_knights.environment import BatchedChessEnv, ChessEnv
+from robo_knights.utils.move_encoding import NUM_MOVES, index_to_move, legal_indices, move_to_index
+
+FOOLS_MATE = ["f2f3", "e7e5", "g2g4", "d8h4"]
+QUIET = ["g1f3", "g8f6", "f3g1", "f6g8"]
+
+
+def test_stacked_shapes():
+    env = BatchedChessEnv(3)
+    states = env.reset()
+    assert states.shape == (3, 8, 8, 12) and states.dtype == np.float32
+    np.testing.assert_array_equal(states[1], ChessEnv().reset())
+
+    masks = env.get_legal_masks()
+    assert masks.shape == (3, NUM_MOVES) and masks.dtype == bool
+    assert masks.sum(axis=1).tolist() == [20, 20, 20]
+    for moves, indices in zip(env.get_legal_moves(), env.get_legal_indices()):
+        assert [move_to_index(m) for m in moves] == indices.tolist()
+
+
+def test_rewards_dones_and_auto_reset():
+    env = BatchedChessEnv(2)
+    env.reset()
+    for mate, quiet in zip(FOOLS_MATE, QUIET):
+        states, rewards, dones, infos = env.step([chess.Move.from_uci(mate), chess.Move.from_uci(quiet)])
+        assert rewards.shape == dones.shape == (2,)
+        assert rewards.dtype == np.float32 and dones.dtype == bool
+    assert dones.tolist() == [True, False]
+    assert rewards[0] < 0  # black won
+    assert infos[0]["result"] == "0-1"
+    assert infos[0]["final_state"].shape == (8, 8, 12)
+
+    # The finished game restarted, the other one goes on
+    assert env.boards[0].fen() == chess.STARTING_FEN
+    assert len(env.boards[1].move_stack) == 4
+    np.testing.assert_array_equal(states[0], ChessEnv().reset())
+    assert len(env.get_legal_moves()[0]) == 20
+
+
+def test_step_checks_the_number_of_actions():
+    env = BatchedChessEnv(2)
+    env.reset()
+    with pytest.raises(ValueError):
+        env.step([chess.Move.from_uci("e2e4")])
+
+
+def test_reset_game_and_copies():
+    env = BatchedChessEnv(2, copy_obs=False)
+    states = env.reset()
+    env.step([chess.Move.from_uci("e2e4"), chess.Move.from_uci("d2d4")])
+    state = env.reset_game(1)
+    assert env.boards[1].fen() == chess.STARTING_FEN
+    assert len(env.boards[0].move_stack) == 1
+    # Without copies the observation is the live buffer
+    np.testing.assert_array_equal(states[1], state)
+    np.testing.assert_array_equal(env.get_legal_indices()[1], legal_indices(chess.Board()))
+
+
+def test_select_actions_samples_legal_moves():
+    pytest.importorskip("torch")
+    from robo_knights.agents.chess_agent import ChessAgent
+
+    agent = ChessAgent(policy_head="compact", training=False)
+    env = BatchedChessEnv(4)
+    states = env.reset()
+    for _ in range(6):
+        legal = env.get_legal_moves()
+        moves, log_probs, values = agent.select_actions(states, env.get_legal_indices())
+        assert log_probs.shape == values.shape == (4,)
+        assert all(move in game_moves for move, game_moves in zip(moves, legal))
+        assert (log_probs <= 0).all()
+        states, _, _, _ = env.step(moves)
+
+
+def test_batched_self_play_yields_complete_games():
+    pytest.importorskip("torch")
+    from robo_knights.agents.chess_agent import ChessAgent
+    from robo_knights.training.self_play import batched_self_play
+
+    agent = ChessAgent(training=False)
+    games = batched_self_play(agent, BatchedChessEnv(3), max_plies=10, weights_version=lambda: 7)
+    for _ in range(5):
+        white, black, result = next(games)
+        assert len(white) == len(black) == 5
+        assert result == "*"
+        assert white.weights_version == 7
+        # Replaying the recorded moves reproduces every recorded position
+        board = chess.Board()
+        for ply in range(10):
+            side = white if ply % 2 == 0 else black
+            k = ply // 2
+            legal = side.legal_indices[side.legal_offsets[k]:side.legal_offsets[k + 1]]
+            np.testing.assert_array_equal(legal, legal_indices(board))
+            assert side.actions[k] in legal
+            board.push(index_to_move(int(side.actions[k])))
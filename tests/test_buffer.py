@@ -0,0 +1,83 @@
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.environment.encoding import board_to_bitboards, encode_board  # noqa: E402
+from robo_knights.training.buffer import TrajectoryBuffer  # noqa: E402
+from robo_knights.utils.move_encoding import MAX_LEGAL_MOVES, legal_indices  # noqa: E402
+
+
+def fill_path(buffer, boards, first_action=0):
+    """Add one transition per board, playing the first legal move, and close the path."""
+    for step, board in enumerate(boards):
+        legal = legal_indices(board)
+        buffer.add(board_to_bitboards(board), legal, legal[0], log_prob=-1.0,
+                   value=first_action + step)
+    n = len(boards)
+    return buffer.finish_path(np.arange(n), np.arange(n) + 0.5, rewards=np.full(n, 2.0))
+
+
+def test_add_and_get_round_trip(random_game):
+    boards = [random_game(plies, seed=plies) for plies in (0, 15, 40)]
+    buffer = TrajectoryBuffer(8)
+    slots = fill_path(buffer, boards)
+    batch = buffer.get(slots)
+
+    assert len(buffer) == 3
+    for row, board in enumerate(boards):
+        np.testing.assert_array_equal(batch["states"][row].numpy(), encode_board(board))
+        legal = legal_indices(board)
+        valid = batch["legal_valid"][row].numpy()
+        np.testing.assert_array_equal(batch["legal_indices"][row].numpy()[valid], legal)
+        assert (batch["legal_indices"][row].numpy()[~valid] == legal[0]).all()
+        assert batch["legal_indices"][row, batch["action_slots"][row]] == batch["actions"][row]
+    assert batch["dones"].tolist() == [False, False, True]
+    assert batch["advantages"].tolist() == [0.0, 1.0, 2.0]
+    assert batch["rewards"].tolist() == [2.0, 2.0, 2.0]
+
+
+def test_wraparound_overwrites_the_oldest_transitions(random_game):
+    buffer = TrajectoryBuffer(5)
+    boards = [random_game(plies, seed=plies) for plies in range(7)]
+    fill_path(buffer, boards[:3], first_action=0)
+    fill_path(buffer, boards[3:], first_action=100)
+
+    assert len(buffer) == 5
+    assert buffer.ptr == 2
+    finished = buffer.finished_indices()
+    np.testing.assert_array_equal(finished, [2, 3, 4, 0, 1])
+    # Oldest first: the tail of the first path, then the whole second one
+    np.testing.assert_array_equal(buffer.get(finished)["values"].numpy(), [2, 100, 101, 102, 103])
+    np.testing.assert_array_equal(buffer.get(finished)["states"][0].numpy(), encode_board(boards[2]))
+
+
+def test_unfinished_path_is_not_sampled():
+    buffer = TrajectoryBuffer(10)
+    fill_path(buffer, [chess.Board()] * 3)
+    legal = legal_indices(chess.Board())
+    buffer.add(board_to_bitboards(chess.Board()), legal, legal[1])
+    assert len(buffer) == 4
+    assert len(buffer.finished_indices()) == 3
+    np.testing.assert_array_equal(buffer.path_indices(), [3])
+
+    batches = list(buffer.minibatches(2, rng=np.random.default_rng(0)))
+    assert [len(batch["actions"]) for batch in batches] == [2, 1]
+    assert set(buffer.sample(20, rng=np.random.default_rng(0))["values"].tolist()) <= {0.0, 1.0, 2.0}
+
+
+def test_invalid_additions_are_rejected():
+    buffer = TrajectoryBuffer(2)
+    bitboards = board_to_bitboards(chess.Board())
+    with pytest.raises(ValueError):
+        buffer.add(bitboards, [], 0)
+    with pytest.raises(ValueError):
+        buffer.add(bitboards, np.zeros(MAX_LEGAL_MOVES + 1, dtype=np.int64), 0)
+    legal = legal_indices(chess.Board())
+    buffer.add(bitboards, legal, legal[0])
+    buffer.add(bitboards, legal, legal[0])
+    with pytest.raises(RuntimeError):
+        buffer.add(bitboards, legal, legal[0])
+    with pytest.raises(ValueError):
+        TrajectoryBuffer(0)
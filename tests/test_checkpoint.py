@@ -0,0 +1,83 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.training.checkpoint import (  # noqa: E402
+    CheckpointManager, capture_rng_state, latest_run_directory, new_run_directory, restore_rng_state
+)
+
+
+def test_resume_loads_the_latest_checkpoint(tmp_path):
+    directory = str(tmp_path / "run")
+    weights = torch.zeros(3)
+    with CheckpointManager(directory, every_episodes=2) as manager:
+        for episode in range(1, 7):
+            weights += 1
+            manager.maybe_save(episode, lambda: {"episode": episode, "weights": weights})
+            manager.wait()
+
+    with CheckpointManager(directory, resume=True) as manager:
+        state = manager.load_latest()
+    assert state["episode"] == 6
+    # The snapshot was copied, not aliased
+    torch.testing.assert_close(state["weights"], torch.full((3,), 6.0))
+
+
+def test_keeps_only_the_newest_checkpoints(tmp_path):
+    with CheckpointManager(str(tmp_path), keep=2) as manager:
+        for episode in range(5):
+            manager.save(episode, {"episode": episode})
+            manager.wait()
+        assert [episode for episode, _ in manager.checkpoints()] == [3, 4]
+
+
+def test_refuses_a_directory_of_another_run(tmp_path):
+    with CheckpointManager(str(tmp_path)) as manager:
+        manager.save(1, {})
+    with pytest.raises(ValueError):
+        CheckpointManager(str(tmp_path))
+
+
+def test_prunes_only_its_own_checkpoints(tmp_path):
+    with CheckpointManager(str(tmp_path)) as manager:
+        manager.save(1, {})
+    with CheckpointManager(str(tmp_path), keep=1, resume=True) as manager:
+        for episode in (2, 3):
+            manager.save(episode, {})
+            manager.wait()
+        assert [episode for episode, _ in manager.checkpoints()] == [1, 3]
+
+
+def test_latest_run_directory(tmp_path):
+    root = str(tmp_path)
+    assert latest_run_directory(root) is None
+    for name in ("run-20260101-120000-7", "run-20260101-120000-12", "run-20251231-235959-99"):
+        os.makedirs(os.path.join(root, name))
+    assert latest_run_directory(root) == os.path.join(root, "run-20260101-120000-12")
+    assert os.path.dirname(new_run_directory(root)) == root
+
+
+def test_rng_state_round_trip():
+    state = capture_rng_state()
+    expected = (random.random(), np.random.random(), torch.rand(1).item())
+    restore_rng_state(state)
+    assert (random.random(), np.random.random(), torch.rand(1).item()) == expected
+
+
+def test_due_by_episodes_and_minutes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("robo_knights.training.checkpoint.time.monotonic", lambda: now[0])
+    with CheckpointManager(str(tmp_path / "a"), every_episodes=3) as manager:
+        assert [episode for episode in range(1, 10) if manager.due(episode)] == [3, 6, 9]
+    with CheckpointManager(str(tmp_path / "b"), every_minutes=1) as manager:
+        assert not manager.due(1)
+        now[0] += 61
+        assert manager.due(1)
+        manager.save(1, {})
+        assert not manager.due(2)
+    with pytest.raises(RuntimeError):
+        manager.save(2, {})
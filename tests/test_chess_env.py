@@ -0,0 +1,108 @@
+import random
+
+import chess
+import pytest
+
+from robo_knights.environment import ChessEnv, MaterialReward, OutcomeReward
+from robo_knights.environment.chess_env import StepInfo
+from robo_knights.environment.rewards import count_material
+
+
+def play(env, ucis):
+    for uci in ucis:
+        state, reward, done, info = env.step(chess.Move.from_uci(uci))
+    return state, reward, done, info
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_material_matches_a_full_count(seed):
+    rng = random.Random(seed)
+    env = ChessEnv()
+    env.reset()
+    done = False
+    while not done and env.board.ply() < 300:
+        _, reward, done, _ = env.step(rng.choice(env.get_legal_moves()))
+        assert env.material == count_material(env.board)
+        if not done:
+            assert reward == (env.material[chess.WHITE] - env.material[chess.BLACK]) / 100.0
+
+
+def test_en_passant_and_promotion_update_material():
+    env = ChessEnv()
+    env.reset()
+    play(env, ["e2e4", "a7a6", "e4e5", "d7d5", "e5d6"])
+    assert env.material == [38, 39]
+
+    env.board.set_fen("8/P6k/8/8/8/8/6K1/8 w - - 0 1")
+    env.material = count_material(env.board)
+    _, reward, _, _ = env.step(chess.Move.from_uci("a7a8q"))
+    assert env.material == [0, 9]
+    assert reward == pytest.approx(0.09)
+
+
+def test_outcome_is_computed_once_per_step():
+    env = ChessEnv(reward_fn=OutcomeReward())
+    env.reset()
+    _, reward, done, _ = play(env, ["f2f3", "e7e5", "g2g4", "d8h4"])
+    assert done and env.is_game_over()
+    assert env.outcome.winner == chess.BLACK
+    assert reward == -1.0
+
+    env.reset()
+    assert env.outcome is None and not env.is_game_over()
+    assert env.material == count_material(chess.Board())
+
+
+def test_material_reward_scale():
+    env = ChessEnv(reward_fn=MaterialReward(scale=10.0))
+    env.reset()
+    _, reward, _, _ = play(env, ["e2e4", "d7d5", "e4d5"])
+    assert reward == pytest.approx(0.1)
+
+
+def test_lazy_info_is_computed_on_access(monkeypatch):
+    calls = []
+    fen = StepInfo.FIELDS["fen"]
+    monkeypatch.setitem(StepInfo.FIELDS, "fen", lambda board, outcome: calls.append(1) or fen(board, outcome))
+
+    env = ChessEnv()
+    env.reset()
+    _, _, _, info = env.step(chess.Move.from_uci("e2e4"))
+    assert isinstance(info, StepInfo)
+    assert calls == []
+    assert info["fen"] == env.board.fen()
+    assert info["fen"] == env.board.fen()
+    assert calls == [1]
+    assert len(info["legal_moves"]) == 20
+    assert set(info) == set(StepInfo.FIELDS)
+
+    env.step(chess.Move.from_uci("e7e5"))
+    # Cached fields survive, uncomputed ones refuse to describe a newer position
+    assert info["fen"] != env.board.fen()
+    with pytest.raises(RuntimeError):
+        info["is_check"]
+
+
+def test_info_levels():
+    env = ChessEnv(info_level="none")
+    env.reset()
+    assert play(env, ["e2e4"])[3] == {}
+
+    env = ChessEnv(info_level="full")
+    env.reset()
+    _, _, _, info = play(env, ["f2f3", "e7e5", "g2g4", "d8h4"])
+    assert type(info) is dict
+    assert info["is_checkmate"] and info["is_check"]
+    assert not info["is_stalemate"] and not info["is_insufficient_material"]
+    assert info["legal_moves"] == []
+
+    with pytest.raises(ValueError):
+        ChessEnv(info_level="some")
+
+
+def test_illegal_move_ends_the_episode():
+    env = ChessEnv()
+    env.reset()
+    _, reward, done, info = env.step(chess.Move.from_uci("e2e5"))
+    assert reward == -1.0 and done
+    assert info == {"error": "Illegal move"}
@@ -0,0 +1,63 @@
+import chess
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.models.actor_critic import ActorCriticNetwork  # noqa: E402
+from robo_knights.models.compression import (  # noqa: E402
+    Int8RowPolicyHead, compare_policies, compress_network, model_size_bytes, prune_policy_head
+)
+from robo_knights.models.policy_heads import CompactPolicyHead  # noqa: E402
+from robo_knights.utils.move_encoding import candidate_move_indices  # noqa: E402
+
+
+@pytest.fixture
+def boards(random_game):
+    return [chess.Board()] + [random_game(plies, seed=plies) for plies in (10, 30, 60)]
+
+
+def test_pruning_keeps_legal_scores(boards):
+    torch.manual_seed(0)
+    model = ActorCriticNetwork()
+    pruned = prune_policy_head(model)
+    assert isinstance(pruned.policy_head, CompactPolicyHead)
+    assert pruned.config["policy_head"] == "compact"
+    assert model_size_bytes(pruned) < model_size_bytes(model) / 5
+
+    stats = compare_policies(model, pruned, boards)
+    assert stats["kl"] == pytest.approx(0.0, abs=1e-6)
+    assert stats["top1"] == 1.0
+    assert stats["max_value_error"] == 0.0
+
+    with pytest.raises(ValueError):
+        prune_policy_head(pruned)
+
+
+@pytest.mark.parametrize("policy_head", ["dense", "compact"])
+def test_int8_rows_stay_close(policy_head, boards):
+    torch.manual_seed(0)
+    model = ActorCriticNetwork(policy_head=policy_head)
+    quantized = compress_network(model, prune=False, quantize=True)
+    assert isinstance(quantized.policy_head, Int8RowPolicyHead)
+    assert quantized.policy_head.weight_int8.dtype == torch.int8
+
+    stats = compare_policies(model, quantized, boards)
+    assert stats["kl"] < 1e-3
+    assert stats["max_value_error"] == 0.0
+
+    # Scored rows match the dequantized full output
+    states = torch.rand(2, 768)
+    indices = torch.from_numpy(candidate_move_indices()[:6].reshape(2, 3).copy())
+    logits, _ = quantized(states, indices)
+    full, _ = quantized(states)
+    torch.testing.assert_close(logits, full.gather(1, indices))
+
+
+def test_compress_leaves_the_original_untouched(boards):
+    torch.manual_seed(0)
+    model = ActorCriticNetwork().train()
+    before = {key: value.clone() for key, value in model.state_dict().items()}
+    compressed = compress_network(model, quantize_trunk=True)
+    assert model.training and not compressed.training
+    assert all(torch.equal(value, model.state_dict()[key]) for key, value in before.items())
+    assert compare_policies(model, compressed, boards)["top1"] >= 0.5
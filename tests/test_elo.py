@@ -0,0 +1,32 @@
+import numpy as np
+
+from robo_knights.evaluation.elo import fit_elo, score_matrix
+
+
+def test_score_matrix_counts_both_sides():
+    games, points = score_matrix([(0, 1, 1.0), (1, 0, 0.5)], 2)
+    np.testing.assert_array_equal(games, [[0, 2], [2, 0]])
+    np.testing.assert_array_equal(points, [[0, 1.5], [0.5, 0]])
+
+
+def test_even_results_give_equal_ratings():
+    results = [(0, 1, 1.0), (1, 0, 1.0), (0, 1, 0.5), (1, 0, 0.5)] * 5
+    ratings, ci95 = fit_elo(results, 2)
+    np.testing.assert_allclose(ratings, 0.0, atol=1e-6)
+    assert (ci95 > 0).all()
+
+
+def test_ratings_follow_the_expected_score():
+    # 75% against one opponent is about 191 Elo
+    results = [(0, 1, 1.0)] * 150 + [(0, 1, 0.0)] * 50
+    ratings, _ = fit_elo(results, 2, prior_draws=0.0, anchor=1)
+    assert ratings[1] == 0.0
+    np.testing.assert_allclose(ratings[0], 400 * np.log10(3), rtol=1e-4)
+
+
+def test_unbeaten_player_stays_finite_and_ordered():
+    results = [(0, 1, 1.0)] * 10 + [(1, 2, 1.0)] * 10 + [(0, 2, 1.0)] * 10
+    ratings, _ = fit_elo(results, 3)
+    assert np.isfinite(ratings).all()
+    assert ratings[0] > ratings[1] > ratings[2]
+    np.testing.assert_allclose(ratings.mean(), 0.0, atol=1e-6)
@@ -0,0 +1,63 @@
+import chess
+import numpy as np
+
+from robo_knights.environment import ChessEnv
+from robo_knights.environment.encoding import (
+    BoardEncoder, bitboards_to_planes, board_to_bitboards, encode_board, encode_boards, planes_to_bitboards
+)
+
+
+def reference_planes(board):
+    """The original per-square encoding."""
+    state = np.zeros((8, 8, 12), dtype=np.float32)
+    for square, piece in board.piece_map().items():
+        plane = piece.piece_type - 1 + (0 if piece.color == chess.WHITE else 6)
+        state[chess.square_rank(square), chess.square_file(square), plane] = 1.0
+    return state
+
+
+def test_encode_board_matches_per_square_encoding(random_game):
+    board = random_game(60)
+    np.testing.assert_array_equal(encode_board(board), reference_planes(board))
+
+
+def test_encode_board_writes_into_out(random_game):
+    board = random_game(30)
+    out = np.full((8, 8, 12), 7.0, dtype=np.float32)
+    assert encode_board(board, out=out) is out
+    np.testing.assert_array_equal(out, reference_planes(board))
+
+    strided = np.zeros((8, 8, 24), dtype=np.float32)[:, :, ::2]
+    encode_board(board, out=strided)
+    np.testing.assert_array_equal(strided, reference_planes(board))
+
+
+def test_planes_bitboards_round_trip(random_game):
+    boards = [random_game(plies, seed=plies) for plies in (0, 10, 40, 80)]
+    bitboards = np.stack([board_to_bitboards(board) for board in boards])
+    planes = encode_boards(boards)
+    np.testing.assert_array_equal(planes, bitboards_to_planes(bitboards))
+    np.testing.assert_array_equal(planes_to_bitboards(planes), bitboards)
+
+
+def test_board_encoder_reuses_its_buffer(random_game):
+    out = np.full((8, 8, 12), 7.0, dtype=np.float32)
+    encoder = BoardEncoder(out)
+    for plies in (0, 25, 70):
+        board = random_game(plies, seed=plies)
+        assert encoder.encode(board) is out
+        np.testing.assert_array_equal(out, reference_planes(board))
+
+    strided = np.zeros((8, 8, 24), dtype=np.float32)[:, :, ::2]
+    board = random_game(40)
+    BoardEncoder(strided).encode(board)
+    np.testing.assert_array_equal(strided, reference_planes(board))
+
+
+def test_env_state_buffer_is_reused():
+    buffer = np.empty((8, 8, 12), dtype=np.float32)
+    env = ChessEnv(state_buffer=buffer)
+    assert env.reset() is buffer
+    state, _, _, _ = env.step(chess.Move.from_uci("e2e4"))
+    assert state is buffer
+    np.testing.assert_array_equal(buffer, reference_planes(env.board))
@@ -0,0 +1,75 @@
+import chess
+import numpy as np
+import pytest
+
+from robo_knights.agents.eval_cache import EvaluationCache
+from robo_knights.utils.move_encoding import legal_indices
+
+
+def test_hit_returns_logits_in_the_requested_order():
+    cache = EvaluationCache()
+    board = chess.Board()
+    key, legal = cache.key(board), legal_indices(board)
+    logits = np.arange(len(legal), dtype=np.float32)
+    cache.store(key, legal, logits, 0.25)
+
+    shuffled = np.random.default_rng(0).permutation(len(legal))
+    cached_logits, value = cache.lookup(key, legal[shuffled])
+    np.testing.assert_array_equal(cached_logits, logits[shuffled])
+    assert value == 0.25
+
+
+def test_colliding_key_with_other_moves_is_a_miss():
+    cache = EvaluationCache()
+    start, after = chess.Board(), chess.Board()
+    after.push_uci("e2e4")
+    key = cache.key(start)
+    cache.store(key, legal_indices(start), np.zeros(20), 0.0)
+
+    # Same key, different position: the legal moves differ
+    assert cache.lookup(key, legal_indices(after)) is None
+    assert cache.lookup(key, legal_indices(start)[:-1]) is None
+    assert cache.stats["misses"] == 2
+
+
+def test_newer_version_invalidates_entries():
+    cache = EvaluationCache()
+    board = chess.Board()
+    key, legal = cache.key(board), legal_indices(board)
+    cache.store(key, legal, np.zeros(len(legal)), 0.0, version=0)
+    cache.store(cache.key(chess.Board("8/8/8/8/8/8/8/K6k w - - 0 1")), [0], [0.0], 0.0, version=1)
+
+    assert cache.lookup(key, legal, version=1) is None
+    assert cache.lookup(key, legal, version=0) is None
+    assert len(cache) == 1
+
+
+def test_capacity_evicts_least_recently_used():
+    cache = EvaluationCache(capacity=2)
+    for key in (1, 2):
+        cache.store(key, [key], [0.0], 0.0)
+    cache.lookup(1, [1])
+    cache.store(3, [3], [0.0], 0.0)
+    assert cache.lookup(2, [2]) is None
+    assert cache.lookup(1, [1]) is not None
+
+
+def test_agent_reuses_evaluations_of_repeated_positions():
+    torch = pytest.importorskip("torch")
+    from robo_knights.agents.chess_agent import ChessAgent
+    from robo_knights.environment.encoding import encode_board
+
+    cache = EvaluationCache()
+    agent = ChessAgent(training=False, cache=cache)
+    board = chess.Board()
+    # Only graph-free selection uses the cache
+    with torch.no_grad():
+        for _ in range(3):
+            move = agent.select_action(encode_board(board), list(board.legal_moves), board=board)
+            assert move in board.legal_moves
+        assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1
+
+        # New weights make the old entries stale
+        agent.weights_version += 1
+        agent.select_action(encode_board(board), list(board.legal_moves), board=board)
+        assert cache.stats["misses"] == 2
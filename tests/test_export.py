@@ -0,0 +1,92 @@
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.agents.inference_agent import InferenceAgent  # noqa: E402
+from robo_knights.environment.encoding import encode_boards  # noqa: E402
+from robo_knights.models.export import load_inference_weights, load_network, save_atomic  # noqa: E402
+from robo_knights.utils.move_encoding import legal_indices, pad_legal_indices  # noqa: E402
+
+
+def scored_batch(random_game):
+    boards = [chess.Board(), random_game(20), random_game(45, seed=3)]
+    lists = [legal_indices(board) for board in boards]
+    padded, _ = pad_legal_indices(np.concatenate(lists), [len(l) for l in lists])
+    return encode_boards(boards), padded
+
+
+@pytest.mark.parametrize("trunk", ["mlp", "resnet"])
+def test_torchscript_round_trip(trunk, tmp_path, random_game):
+    torch.manual_seed(0)
+    agent = ChessAgent(trunk=trunk, channels=8, blocks=1, training=False)
+    path = str(tmp_path / "agent.pt")
+    agent.export(path)
+
+    states, padded = scored_batch(random_game)
+    logits, values = InferenceAgent.load(path).evaluate_batch(states, padded)
+    with torch.no_grad():
+        expected, expected_values = agent.model(torch.from_numpy(states).reshape(3, -1),
+                                                torch.from_numpy(padded))
+    np.testing.assert_allclose(logits, expected.numpy(), rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(values, expected_values[:, 0].numpy(), rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("trunk, quantize", [("mlp", False), ("resnet", True)])
+def test_rkw_round_trip(trunk, quantize, tmp_path, random_game):
+    torch.manual_seed(0)
+    agent = ChessAgent(trunk=trunk, channels=8, blocks=1, training=False)
+    pt_path, rkw_path = str(tmp_path / "agent.pt"), str(tmp_path / "agent.rkw")
+    agent.export(pt_path, quantize=quantize)
+    agent.export(rkw_path, quantize=quantize)
+    assert not (tmp_path / "agent.rkw.tmp").exists()
+
+    model = load_inference_weights(rkw_path)
+    assert not model.training
+    assert not any(param.requires_grad for param in model.parameters())
+    states, padded = scored_batch(random_game)
+    logits, values = InferenceAgent(model).evaluate_batch(states, padded)
+    expected, expected_values = InferenceAgent.load(pt_path).evaluate_batch(states, padded)
+    np.testing.assert_allclose(logits, expected, rtol=1e-4, atol=1e-5)
+    np.testing.assert_allclose(values, expected_values, rtol=1e-4, atol=1e-5)
+
+
+def test_saving_over_a_loaded_checkpoint(tmp_path):
+    path = str(tmp_path / "agent.pth")
+    torch.manual_seed(0)
+    ChessAgent(training=False).save_model(path)
+    mapped = load_network(path)
+    copied = load_network(path, copy=True)
+    before = {key: value.clone() for key, value in mapped.state_dict().items()}
+
+    # The trained copy does not write through to the file
+    with torch.no_grad():
+        for param in copied.parameters():
+            param.add_(1.0)
+    torch.testing.assert_close(load_network(path).state_dict(), before)
+
+    # Replacing the file leaves the network mapped from the old one intact
+    save_atomic({"config": copied.config, "state_dict": copied.state_dict()}, path)
+    torch.testing.assert_close(mapped.state_dict(), before)
+    torch.testing.assert_close(load_network(path).state_dict(), copied.state_dict())
+    assert not (tmp_path / "agent.pth.tmp").exists()
+
+
+def test_quantized_trunk_export(tmp_path, random_game):
+    torch.manual_seed(0)
+    agent = ChessAgent(training=False)
+    path = str(tmp_path / "agent.pt")
+    agent.export(path, quantize_trunk=True)
+    scorer = torch.jit.load(path)
+    assert any("quantized" in node.kind() for node in scorer.graph.nodes())
+
+    states, padded = scored_batch(random_game)
+    logits, _ = InferenceAgent(scorer).evaluate_batch(states, padded)
+    with torch.no_grad():
+        expected, _ = agent.model(torch.from_numpy(states).reshape(3, -1), torch.from_numpy(padded))
+    np.testing.assert_allclose(logits, expected.numpy(), atol=0.05)
+
+    with pytest.raises(ValueError):
+        agent.export(str(tmp_path / "agent.rkw"), quantize_trunk=True)
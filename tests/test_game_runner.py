@@ -0,0 +1,102 @@
+import chess
+import chess.pgn
+import pytest
+
+from robo_knights.environment import ChessEnv, GameRunner, OutcomeReward, build_pacing
+from robo_knights.environment.game_runner import AsFastAsPossible, FixedDelay, RealTime
+from robo_knights.utils.observers import PGNObserver, RewardObserver
+
+FOOLS_MATE = ["f2f3", "e7e5", "g2g4", "d8h4"]
+
+
+class ScriptedAgent:
+    """Plays the moves of a list in turn."""
+    def __init__(self, ucis):
+        self.moves = iter(ucis)
+        self.rewards = []
+
+    def select_action(self, state, legal_moves, board=None):
+        return chess.Move.from_uci(next(self.moves))
+
+
+def fools_mate_players():
+    return ScriptedAgent(FOOLS_MATE[0::2]), ScriptedAgent(FOOLS_MATE[1::2])
+
+
+def test_rewards_are_stored_from_the_movers_point_of_view():
+    white, black = fools_mate_players()
+    runner = GameRunner(ChessEnv(reward_fn=OutcomeReward()), white, black, [RewardObserver()])
+    result = runner.play()
+    assert result == {"winner": "black", "plies": 4, "result": "0-1", "stopped": False}
+    # The mating move earns +1 for black, and white sees the loss on its last move
+    assert black.rewards == [0.0, 1.0]
+    assert white.rewards == [0.0, -1.0]
+
+
+def test_pgn_observer_appends_games(tmp_path):
+    path = tmp_path / "games" / "out.pgn"
+    observer = PGNObserver(path, "A", "B")
+    for _ in range(2):
+        white, black = fools_mate_players()
+        GameRunner(ChessEnv(), white, black, [observer]).play()
+    with open(path) as f:
+        games = [chess.pgn.read_game(f), chess.pgn.read_game(f)]
+    assert [g.headers["Round"] for g in games] == ["1", "2"]
+    assert games[1].headers["White"] == "A" and games[1].headers["Result"] == "0-1"
+    assert [m.uci() for m in games[0].mainline_moves()] == FOOLS_MATE
+
+
+def test_observers_and_max_plies_stop_games():
+    class StopAfter:
+        def __init__(self, moves):
+            self.moves = moves
+
+        def on_move(self, board, move, reward, agent):
+            self.moves -= 1
+
+        def should_stop(self):
+            return self.moves <= 0
+
+    white, black = fools_mate_players()
+    result = GameRunner(ChessEnv(), white, black, [StopAfter(2)]).play()
+    assert result["stopped"] and result["plies"] == 2 and result["result"] == "*"
+
+    white, black = fools_mate_players()
+    result = GameRunner(ChessEnv(), white, black, max_plies=3).play()
+    assert not result["stopped"] and result["plies"] == 3 and result["winner"] is None
+
+
+def test_illegal_moves_raise():
+    runner = GameRunner(ChessEnv(), ScriptedAgent(["e2e5"]), ScriptedAgent([]))
+    with pytest.raises(ValueError, match="illegal move"):
+        runner.play()
+
+
+def test_pacing(monkeypatch):
+    sleeps = []
+    clock = [100.0]
+    monkeypatch.setattr("time.sleep", lambda seconds: sleeps.append(seconds))
+    monkeypatch.setattr("time.perf_counter", lambda: clock[0])
+
+    assert isinstance(build_pacing("fast"), AsFastAsPossible)
+    fixed = build_pacing("fixed", 0.25)
+    assert isinstance(fixed, FixedDelay)
+    fixed.wait()
+    assert sleeps == [0.25]
+
+    realtime = build_pacing("realtime", 1.0)
+    assert isinstance(realtime, RealTime)
+    realtime.start()
+    clock[0] += 0.4  # thinking time counts towards the move
+    realtime.wait()
+    assert sleeps[-1] == pytest.approx(0.6)
+    clock[0] += 3.0  # a late move does not make the next ones hurry
+    sleeps.clear()
+    realtime.wait()
+    assert sleeps == []
+    clock[0] += 0.5
+    realtime.wait()
+    assert sleeps == [pytest.approx(0.5)]
+
+    with pytest.raises(ValueError):
+        build_pacing("slow")
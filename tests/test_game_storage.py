@@ -0,0 +1,89 @@
+import os
+
+import chess
+import numpy as np
+
+from robo_knights.environment.encoding import encode_board
+from robo_knights.utils.game_storage import (
+    GameStore, GameStoreWriter, index_path, pgn_to_store, store_to_pgn
+)
+from robo_knights.utils.move_encoding import index_to_move
+
+
+def write_games(path, games):
+    with GameStoreWriter(path) as writer:
+        for moves, result in games:
+            writer.write(np.array(moves), result)
+
+
+def stored_games(path):
+    store = GameStore(path)
+    return [(store[k].tolist(), store.result(k)) for k in range(len(store))]
+
+
+def test_round_trip(tmp_path, random_game):
+    path = str(tmp_path / "games.rkg")
+    boards = [random_game(plies, seed=plies) for plies in (0, 7, 40)]
+    with GameStoreWriter(path) as writer:
+        for version, board in enumerate(boards):
+            writer.write_board(board, white_version=version, black_version=version + 1)
+
+    store = GameStore(path)
+    assert len(store) == len(boards)
+    for k, board in enumerate(boards):
+        assert store.moves(k) == board.move_stack
+        assert store.result(k) == board.result()
+        assert store.header(k)["black_version"] == k + 1
+        assert store.board(k).fen() == board.fen()
+
+
+def test_appending_reopens_the_store(tmp_path):
+    path = str(tmp_path / "games.rkg")
+    write_games(path, [([1, 2, 3], "1-0")])
+    write_games(path, [([4], "0-1")])
+    assert stored_games(path) == [([1, 2, 3], "1-0"), ([4], "0-1")]
+
+
+def test_writer_truncates_a_partial_game(tmp_path):
+    path = str(tmp_path / "games.rkg")
+    write_games(path, [([1, 2, 3], "1-0"), ([4, 5], "0-1"), ([6, 7, 8, 9], "*")])
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 5)
+
+    assert len(GameStore(path)) == 2
+    write_games(path, [([10, 11], "1/2-1/2")])
+    assert stored_games(path) == [([1, 2, 3], "1-0"), ([4, 5], "0-1"), ([10, 11], "1/2-1/2")]
+
+
+def test_writer_drops_a_game_without_index_entry(tmp_path):
+    path = str(tmp_path / "games.rkg")
+    write_games(path, [([1, 2, 3], "1-0"), ([4, 5], "0-1")])
+    # Data written, index entry torn
+    with open(index_path(path), "r+b") as f:
+        f.truncate(os.path.getsize(index_path(path)) - 3)
+
+    write_games(path, [([6], "0-1")])
+    assert stored_games(path) == [([1, 2, 3], "1-0"), ([6], "0-1")]
+
+
+def test_positions_and_pgn_round_trip(tmp_path, random_game):
+    path = str(tmp_path / "games.rkg")
+    boards = [random_game(30), random_game(12, seed=4)]
+    with GameStoreWriter(path) as writer:
+        for board in boards:
+            writer.write_board(board, white_version=3, black_version=4)
+
+    store = GameStore(path)
+    replay = chess.Board()
+    for board, state, index in store.positions(0):
+        assert board.fen() == replay.fen()
+        np.testing.assert_array_equal(state, encode_board(replay))
+        replay.push(index_to_move(index))
+    assert replay.fen() == boards[0].fen()
+
+    pgn = str(tmp_path / "games.pgn")
+    copy = str(tmp_path / "copy.rkg")
+    assert store_to_pgn(path, pgn) == 2
+    assert pgn_to_store(pgn, copy) == 2
+    assert stored_games(copy) == stored_games(path)
+    assert GameStore(copy).header(1)["white_version"] == 3
@@ -0,0 +1,73 @@
+import threading
+
+import chess
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.agents.eval_cache import EvaluationCache  # noqa: E402
+from robo_knights.agents.inference_server import InferenceServer  # noqa: E402
+from robo_knights.environment.encoding import encode_board  # noqa: E402
+from robo_knights.evaluation.tournament import RANDOM_PLAYER, run_tournament  # noqa: E402
+from robo_knights.utils.move_encoding import legal_indices  # noqa: E402
+
+
+def test_concurrent_requests_are_batched(random_game):
+    boards = [random_game(plies, seed=plies) for plies in range(16)]
+    agent = ChessAgent(policy_head="compact", training=False)
+    barrier = threading.Barrier(len(boards))
+    moves = [None] * len(boards)
+
+    def play(i):
+        barrier.wait()
+        board = boards[i]
+        moves[i] = client.select_action(encode_board(board), list(board.legal_moves))
+
+    with InferenceServer.from_agent(agent, max_batch_size=16, max_wait_ms=200) as server:
+        client = server.client()
+        threads = [threading.Thread(target=play, args=(i,)) for i in range(len(boards))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert all(move in board.legal_moves for move, board in zip(moves, boards))
+    assert server.stats["requests"] == 16
+    assert server.mean_batch_size > 1
+
+
+def test_empty_requests_are_rejected():
+    board = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")  # stalemate
+    agent = ChessAgent(training=False)
+    with InferenceServer.from_agent(agent) as server:
+        with pytest.raises(ValueError):
+            server.submit(encode_board(board), legal_indices(board), board)
+        # The server keeps answering
+        start = chess.Board()
+        assert 0 <= server.submit(encode_board(start), legal_indices(start)).result() < 20
+
+    with pytest.raises(RuntimeError):
+        server.submit(encode_board(start), legal_indices(start))
+
+
+def test_cached_positions_skip_the_queue():
+    agent = ChessAgent(training=False)
+    board = chess.Board()
+    with InferenceServer.from_agent(agent, cache=EvaluationCache()) as server:
+        for _ in range(3):
+            server.submit(encode_board(board), legal_indices(board), board).result()
+    assert server.stats["requests"] == 1
+    assert server.cache.stats["hits"] == 2
+
+
+def test_served_tournament(tmp_path):
+    path = str(tmp_path / "agent.pth")
+    ChessAgent(policy_head="compact").save_model(path)
+    result = run_tournament([path, RANDOM_PLAYER], games_per_pair=6, workers=0, max_plies=40,
+                            chunk_size=6, verbose=False, serve=True)
+    assert len(result["results"]) == 6
+    assert all(plies <= 40 for _, _, _, plies in result["results"])
+
+    with pytest.raises(ValueError):
+        run_tournament([path, RANDOM_PLAYER], games_per_pair=2, workers=0, agent="mcts", serve=True)
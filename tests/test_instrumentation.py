@@ -0,0 +1,77 @@
+import json
+import pstats
+
+import pytest
+
+from robo_knights.utils import instrumentation
+from robo_knights.utils.instrumentation import JsonlSink, ProfileWindow, PrometheusSink, Recorder
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = instrumentation.enable(Recorder([JsonlSink(tmp_path / "log.jsonl"),
+                                                PrometheusSink(tmp_path / "metrics.prom")],
+                                               window=2))
+    yield recorder
+    instrumentation.disable()
+
+
+def test_disabled_section_is_a_shared_no_op():
+    assert instrumentation.get_recorder() is None
+    assert instrumentation.section("a") is instrumentation.section("b")
+    with instrumentation.section("a"):
+        instrumentation.count("moves")
+
+
+def test_recorder_aggregates_episodes(recorder):
+    for episode in range(3):
+        for _ in range(episode + 1):
+            with instrumentation.section("step"):
+                instrumentation.count("moves", 2)
+        record = recorder.end_episode(reward=1.5)
+        assert record["episode"] == episode + 1
+        assert record["sections"]["step"]["calls"] == episode + 1
+        assert record["counters"] == {"moves": 2 * (episode + 1)}
+        assert record["reward"] == 1.5
+    assert recorder.total_calls["step"] == 6
+    assert recorder.total_counts["moves"] == 12
+    assert set(recorder.window_means()) == {"step"}
+    assert recorder._history.maxlen == 2
+    assert "step" in recorder.summary()
+
+
+def test_sinks_write_every_episode(recorder, tmp_path):
+    with instrumentation.section("backward"):
+        pass
+    instrumentation.count("updates")
+    recorder.end_episode()
+    recorder.end_episode()
+
+    lines = (tmp_path / "log.jsonl").read_text().splitlines()
+    assert [json.loads(line)["episode"] for line in lines] == [1, 2]
+    metrics = (tmp_path / "metrics.prom").read_text()
+    assert "robo_knights_episodes_total 2" in metrics
+    assert 'robo_knights_section_calls_total{section="backward"} 1' in metrics
+    assert 'robo_knights_events_total{name="updates"} 1' in metrics
+    assert not (tmp_path / "metrics.prom.tmp").exists()
+
+
+def test_disable_closes_the_sinks(tmp_path):
+    sink = JsonlSink(tmp_path / "log.jsonl")
+    instrumentation.enable(Recorder([sink]))
+    instrumentation.disable()
+    assert instrumentation.get_recorder() is None
+    assert sink._file.closed
+
+
+def test_profile_window_captures_the_chosen_episodes(tmp_path):
+    with pytest.raises(ValueError):
+        ProfileWindow("perf")
+    output = tmp_path / "profile.prof"
+    window = ProfileWindow("cprofile", start=1, episodes=2, output=str(output))
+    for episode in range(4):
+        window.step(episode)
+        assert (window._profiler is not None) == (1 <= episode < 3)
+        sum(range(1000))
+    window.close()
+    assert pstats.Stats(str(output)).total_calls > 0
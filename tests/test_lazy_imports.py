@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_modules(statement):
+    """Top-level modules loaded by ``statement`` in a fresh interpreter."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(ROOT, "src"), env.get("PYTHONPATH")]))
+    code = f"{statement}\nimport sys\nprint(' '.join(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True,
+                            text=True, check=True)
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("statement", [
+    "import robo_knights",
+    "import robo_knights.agents, robo_knights.training, robo_knights.evaluation",
+    "import robo_knights.utils, robo_knights.visualization",
+    "from robo_knights import ChessEnv",
+    "import main",
+])
+def test_import_does_not_load_torch_or_pygame(statement):
+    modules = imported_modules(statement)
+    assert "torch" not in modules
+    assert "pygame" not in modules
+
+
+def test_names_are_imported_on_first_use():
+    pytest.importorskip("torch")
+    modules = imported_modules("from robo_knights.agents import InferenceAgent")
+    assert "torch" in modules
+    assert "robo_knights.agents.inference_agent" in modules
+    assert "robo_knights.agents.chess_agent" not in modules
+    assert "robo_knights.training" not in modules
+
+
+def test_lazy_exports_cache_and_list_their_names():
+    import robo_knights.evaluation as evaluation
+
+    assert "fit_elo" in dir(evaluation)
+    fit_elo = evaluation.fit_elo
+    assert vars(evaluation)["fit_elo"] is fit_elo
+    with pytest.raises(AttributeError):
+        evaluation.missing
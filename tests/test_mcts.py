@@ -0,0 +1,77 @@
+import chess
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from robo_knights.agents.mcts import MCTS, MCTSAgent  # noqa: E402
+from robo_knights.utils.move_encoding import legal_indices, move_to_index  # noqa: E402
+
+# White to move plays Qxf7#
+SCHOLARS_MATE = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+
+
+class UniformEvaluator:
+    """Equal priors and a value of zero for every position."""
+    def __init__(self):
+        self.calls = 0
+
+    def evaluate_batch(self, states, move_indices):
+        self.calls += 1
+        return np.zeros(np.shape(move_indices), dtype=np.float32), np.zeros(len(states), dtype=np.float32)
+
+
+def test_visit_targets_cover_the_legal_moves():
+    evaluator = UniformEvaluator()
+    search = MCTS(evaluator, simulations=64, batch_size=8)
+    board = chess.Board()
+    moves, policy, value = search.search(board)
+
+    assert sorted(moves.tolist()) == sorted(legal_indices(board).tolist())
+    assert policy.sum() == pytest.approx(1.0)
+    assert search.tree.visits[search.tree.edges(search.root)].sum() == 64
+    assert value == pytest.approx(0.0)
+    # Leaves are evaluated in batches, not one call per simulation
+    assert evaluator.calls < 64 / 2
+
+
+def test_search_finds_mate_in_one():
+    board = chess.Board(SCHOLARS_MATE)
+    moves, policy, value = MCTS(UniformEvaluator(), simulations=200).search(board)
+    assert moves[np.argmax(policy)] == move_to_index(chess.Move.from_uci("h5f7"))
+    assert value > 0
+
+    agent = MCTSAgent(UniformEvaluator(), simulations=200)
+    assert agent.select_action(None, list(board.legal_moves), board=board).uci() == "h5f7"
+    with pytest.raises(ValueError):
+        agent.select_action(None, list(board.legal_moves))
+
+
+def test_tree_is_reused_after_moves():
+    search = MCTS(UniformEvaluator(), simulations=100)
+    board = chess.Board()
+    moves, policy, _ = search.search(board)
+    child_visits = search.tree.visits[search.tree.edges(search.root)]
+    e4_visits = child_visits[moves.tolist().index(move_to_index(chess.Move.from_uci("e2e4")))]
+    assert e4_visits > 0
+
+    board.push(chess.Move.from_uci("e2e4"))
+    search.search(board)
+    assert search.stats["reused_visits"] == e4_visits
+    assert search.tree.node_visits[search.root] == e4_visits + 100
+
+    # An unrelated position starts from a fresh tree
+    search.search(chess.Board(SCHOLARS_MATE))
+    assert search.tree.node_visits[search.root] == 100
+
+
+def test_root_noise_does_not_compound():
+    search = MCTS(UniformEvaluator(), simulations=32, dirichlet_alpha=0.3, seed=0)
+    board = chess.Board()
+    for _ in range(5):
+        search.search(board)
+        edges = search.tree.edges(search.root)
+        # The tree keeps the clean priors, the noisy ones are kept aside
+        np.testing.assert_allclose(search.tree.prior[edges], 1 / 20, rtol=1e-6)
+        assert not np.allclose(search._root_prior, 1 / 20)
+        assert search._root_prior.sum() == pytest.approx(1.0)
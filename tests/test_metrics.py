@@ -0,0 +1,83 @@
+import json
+
+import chess
+import pytest
+
+from robo_knights.utils.game_records import GameRecordWriter
+from robo_knights.utils.metrics import MetricsTracker
+
+FOOLS_MATE = ["f2f3", "e7e5", "g2g4", "d8h4"]
+
+
+def play(tracker, ucis, board=None):
+    board = board or chess.Board()
+    tracker.start_game()
+    for uci in ucis:
+        move = chess.Move.from_uci(uci)
+        board.push(move)
+        tracker.log_move(move, board)
+    tracker.end_game("black" if board.is_checkmate() else None)
+    return board
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_games_are_streamed_as_compact_records(tmp_path):
+    tracker = MetricsTracker(log_dir=tmp_path)
+    play(tracker, FOOLS_MATE)
+    metrics = tracker.get_current_metrics()
+    play(tracker, ["e2e4"], chess.Board("8/8/8/8/8/8/4P3/K6k w - - 0 1"))
+    tracker.close()
+
+    [path] = tmp_path.glob("games-*.jsonl")
+    first, second = read_jsonl(path)
+    assert first["moves"] == FOOLS_MATE and first["winner"] == "black"
+    assert first["game_id"] == 1 and first["start_fen"] is None
+    assert len(first["move_ns"]) == 4 and first["move_ns"] == sorted(first["move_ns"])
+    assert second["start_fen"] == "8/8/8/8/8/8/4P3/K6k w - - 0 1"
+    assert second["first_ply"] == 1
+
+    # Details are derived by replaying the game
+    assert metrics["moves"][-1]["is_checkmate"]
+    assert metrics["moves"][0]["fen"] == "rnbqkbnr/pppppppp/8/8/8/5P2/PPPPP1PP/RNBQKBNR b KQkq - 0 1"
+
+
+def test_no_files_without_streaming(tmp_path):
+    tracker = MetricsTracker(log_dir=tmp_path, stream=False)
+    play(tracker, FOOLS_MATE)
+    tracker.close()
+    assert tracker.games == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_writer_batches_flushes_and_closes(tmp_path):
+    path = tmp_path / "records.jsonl"
+    writer = GameRecordWriter(path, batch_size=3, flush_interval=60)
+    for game_id in range(5):
+        writer.write({"game_id": game_id})
+    writer.flush()
+    assert writer.written == 5
+    assert [r["game_id"] for r in read_jsonl(path)] == list(range(5))
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.write({"game_id": 5})
+
+    # JSONL files are appended to
+    writer = GameRecordWriter(path)
+    writer.write({"game_id": 5})
+    writer.close()
+    assert len(read_jsonl(path)) == 6
+
+
+def test_writer_errors_reach_the_caller(tmp_path):
+    writer = GameRecordWriter(tmp_path / "records.jsonl")
+    writer.write({"not json": object()})
+    with pytest.raises(RuntimeError, match="failed"):
+        writer.flush()
+    writer.close()
+
+    with pytest.raises(ValueError):
+        GameRecordWriter(tmp_path / "records.csv", format="csv")
@@ -0,0 +1,70 @@
+import chess
+import numpy as np
+
+from robo_knights.utils.move_encoding import (
+    INDEX_TO_FROM, INDEX_TO_PROMO, INDEX_TO_TO, NUM_MOVES, batch_legal_mask, candidate_move_indices,
+    index_to_move, indices_to_moves, legal_indices, legal_mask, move_to_index, moves_to_indices
+)
+
+PROMOTION_FEN = "8/P6k/8/8/8/8/6Kp/8 w - - 0 1"
+
+
+def test_move_index_round_trip(random_game):
+    board = random_game(80)
+    moves = list(board.move_stack)
+    board = chess.Board()
+    for move in moves:
+        assert index_to_move(move_to_index(move)) == move
+        board.push(move)
+    np.testing.assert_array_equal(moves_to_indices(moves), [move_to_index(m) for m in moves])
+    assert indices_to_moves(moves_to_indices(moves)) == moves
+
+
+def test_promotions_and_out_of_range_indices():
+    board = chess.Board(PROMOTION_FEN)
+    promotions = [move for move in board.legal_moves if move.promotion]
+    assert len(promotions) == 4
+    indices = moves_to_indices(promotions)
+    assert len(set(indices.tolist())) == 4
+    assert indices_to_moves(indices) == promotions
+
+    assert index_to_move(-1) is None
+    assert index_to_move(NUM_MOVES) is None
+
+
+def test_index_tables():
+    idx = move_to_index(chess.Move.from_uci("e7e8n"))
+    assert INDEX_TO_FROM[idx] == chess.E7
+    assert INDEX_TO_TO[idx] == chess.E8
+    assert INDEX_TO_PROMO[idx] == 4
+    assert len(INDEX_TO_FROM) == len(INDEX_TO_TO) == len(INDEX_TO_PROMO) == NUM_MOVES
+
+
+def test_legal_mask_matches_legal_moves(random_game):
+    board = random_game(40)
+    mask = legal_mask(board)
+    assert mask.shape == (NUM_MOVES,) and mask.dtype == bool
+    assert set(np.flatnonzero(mask).tolist()) == {move_to_index(m) for m in board.legal_moves}
+
+    # A reused buffer is cleared before writing
+    out = np.ones(NUM_MOVES, dtype=bool)
+    assert legal_mask(chess.Board(), out=out) is out
+    assert out.sum() == 20
+
+
+def test_batch_legal_mask(random_game):
+    boards = [chess.Board(), random_game(30), chess.Board(PROMOTION_FEN)]
+    masks = batch_legal_mask(boards)
+    assert masks.shape == (3, NUM_MOVES)
+    for board, mask in zip(boards, masks):
+        np.testing.assert_array_equal(mask, legal_mask(board))
+    assert batch_legal_mask([]).shape == (0, NUM_MOVES)
+
+
+def test_candidates_cover_legal_moves(random_game):
+    candidates = set(candidate_move_indices().tolist())
+    assert len(candidates) < 2000
+    for seed in range(5):
+        board = random_game(60, seed=seed)
+        assert set(legal_indices(board).tolist()) <= candidates
+    assert set(legal_indices(chess.Board(PROMOTION_FEN)).tolist()) <= candidates
@@ -0,0 +1,78 @@
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.models.actor_critic import ActorCriticNetwork  # noqa: E402
+from robo_knights.models.policy_heads import build_policy_head  # noqa: E402
+from robo_knights.utils.move_encoding import (  # noqa: E402
+    NUM_MOVES, gather_legal_logits, legal_indices, pad_legal_indices
+)
+
+
+def test_pad_legal_indices(random_game):
+    boards = [chess.Board(), random_game(20)]
+    lists = [legal_indices(board) for board in boards]
+    padded, valid = pad_legal_indices(np.concatenate(lists), [len(l) for l in lists])
+
+    assert padded.shape == valid.shape == (2, max(len(l) for l in lists))
+    for row, legal in enumerate(lists):
+        np.testing.assert_array_equal(padded[row][valid[row]], legal)
+        assert (padded[row][~valid[row]] == legal[0]).all()
+
+
+def test_gather_legal_logits_keeps_only_legal_moves(random_game):
+    board = random_game(30)
+    legal = legal_indices(board)
+    logits = torch.randn(3, NUM_MOVES)
+    gathered = gather_legal_logits(logits, legal)
+    assert gathered.shape == (3, len(legal))
+    torch.testing.assert_close(gathered, logits[:, torch.from_numpy(legal)])
+    # A softmax over the gathered logits is a distribution over the legal moves only
+    torch.testing.assert_close(gathered.softmax(dim=1).sum(dim=1), torch.ones(3))
+
+
+@pytest.mark.parametrize("kind", ["dense", "bilinear", "compact"])
+def test_score_matches_the_full_output(kind, random_game):
+    torch.manual_seed(0)
+    head = build_policy_head(kind, 32)
+    x = torch.randn(2, 32)
+    full = head(x)
+    assert full.shape == (2, NUM_MOVES)
+
+    boards = [random_game(10), random_game(50, seed=1)]
+    legal = torch.from_numpy(legal_indices(boards[0]))
+    torch.testing.assert_close(head.score(x, legal), full[:, legal])
+
+    lists = [legal_indices(board) for board in boards]
+    padded, _ = pad_legal_indices(np.concatenate(lists), [len(l) for l in lists])
+    padded = torch.from_numpy(padded)
+    torch.testing.assert_close(head.score(x, padded), full.gather(1, padded))
+
+
+def test_factorized_heads_are_smaller():
+    sizes = {kind: sum(p.numel() for p in build_policy_head(kind, 128).parameters())
+             for kind in ("dense", "bilinear", "compact")}
+    assert max(sizes["bilinear"], sizes["compact"]) < sizes["dense"] / 9
+
+
+def test_compact_head_rejects_impossible_moves():
+    head = build_policy_head("compact", 8)
+    assert torch.isinf(head(torch.randn(1, 8))[0, 0])  # a1a1
+    with pytest.raises(ValueError):
+        head.score(torch.randn(1, 8), torch.tensor([0]))
+
+
+def test_network_scores_per_row_indices(random_game):
+    torch.manual_seed(0)
+    model = ActorCriticNetwork(policy_head="bilinear")
+    boards = [chess.Board(), random_game(25)]
+    lists = [legal_indices(board) for board in boards]
+    padded, _ = pad_legal_indices(np.concatenate(lists), [len(l) for l in lists])
+    states = torch.randn(2, 768)
+    logits, values = model(states, torch.from_numpy(padded))
+    full, full_values = model(states)
+    assert logits.shape == padded.shape and values.shape == (2, 1)
+    torch.testing.assert_close(logits, full.gather(1, torch.from_numpy(padded)))
+    torch.testing.assert_close(values, full_values)
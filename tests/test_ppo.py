@@ -0,0 +1,59 @@
+import random
+
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.environment.encoding import encode_board  # noqa: E402
+from robo_knights.training.buffer import TrajectoryBuffer  # noqa: E402
+from robo_knights.training.ppo import PPOLearner  # noqa: E402
+
+
+def collect(agent, games=3, plies=10, seed=0):
+    """Fill the agent's buffer with short self-play games."""
+    rng = random.Random(seed)
+    for _ in range(games):
+        board = chess.Board()
+        for _ in range(plies):
+            board.push(agent.select_action(encode_board(board), list(board.legal_moves)))
+            agent.rewards.append(rng.uniform(-1, 1))
+        agent.store_episode()
+
+
+@pytest.mark.parametrize("trunk", ["mlp", "resnet"])
+def test_first_minibatch_reproduces_the_behaviour_policy(trunk):
+    torch.manual_seed(0)
+    agent = ChessAgent(gae_lambda=0.95, buffer=TrajectoryBuffer(64), policy_head="compact",
+                       trunk=trunk, channels=8, blocks=1)
+    collect(agent)
+    learner = PPOLearner(agent)
+    batch = agent.buffer.get(agent.buffer.finished_indices())
+
+    stats = learner._minibatch_loss(agent.model, batch)
+    assert stats["approx_kl"] == pytest.approx(0.0, abs=1e-5)
+    assert stats["clip_fraction"] == 0.0
+
+
+def test_update_runs_every_epoch_and_minibatch():
+    torch.manual_seed(0)
+    agent = ChessAgent(gae_lambda=0.95, buffer=TrajectoryBuffer(64), policy_head="compact")
+    collect(agent)
+    before = [p.detach().clone() for p in agent.model.parameters()]
+
+    stats = PPOLearner(agent, epochs=3, minibatch_size=8, seed=0).update(agent.buffer)
+    assert stats["steps"] == 3 * 4  # 30 transitions in minibatches of 8
+    assert np.isfinite([stats[key] for key in ("policy_loss", "value_loss", "entropy")]).all()
+    assert stats["entropy"] > 0
+    assert any(not torch.equal(a, b) for a, b in zip(before, agent.model.parameters()))
+
+
+def test_target_kl_stops_early():
+    torch.manual_seed(0)
+    agent = ChessAgent(gae_lambda=0.95, buffer=TrajectoryBuffer(64), policy_head="compact", lr=0.1)
+    collect(agent)
+    stats = PPOLearner(agent, epochs=10, minibatch_size=30, target_kl=1e-3, seed=0).update(agent.buffer)
+    # The first epoch still sees the behaviour policy, a large step then moves away from it
+    assert 2 <= stats["steps"] < 10
@@ -0,0 +1,58 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.models.actor_critic import ActorCriticNetwork  # noqa: E402
+from robo_knights.models.residual import ChannelAffine, ConvBlock, ResidualTrunk  # noqa: E402
+
+
+def randomize_affine(module):
+    for affine in module.modules():
+        if isinstance(affine, ChannelAffine):
+            torch.nn.init.uniform_(affine.weight, 0.5, 1.5)
+            torch.nn.init.normal_(affine.bias)
+
+
+def test_train_and_eval_mode_agree():
+    torch.manual_seed(0)
+    trunk = ResidualTrunk(hidden_size=32, channels=8, blocks=2)
+    randomize_affine(trunk)
+    states = torch.rand(5, 768)
+    single = trunk.train()(states[:1])
+    batch = trunk(states)
+    # A position scores the same alone, in a batch and in eval mode
+    torch.testing.assert_close(single, batch[:1])
+    torch.testing.assert_close(trunk.eval()(states), batch)
+
+
+def test_affine_is_learned():
+    trunk = ResidualTrunk(hidden_size=16, channels=4, blocks=1)
+    trunk(torch.rand(2, 768)).sum().backward()
+    assert trunk.stem.affine.weight.grad is not None
+    assert trunk.stem.affine.bias.grad is not None
+
+
+def test_fusion_keeps_the_outputs():
+    torch.manual_seed(0)
+    model = ActorCriticNetwork(trunk="resnet", channels=8, blocks=2, policy_head="compact")
+    randomize_affine(model)
+    states = torch.rand(3, 768)
+    expected = model(states)
+    model.optimize_for_inference()
+    assert not any(isinstance(m, ChannelAffine) for m in model.modules())
+    for actual, wanted in zip(model(states), expected):
+        torch.testing.assert_close(actual, wanted, rtol=1e-4, atol=1e-5)
+
+
+def test_loads_batch_norm_checkpoints():
+    torch.manual_seed(0)
+    block = ConvBlock(4, 6)
+    bn = torch.nn.BatchNorm2d(6).eval()
+    torch.nn.init.normal_(bn.weight)
+    torch.nn.init.normal_(bn.bias)
+    state_dict = {"conv.weight": block.conv.weight.detach().clone()}
+    state_dict.update({f"bn.{key}": value for key, value in bn.state_dict().items()})
+
+    block.load_state_dict(state_dict)
+    x = torch.rand(2, 4, 8, 8)
+    torch.testing.assert_close(block(x), bn(block.conv(x)))
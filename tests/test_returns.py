@@ -0,0 +1,60 @@
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.environment.encoding import encode_board  # noqa: E402
+from robo_knights.utils.returns import compute_gae, discounted_cumsum, normalize  # noqa: E402
+
+
+def loop_cumsum(x, discount):
+    y = np.zeros(len(x))
+    running = 0.0
+    for t in reversed(range(len(x))):
+        running = x[t] + discount * running
+        y[t] = running
+    return y
+
+
+@pytest.mark.parametrize("length", [1, 2, 7, 64, 301])
+def test_discounted_cumsum_matches_loop(length):
+    x = np.random.default_rng(length).normal(size=length)
+    y = discounted_cumsum(torch.tensor(x, dtype=torch.float64), 0.97)
+    np.testing.assert_allclose(y.numpy(), loop_cumsum(x, 0.97), rtol=1e-10)
+
+
+def test_gae_matches_loop():
+    rng = np.random.default_rng(0)
+    rewards, values = rng.normal(size=50), rng.normal(size=50)
+    gamma, lam = 0.99, 0.95
+
+    expected = np.zeros(50)
+    running = 0.0
+    for t in reversed(range(50)):
+        next_value = values[t + 1] if t + 1 < 50 else 0.0
+        running = rewards[t] + gamma * next_value - values[t] + gamma * lam * running
+        expected[t] = running
+
+    advantages, returns = compute_gae(torch.tensor(rewards), torch.tensor(values), gamma, lam)
+    np.testing.assert_allclose(advantages.numpy(), expected, rtol=1e-10)
+    np.testing.assert_allclose(returns.numpy(), expected + values, rtol=1e-10)
+
+
+def test_normalize_single_element_is_centered():
+    assert normalize(torch.tensor([3.0])).item() == 0.0
+
+
+def test_finish_episode_takes_one_step_and_clears():
+    agent = ChessAgent(policy_head="compact")
+    before = [p.detach().clone() for p in agent.model.parameters()]
+    board = chess.Board()
+    for reward in (0.1, -0.2, 0.3):
+        move = agent.select_action(encode_board(board), list(board.legal_moves))
+        board.push(move)
+        agent.rewards.append(reward)
+    agent.finish_episode()
+
+    assert agent.saved_log_probs == agent.saved_values == agent.rewards == []
+    assert any(not torch.equal(a, b) for a, b in zip(before, agent.model.parameters()))
@@ -0,0 +1,66 @@
+import queue
+import threading
+
+import chess
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.environment.encoding import bitboards_to_planes, encode_board  # noqa: E402
+from robo_knights.training.checkpoint import CheckpointManager  # noqa: E402
+from robo_knights.training.self_play import (  # noqa: E402
+    WORKER_ERROR, SelfPlayPool, _self_play_env, _self_play_worker, play_self_play_game
+)
+from robo_knights.utils.move_encoding import index_to_move, legal_indices  # noqa: E402
+
+
+def test_self_play_game_records_both_sides():
+    agent = ChessAgent(policy_head="compact", training=False)
+    white, black = play_self_play_game(agent.model, _self_play_env(), weights_version=3, max_plies=12)
+    assert len(white) == len(black) == 6
+    assert white.color == chess.WHITE and black.color == chess.BLACK
+    assert white.weights_version == black.weights_version == 3
+
+    board = chess.Board()
+    for ply in range(12):
+        side, k = (white, black)[ply % 2], ply // 2
+        np.testing.assert_array_equal(bitboards_to_planes(side.bitboards[k]), encode_board(board))
+        legal = side.legal_indices[side.legal_offsets[k]:side.legal_offsets[k + 1]]
+        np.testing.assert_array_equal(legal, legal_indices(board))
+        board.push(index_to_move(int(side.actions[k])))
+
+
+def test_failing_worker_reports_its_traceback():
+    output = queue.Queue()
+    with pytest.raises(AttributeError):
+        # No model to play with
+        _self_play_worker(0, None, None, threading.Lock(), output, threading.Event(), 0, 10, 0)
+    worker_id, marker, text = output.get_nowait()
+    assert worker_id == 0 and marker == WORKER_ERROR
+    assert "AttributeError" in text
+
+
+def test_pool_raises_when_a_worker_dies():
+    agent = ChessAgent(policy_head="compact")
+    with SelfPlayPool(agent, num_workers=1, max_plies=4) as pool:
+        pool._workers[0].kill()
+        with pytest.raises(RuntimeError, match="exited with code"):
+            pool.train(2, log_every=0)
+
+
+def test_pool_trains_and_checkpoints(tmp_path):
+    agent = ChessAgent(policy_head="compact")
+    before = [p.detach().clone() for p in agent.model.parameters()]
+    with CheckpointManager(tmp_path, every_episodes=2) as checkpoints:
+        with SelfPlayPool(agent, num_workers=2, games_per_update=2, max_plies=6) as pool:
+            stats = pool.train(5, log_every=0, checkpoints=checkpoints, start_game=1,
+                               state_fn=lambda games: {"episode": games})
+    # Games 2..5 with updates after games 2, 4 and the last one
+    assert stats["games"] == 4 and stats["updates"] == 3
+    assert 0 < stats["plies"] <= 4 * 6
+    assert pool.weights_version == 3
+    assert any(not torch.equal(a, b) for a, b in zip(before, agent.model.parameters()))
+    assert [episode for episode, _ in checkpoints.checkpoints()] == [2, 4, 5]
+    assert checkpoints.load_latest() == {"episode": 5}
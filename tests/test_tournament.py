@@ -0,0 +1,30 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from robo_knights.agents.chess_agent import ChessAgent  # noqa: E402
+from robo_knights.evaluation.tournament import RANDOM_PLAYER, run_tournament, schedule  # noqa: E402
+
+
+def test_schedule_alternates_colours():
+    games = schedule(3, 2)
+    assert sorted(games) == sorted([(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)])
+    assert schedule(3, 1, "gauntlet") == [(0, 1), (0, 2)]
+    with pytest.raises(ValueError):
+        schedule(3, 1, "swiss")
+
+
+@pytest.mark.parametrize("agent", ["policy", "mcts"])
+def test_results_do_not_depend_on_the_workers(agent, tmp_path):
+    path = str(tmp_path / "agent.pth")
+    ChessAgent(policy_head="compact").save_model(path)
+    options = dict(games_per_pair=4, max_plies=16, agent=agent, simulations=8, seed=5,
+                   chunk_size=3, verbose=False)
+
+    serial = run_tournament([path, RANDOM_PLAYER], workers=0, **options)
+    again = run_tournament([path, RANDOM_PLAYER], workers=0, **options)
+    parallel = run_tournament([path, RANDOM_PLAYER], workers=2, **options)
+    # Agents are reseeded per game, so neither earlier games nor the worker matter
+    assert serial["results"] == again["results"] == parallel["results"]
+    assert serial["names"] == ["agent", "random"]
+    assert serial["ratings"][1] == 0.0